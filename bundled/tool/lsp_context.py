@@ -0,0 +1,191 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Completion context of the cursor position."""
+
+from __future__ import annotations
+
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_ROOTS = ("self.pydantic_module",)
+
+CLOSING_BRACKETS = {")": "(", "]": "["}
+OPENING_BRACKETS = {"(": ")", "[": "]"}
+
+# A name of an access chain with its start and end column.
+ChainName = Tuple[str, int, int]
+
+
+class CompletionContext(NamedTuple):
+    """Access chain in front of the cursor, e.g. for
+    `self.pydantic_module.Order(...).customer.na|` with root
+    `self.pydantic_module` the chain is `["Order", "customer"]` and the
+    prefix `"na"`."""
+
+    root: str
+    chain: List[str]
+    prefix: str
+
+
+def _is_identifier_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _skip_identifier(line: str, pos: int) -> int:
+    while pos > 0 and _is_identifier_char(line[pos - 1]):
+        pos -= 1
+    return pos
+
+
+def _skip_whitespace(line: str, pos: int) -> int:
+    while pos > 0 and line[pos - 1] in " \t":
+        pos -= 1
+    return pos
+
+
+def _skip_brackets(line: str, pos: int) -> Optional[int]:
+    """Returns the position of the bracket opening the one before `pos`, None
+    if it is unbalanced."""
+    expected = [CLOSING_BRACKETS[line[pos - 1]]]
+    pos -= 1
+    while pos > 0 and expected:
+        char = line[pos - 1]
+        if char in CLOSING_BRACKETS:
+            expected.append(CLOSING_BRACKETS[char])
+        elif char in "([{":
+            if char != expected.pop():
+                return None
+        pos -= 1
+    return None if expected else pos
+
+
+def identifier_end(line: str, character: int) -> int:
+    """Returns the end of the identifier the cursor is in."""
+    pos = min(character, len(line))
+    while pos < len(line) and _is_identifier_char(line[pos]):
+        pos += 1
+    return pos
+
+
+def completion_context(
+    line: str, character: int, roots: Sequence[str] = DEFAULT_ROOTS
+) -> Optional[CompletionContext]:
+    """Scans backwards once from `character` for `<root>.<chain>.<prefix>`.
+
+    Whitespace around dots is allowed, and calls or subscripts such as
+    `Order(...)` or `lines[0]` stand for the value of the name in front of
+    them. Returns None if the cursor is not on such an access chain.
+    """
+    end = min(character, len(line))
+    pos = _skip_identifier(line, end)
+    prefix = line[pos:end]
+
+    names: List[str] = []
+    while True:
+        dot = _skip_whitespace(line, pos)
+        if dot == 0 or line[dot - 1] != ".":
+            break
+        pos = _skip_whitespace(line, dot - 1)
+        while pos > 0 and line[pos - 1] in CLOSING_BRACKETS:
+            pos = _skip_brackets(line, pos)
+            if pos is None:
+                return None
+            pos = _skip_whitespace(line, pos)
+        start = _skip_identifier(line, pos)
+        if start == pos:
+            return None
+        names.append(line[start:pos])
+        pos = start
+    names.reverse()
+
+    for root in roots:
+        root_names = root.split(".")
+        if names[: len(root_names)] == root_names:
+            return CompletionContext(root, names[len(root_names) :], prefix)
+    return None
+
+
+def _code_end(line: str) -> int:
+    """Returns where a trailing comment starts, ignoring `#` in strings."""
+    quote = None
+    pos = 0
+    while pos < len(line):
+        char = line[pos]
+        if quote:
+            if char == "\\":
+                pos += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "#":
+            return pos
+        pos += 1
+    return len(line)
+
+
+def _skip_whitespace_forward(line: str, pos: int) -> int:
+    while pos < len(line) and line[pos] in " \t":
+        pos += 1
+    return pos
+
+
+def _skip_brackets_forward(line: str, pos: int) -> Optional[int]:
+    """Returns the position after the bracket closing the one at `pos`, None
+    if it is not closed on this line."""
+    expected = []
+    while pos < len(line):
+        char = line[pos]
+        if char in OPENING_BRACKETS:
+            expected.append(OPENING_BRACKETS[char])
+        elif char in ")]":
+            if not expected or char != expected.pop():
+                return None
+            if not expected:
+                return pos + 1
+        pos += 1
+    return None
+
+
+def _chain_after(line: str, pos: int, end: int) -> List[ChainName]:
+    names: List[ChainName] = []
+    while True:
+        pos = _skip_whitespace_forward(line, pos)
+        if pos >= end or line[pos] != ".":
+            return names
+        start = _skip_whitespace_forward(line, pos + 1)
+        pos = start
+        while pos < end and _is_identifier_char(line[pos]):
+            pos += 1
+        if pos == start:
+            return names
+        names.append((line[start:pos], start, pos))
+        pos = _skip_whitespace_forward(line, pos)
+        while pos < end and line[pos] in OPENING_BRACKETS:
+            pos = _skip_brackets_forward(line, pos)
+            if pos is None:
+                return names
+            pos = _skip_whitespace_forward(line, pos)
+
+
+def access_chains(
+    line: str, roots: Sequence[str] = DEFAULT_ROOTS
+) -> List[List[ChainName]]:
+    """Returns the names following every root in the line, e.g.
+    `[("Order", 21, 26), ("lines", 27, 32)]` for
+    `self.pydantic_module.Order.lines`. Comments are skipped."""
+    end = _code_end(line)
+    chains = []
+    for root in roots:
+        start = line.find(root, 0, end)
+        while start >= 0:
+            root_end = start + len(root)
+            before = line[start - 1] if start else ""
+            after = line[root_end] if root_end < len(line) else ""
+            if not (
+                _is_identifier_char(before)
+                or before == "."
+                or _is_identifier_char(after)
+            ):
+                chains.append(_chain_after(line, root_end, end))
+            start = line.find(root, root_end, end)
+    return [chain for chain in chains if chain]
@@ -0,0 +1,220 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Diagnostics for model references that do not resolve."""
+
+from __future__ import annotations
+
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import lsp_context as context
+import lsp_schema_cache as schema_cache
+
+# Time to wait for a burst of edits to end before checking a document.
+DEBOUNCE_DELAY = 0.3
+
+# Attributes every pydantic model has besides its fields (v1 and v2).
+MODEL_ATTRIBUTES = frozenset(
+    (
+        "Config",
+        "construct",
+        "copy",
+        "dict",
+        "from_orm",
+        "json",
+        "parse_file",
+        "parse_obj",
+        "parse_raw",
+        "schema",
+        "schema_json",
+        "update_forward_refs",
+        "validate",
+    )
+)
+
+# Column range and message of a problem within a line.
+LineProblem = Tuple[int, int, str]
+
+# Replaced line range (first, last) and the number of lines replacing it,
+# None for a change of the whole document.
+LineChange = Optional[Tuple[int, int, int]]
+
+
+def _is_model_attribute(name: str) -> bool:
+    return name in MODEL_ATTRIBUTES or name.startswith(("model_", "__"))
+
+
+def check_line(
+    namespace: schema_cache.ModelNamespace,
+    line: str,
+    roots: Sequence[str] = context.DEFAULT_ROOTS,
+) -> List[LineProblem]:
+    """Returns the classes and fields referenced in the line that the model
+    namespace knows to be missing.
+
+    Other names the model modules define, such as functions, and the
+    methods, properties and class variables of a class are not reported.
+    """
+    problems = []
+    for chain in context.access_chains(line, roots):
+        class_name, start, end = chain[0]
+        owner = namespace.get_class(class_name)
+        if owner is None:
+            if not namespace.defines(class_name):
+                problems.append(
+                    (start, end, f"Model class '{class_name}' does not exist")
+                )
+            continue
+        for name, start, end in chain[1:]:
+            if _is_model_attribute(name) or name in owner.attributes:
+                break
+            field = owner.fields.get(name)
+            if field is None:
+                problems.append((start, end, f"'{owner.name}' has no field '{name}'"))
+                break
+            owner = namespace.get_target(field)
+            if owner is None:
+                break
+    return problems
+
+
+class _DocumentState:
+    __slots__ = ("version", "lines", "timer")
+
+    def __init__(self, version: Optional[int]):
+        self.version: Optional[int] = version
+        # Problems per line, None for lines that need to be checked.
+        self.lines: Optional[List[Optional[List[LineProblem]]]] = None
+        self.timer: Optional[threading.Timer] = None
+
+
+class OpenDocuments:
+    """Keeps the problems of open documents per line.
+
+    Edits only mark the changed lines to be checked again, the check runs
+    once a burst of edits settled for `delay` seconds. `invalidate_all`
+    re-checks every open document, e.g. after the model index changed.
+
+    `get_lines` returns the current version and lines of a document, or None
+    if it is not open. `check` returns the problems of each of the given
+    lines of a document and `publish` receives all problems of a document
+    with their line numbers. Checks run on timer threads, `on_error`
+    receives a message for each check that failed.
+    """
+
+    def __init__(
+        self,
+        get_lines: Callable[[str], Optional[Tuple[Optional[int], List[str]]]],
+        check: Callable[[str, List[str]], List[List[LineProblem]]],
+        publish: Callable[[str, List[Tuple[int, LineProblem]]], None],
+        delay: float = DEBOUNCE_DELAY,
+        on_error: Callable[[str], None] = lambda _: None,
+    ):
+        self._get_lines = get_lines
+        self._check = check
+        self._publish = publish
+        self._delay = delay
+        self._on_error = on_error
+        self._lock = threading.Lock()
+        self._documents: Dict[str, _DocumentState] = {}
+
+    def open(self, uri: str, version: Optional[int]) -> None:
+        """Checks a newly opened document."""
+        with self._lock:
+            self._cancel(uri)
+            self._documents[uri] = _DocumentState(version)
+            self._schedule(uri)
+
+    def change(
+        self, uri: str, version: Optional[int], changes: Sequence[LineChange]
+    ) -> None:
+        """Marks the lines touched by the content changes to be checked again."""
+        with self._lock:
+            state = self._documents.get(uri)
+            if state is None:
+                state = self._documents[uri] = _DocumentState(version)
+            state.version = version
+            for change in changes:
+                if change is None or state.lines is None:
+                    state.lines = None
+                    continue
+                first, last, line_count = change
+                state.lines[first : last + 1] = [None] * line_count
+            self._schedule(uri)
+
+    def close(self, uri: str) -> None:
+        """Forgets the document."""
+        with self._lock:
+            self._cancel(uri)
+            self._documents.pop(uri, None)
+
+    def invalidate_all(self) -> None:
+        """Checks all open documents again."""
+        with self._lock:
+            for uri, state in self._documents.items():
+                state.lines = None
+                self._schedule(uri)
+
+    def stop(self) -> None:
+        """Cancels all pending checks."""
+        with self._lock:
+            for uri in list(self._documents):
+                self._cancel(uri)
+
+    def _cancel(self, uri: str) -> None:
+        state = self._documents.get(uri)
+        if state is not None and state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+
+    def _schedule(self, uri: str) -> None:
+        self._cancel(uri)
+        timer = threading.Timer(self._delay, self._run, (uri,))
+        timer.daemon = True
+        self._documents[uri].timer = timer
+        timer.start()
+
+    def _run(self, uri: str) -> None:
+        try:
+            self._update(uri)
+        except Exception:  # pylint: disable=broad-except
+            # Lines that failed stay marked, the next change checks them again.
+            self._on_error(f"Failed to check {uri}:\r\n{traceback.format_exc()}")
+
+    def _update(self, uri: str) -> None:
+        document = self._get_lines(uri)
+        with self._lock:
+            state = self._documents.get(uri)
+            if state is None or document is None:
+                return
+            version, lines = document
+            if version != state.version:
+                # The change handler for this version did not run yet.
+                self._schedule(uri)
+                return
+            if state.lines is None:
+                state.lines = [None] * len(lines)
+            # Line ranges of changes count an empty last line, which the
+            # document's lines leave out.
+            del state.lines[len(lines) :]
+            state.lines.extend([None] * (len(lines) - len(state.lines)))
+            pending = [index for index, line in enumerate(state.lines) if line is None]
+
+        checked = dict(
+            zip(pending, self._check(uri, [lines[index] for index in pending]))
+        )
+
+        with self._lock:
+            state = self._documents.get(uri)
+            if state is None or state.version != version or state.lines is None:
+                return
+            for index, problems in checked.items():
+                if index < len(state.lines):
+                    state.lines[index] = problems
+            problems = [
+                (index, problem)
+                for index, line in enumerate(state.lines)
+                for problem in line or ()
+            ]
+        self._publish(uri, problems)
@@ -0,0 +1,164 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Persistent on-disk cache of extracted model schemas."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+import lsp_schema as schema
+
+# Bump whenever the serialized schema changes shape.
+FORMAT_VERSION = 5
+CACHE_DIR_NAME = "voyager-codecompletion-extension"
+VERSIONS_FILE = "pydantic_versions.json"
+
+
+def default_directory() -> str:
+    """Returns the per-user directory to keep cached schemas in."""
+    directory = os.getenv("LS_SCHEMA_CACHE_DIR")
+    if directory:
+        return directory
+    if sys.platform == "win32":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, CACHE_DIR_NAME, "schemas")
+
+
+def _checksum(data: Any) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DiskSchemaCache:
+    """Stores one serialized schema per model file, extractor and interpreter.
+
+    Each entry records the content hash of the model, the interpreter and
+    the pydantic version it was extracted with. An entry that does not match
+    all of them is stale, an entry that cannot be read or fails its checksum
+    is corrupt and removed. Both are rebuilt by the next extraction.
+    """
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        self._lock = threading.Lock()
+        self._pydantic_versions: Dict[str, str] = self._read_json(
+            os.path.join(directory, VERSIONS_FILE)
+        )
+        if not isinstance(self._pydantic_versions, dict):
+            self._pydantic_versions = {}
+
+    def remember_pydantic_version(self, interpreter: Sequence[str], version: str):
+        """Records the pydantic version installed for the interpreter."""
+        interpreter_key = " ".join(interpreter)
+        with self._lock:
+            if self._pydantic_versions.get(interpreter_key) == version:
+                return
+            self._pydantic_versions[interpreter_key] = version
+            self._write_json(
+                os.path.join(self.directory, VERSIONS_FILE),
+                dict(self._pydantic_versions),
+            )
+
+    def load(
+        self,
+        model_path: str,
+        extractor: str,
+        interpreter: Sequence[str],
+        digest: str,
+    ) -> Optional[schema.ModelSchema]:
+        """Returns the stored schema, or None if it is missing, stale or corrupt."""
+        entry_path = self._entry_path(model_path, extractor, interpreter)
+        data = self._read_json(entry_path)
+        if data is None:
+            return None
+        try:
+            if data["format"] != FORMAT_VERSION or data["key"] != self._key(
+                model_path, extractor, interpreter, digest
+            ):
+                return None
+            if data["checksum"] != _checksum(data["schema"]):
+                raise ValueError("checksum mismatch")
+            return schema.ModelSchema.from_dict(data["schema"])
+        except (KeyError, TypeError, ValueError, IndexError):
+            with contextlib.suppress(OSError):
+                os.remove(entry_path)
+            return None
+
+    def save(
+        self,
+        model_path: str,
+        extractor: str,
+        interpreter: Sequence[str],
+        digest: str,
+        model: schema.ModelSchema,
+    ) -> None:
+        """Stores the schema, replacing any previous entry for the model."""
+        data = model.to_dict()
+        self._write_json(
+            self._entry_path(model_path, extractor, interpreter),
+            {
+                "format": FORMAT_VERSION,
+                "key": self._key(model_path, extractor, interpreter, digest),
+                "checksum": _checksum(data),
+                "schema": data,
+            },
+        )
+
+    def _key(
+        self,
+        model_path: str,
+        extractor: str,
+        interpreter: Sequence[str],
+        digest: str,
+    ) -> Dict[str, Any]:
+        return {
+            "path": model_path,
+            "extractor": extractor,
+            "digest": digest,
+            "interpreter": list(interpreter),
+            "pydantic": self._pydantic_versions.get(" ".join(interpreter), ""),
+        }
+
+    def _entry_path(
+        self, model_path: str, extractor: str, interpreter: Sequence[str]
+    ) -> str:
+        key = "\n".join([model_path, extractor, *interpreter])
+        name = hashlib.sha256(key.encode("utf-8"))
+        return os.path.join(self.directory, f"{name.hexdigest()}.json")
+
+    @staticmethod
+    def _read_json(file_path: str) -> Any:
+        try:
+            with open(file_path, "r", encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            # A partially written or otherwise corrupt file is treated as missing.
+            with contextlib.suppress(OSError):
+                if os.path.isfile(file_path):
+                    os.remove(file_path)
+            return None
+
+    def _write_json(self, file_path: str, data: Any) -> None:
+        """Writes through a temporary file so readers never see partial entries."""
+        temp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+                json.dump(data, cache_file)
+            os.replace(temp_path, file_path)
+        except OSError:
+            # The disk cache is an optimization only.
+            if temp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.remove(temp_path)
@@ -0,0 +1,332 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Reads model schemas by importing a model file and introspecting its classes."""
+
+from __future__ import annotations
+
+import collections.abc
+import contextlib
+import dataclasses
+import hashlib
+import importlib
+import inspect
+import os
+import re
+import sys
+import types
+import typing
+from typing import Any, Dict, List, Optional, Tuple
+
+import lsp_schema as schema
+import lsp_static_extractor as static_extractor
+
+# Imported models live below this package instead of under their own names,
+# see `load_model_module`.
+PRIVATE_NAMESPACE = "_voyager_models"
+PRIVATE_QUALIFIER = re.compile(re.escape(PRIVATE_NAMESPACE) + r"\.(?:\w+\.)+")
+
+
+def get_annotated_class_from_model(annotation):
+    """Gets the class type of attributes from the Field info annotation for a pydantic model class
+    Args:
+        annotation: annotation from the FieldInfo
+    """
+    if isinstance(annotation, typing._GenericAlias):  # pylint: disable=protected-access
+        return get_annotated_class_from_model((typing.get_args(annotation))[0])
+    else:
+        return annotation
+
+
+def annotation_text(annotation: Any) -> str:
+    """Returns the source like text of an introspected annotation."""
+    if inspect.isclass(annotation) and not typing.get_args(annotation):
+        return annotation.__name__
+    return PRIVATE_QUALIFIER.sub("", str(annotation).replace("typing.", ""))
+
+
+def annotation_name(annotation: Any) -> str:
+    """Returns a readable name for an introspected annotation."""
+    return annotation_text(get_annotated_class_from_model(annotation))
+
+
+def _runtime_targets(annotation: Any) -> List[str]:
+    """Returns the names of the classes an introspected annotation refers to."""
+    if isinstance(annotation, typing.ForwardRef):
+        return [annotation.__forward_arg__]
+    if isinstance(annotation, str):
+        return [annotation]
+
+    args = typing.get_args(annotation)
+    if args:
+        origin = typing.get_origin(annotation)
+        if inspect.isclass(origin) and issubclass(origin, collections.abc.Mapping):
+            args = args[-1:]
+        return [target for arg in args for target in _runtime_targets(arg)]
+
+    if inspect.isclass(annotation) and annotation.__module__ != "builtins":
+        return [annotation.__name__]
+    return []
+
+
+def _module_name(model_path: str) -> Tuple[str, str]:
+    """Returns the dotted module name of the file and the directory to import it from."""
+    directory, file_name = os.path.split(model_path)
+    parts = [os.path.splitext(file_name)[0]]
+    if parts[0] == "__init__":
+        parts = []
+    while os.path.isfile(os.path.join(directory, "__init__.py")):
+        directory, package = os.path.split(directory)
+        parts.insert(0, package)
+    return ".".join(parts), directory
+
+
+def _version_key(model_path: str) -> str:
+    """Returns a module name component unique to this version of the model."""
+    stat = os.stat(model_path)
+    version = f"{model_path}\n{stat.st_mtime_ns}\n{stat.st_size}"
+    return "v" + hashlib.sha1(version.encode("utf-8")).hexdigest()[:16]
+
+
+@contextlib.contextmanager
+def load_model_module(model_path: str):
+    """Loads the model file as `<PRIVATE_NAMESPACE>.<version>.<module>`.
+
+    The model and its package are found through the `__path__` of the
+    private version package, so neither `sys.path` nor the model's own
+    module names in `sys.modules` are touched by the model itself.
+    Plain sibling imports (`from base import Model`) still work: the model
+    directory is searched first while the model is imported, and sibling
+    modules imported that way are dropped again afterwards, as are all
+    modules of this version once the context exits.
+    """
+    module_name, module_dir = _module_name(model_path)
+    if PRIVATE_NAMESPACE not in sys.modules:
+        root = types.ModuleType(PRIVATE_NAMESPACE)
+        root.__path__ = []
+        sys.modules[PRIVATE_NAMESPACE] = root
+    version_name = f"{PRIVATE_NAMESPACE}.{_version_key(model_path)}"
+    version_package = types.ModuleType(version_name)
+    version_package.__path__ = [module_dir]
+    sys.modules[version_name] = version_package
+
+    loaded_before = set(sys.modules)
+    saved_path = sys.path
+    try:
+        sys.path = [module_dir, *saved_path]
+        try:
+            module = importlib.import_module(f"{version_name}.{module_name}")
+        finally:
+            sys.path = saved_path
+        yield module
+    finally:
+        for name in set(sys.modules) - loaded_before:
+            module_file = getattr(sys.modules[name], "__file__", None) or ""
+            if module_file.startswith(os.path.join(module_dir, "")):
+                del sys.modules[name]
+        for name in list(sys.modules):
+            if name == version_name or name.startswith(version_name + "."):
+                del sys.modules[name]
+
+
+def import_model_schema(model_path: str) -> schema.ModelSchema:
+    """Imports the model module and introspects its classes."""
+    locations: Dict[
+        str, Dict[str, Tuple[schema.Location, Dict[str, schema.Location]]]
+    ] = {}
+    with load_model_module(model_path) as module:
+        classes = {}
+        for class_name, class_object in inspect.getmembers(module, inspect.isclass):
+            fields = _runtime_fields(class_object)
+            for name, field in fields.items():
+                field.location = _runtime_location(locations, class_object, name)
+            classes[class_name] = schema.ClassSchema(
+                class_name,
+                fields,
+                location=_runtime_location(locations, class_object),
+                attributes=_runtime_attributes(class_object, fields),
+            )
+        names = [
+            name
+            for name, value in vars(module).items()
+            if not name.startswith("__") and not inspect.isclass(value)
+        ]
+    return schema.ModelSchema(model_path, classes, names)
+
+
+def _runtime_attributes(
+    class_object: type, fields: Dict[str, schema.FieldSchema]
+) -> List[str]:
+    """Returns the names the class and its bases define besides the fields,
+    leaving out those of builtins and the known base modules."""
+    names: Dict[str, None] = {}
+    for owner in class_object.__mro__:
+        module = owner.__module__.split(".")[0]
+        if module == "builtins" or module in schema.KNOWN_BASE_MODULES:
+            continue
+        names.update(
+            dict.fromkeys(
+                name
+                for name in vars(owner)
+                if not name.startswith("__") and name not in fields
+            )
+        )
+    return list(names)
+
+
+def _runtime_location(
+    locations: Dict[str, Dict[str, Tuple[schema.Location, Dict[str, schema.Location]]]],
+    class_object: type,
+    field_name: Optional[str] = None,
+) -> Optional[schema.Location]:
+    """Finds the class, or the class declaring the field, in the parsed
+    source of its module. Only classes of the loaded model are looked up."""
+    for owner in class_object.__mro__ if field_name else [class_object]:
+        if field_name and field_name not in vars(owner).get("__annotations__", {}):
+            continue
+        if not owner.__module__.startswith(PRIVATE_NAMESPACE + "."):
+            return None
+        try:
+            path = inspect.getsourcefile(owner)
+        except TypeError:
+            return None
+        if path is None:
+            return None
+        if path not in locations:
+            try:
+                locations[path] = static_extractor.class_locations(path)
+            except (OSError, SyntaxError, UnicodeDecodeError):
+                locations[path] = {}
+        class_location = locations[path].get(owner.__name__)
+        if class_location is None:
+            return None
+        return class_location[1].get(field_name) if field_name else class_location[0]
+    return None
+
+
+def _runtime_fields(class_object: type) -> Dict[str, schema.FieldSchema]:
+    """Reads the fields of an imported class.
+
+    Pydantic models are read from the fields pydantic already collected
+    (`model_fields` in v2, `__fields__` in v1), which leaves out class
+    variables and private attributes and needs no type hint evaluation.
+    Other classes fall back to their type hints.
+    """
+    model_fields = _pydantic_v2_fields(class_object)
+    if model_fields is not None:
+        return {
+            name: _v2_field_schema(name, field_info)
+            for name, field_info in model_fields.items()
+        }
+
+    model_fields = _pydantic_v1_fields(class_object)
+    if model_fields is not None:
+        return {
+            name: _v1_field_schema(name, model_field)
+            for name, model_field in model_fields.items()
+        }
+
+    try:
+        hints = typing.get_type_hints(class_object)
+    except Exception:  # pylint: disable=broad-except
+        hints = {}
+    return {
+        name: schema.FieldSchema(
+            name,
+            annotation_text(annotation),
+            annotation_name(annotation),
+            _runtime_targets(annotation),
+        )
+        for name, annotation in hints.items()
+        if typing.get_origin(annotation) is not typing.ClassVar
+    }
+
+
+def _pydantic_v2_fields(class_object: type) -> Optional[Dict[str, Any]]:
+    fields = getattr(class_object, "__pydantic_fields__", None)
+    return fields if isinstance(fields, dict) else None
+
+
+def _pydantic_v1_fields(class_object: type) -> Optional[Dict[str, Any]]:
+    fields = getattr(class_object, "__fields__", None)
+    if isinstance(fields, dict) and hasattr(class_object, "__config__"):
+        return fields
+    return None
+
+
+def _v2_field_schema(name: str, field_info: Any) -> schema.FieldSchema:
+    annotation = field_info.annotation
+    details: Dict[str, Any] = {"required": field_info.is_required()}
+    if not details["required"]:
+        if field_info.default_factory is not None:
+            details["default_factory"] = _value_text(field_info.default_factory)
+        else:
+            details["default"] = repr(field_info.default)
+    for key in ("alias", "title", "description"):
+        value = getattr(field_info, key, None)
+        if value is not None:
+            details[key] = value if key == "description" else repr(value)
+    constraints = [_constraint_text(item) for item in field_info.metadata]
+    if constraints:
+        details["constraints"] = ", ".join(constraints)
+    return schema.FieldSchema(
+        name,
+        annotation_text(annotation),
+        annotation_name(annotation),
+        _runtime_targets(annotation),
+        details,
+    )
+
+
+def _v1_field_schema(name: str, model_field: Any) -> schema.FieldSchema:
+    field_info = model_field.field_info
+    details: Dict[str, Any] = {"required": bool(model_field.required)}
+    if not details["required"]:
+        if model_field.default_factory is not None:
+            details["default_factory"] = _value_text(model_field.default_factory)
+        else:
+            details["default"] = repr(model_field.default)
+    if model_field.alias != name:
+        details["alias"] = repr(model_field.alias)
+    if field_info.title is not None:
+        details["title"] = repr(field_info.title)
+    if field_info.description is not None:
+        details["description"] = field_info.description
+    constraints = [
+        f"{key}={getattr(field_info, key)!r}"
+        for key in schema.FIELD_CONSTRAINTS
+        if getattr(field_info, key, None) is not None
+    ]
+    if constraints:
+        details["constraints"] = ", ".join(constraints)
+
+    # Constrained types such as `ConstrainedIntValue` stand in for the
+    # declared builtin type.
+    annotation = str(model_field._type_display())  # pylint: disable=protected-access
+    field_type = model_field.type_
+    if inspect.isclass(field_type) and field_type.__module__.startswith("pydantic"):
+        field_type = next(
+            (base for base in field_type.__mro__ if base.__module__ == "builtins"),
+            field_type,
+        )
+        annotation = annotation.replace(model_field.type_.__name__, field_type.__name__)
+    return schema.FieldSchema(
+        name,
+        annotation,
+        annotation_text(field_type),
+        _runtime_targets(field_type),
+        details,
+    )
+
+
+def _value_text(value: Any) -> str:
+    return getattr(value, "__qualname__", None) or repr(value)
+
+
+def _constraint_text(constraint: Any) -> str:
+    """Returns `gt=0` for annotated-types constraints such as `Gt(gt=0)`."""
+    if dataclasses.is_dataclass(constraint):
+        return ", ".join(
+            f"{item.name}={getattr(constraint, item.name)!r}"
+            for item in dataclasses.fields(constraint)
+        )
+    return repr(constraint)
@@ -7,16 +7,21 @@ import atexit
 import contextlib
 import io
 import json
+import os
 import pathlib
 import subprocess
 import threading
 import uuid
 from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import BinaryIO, Dict, Optional, Sequence, Union
 
 CONTENT_LENGTH = "Content-Length: "
 RUNNER_SCRIPT = str(pathlib.Path(__file__).parent / "lsp_runner.py")
 
+# Seconds a runner gets to introspect a model before it is restarted.
+SCHEMA_TIMEOUT = float(os.getenv("LS_MODEL_IMPORT_TIMEOUT", "120"))
+
 
 def to_str(text) -> str:
     """Convert bytes to string as needed."""
@@ -29,6 +34,10 @@ class StreamClosedException(Exception):
     pass  # pylint: disable=unnecessary-pass
 
 
+class RunnerTimeoutException(Exception):
+    """The runner did not answer in time and was stopped."""
+
+
 class JsonWriter:
     """Manages writing JSON-RPC messages to the writer stream."""
 
@@ -151,6 +160,9 @@ class ProcessManager:
         def _monitor_process():
             proc.wait()
             with self._lock:
+                if self._processes.get(workspace) is not proc:
+                    # Stopped by `stop_process`, maybe replaced since.
+                    return
                 try:
                     del self._processes[workspace]
                     rpc = self._rpc.pop(workspace)
@@ -160,6 +172,22 @@ class ProcessManager:
 
         self._thread_pool.submit(_monitor_process)
 
+    def stop_process(self, workspace: str, kill: bool = False) -> None:
+        """Sends exit to the process for the given id and forgets it. With
+        `kill`, a process that may be busy is killed instead."""
+        with self._lock:
+            proc = self._processes.pop(workspace, None)
+            rpc = self._rpc.pop(workspace, None)
+        if kill and proc is not None:
+            # Also ends pending reads of its output.
+            with contextlib.suppress(OSError):
+                proc.kill()
+        if rpc is not None:
+            if not kill:
+                with contextlib.suppress(Exception):
+                    rpc.send_data({"id": str(uuid.uuid4()), "method": "exit"})
+            rpc.close()
+
     def get_json_rpc(self, workspace: str) -> JsonRpc:
         """Gets the JSON-RPC wrapper for the a given id."""
         with self._lock:
@@ -249,6 +277,59 @@ def run_over_json_rpc(
     return RpcRunResult(result, "")
 
 
+# One lock per runner, a runner answers one schema request at a time.
+_schema_locks: Dict[str, threading.Lock] = {}
+_schema_locks_lock = threading.Lock()
+_schema_readers = ThreadPoolExecutor(thread_name_prefix="schema-reader")
+
+
+def _schema_lock(workspace: str) -> threading.Lock:
+    with _schema_locks_lock:
+        return _schema_locks.setdefault(workspace, threading.Lock())
+
+
+def get_schema_over_json_rpc(
+    workspace: str,
+    interpreter: Sequence[str],
+    cwd: str,
+    model_path: str,
+    timeout: float = SCHEMA_TIMEOUT,
+) -> Dict:
+    """Uses JSON-RPC to introspect a model module in the runner process.
+
+    A runner that does not answer within `timeout` seconds, e.g. stuck
+    importing the model, is killed and started again by the next request.
+    """
+    with _schema_lock(workspace):
+        rpc: Union[JsonRpc, None] = get_or_start_json_rpc(workspace, interpreter, cwd)
+        if not rpc:
+            raise Exception("Failed to run over JSON-RPC.")
+
+        msg_id = str(uuid.uuid4())
+        rpc.send_data({"id": msg_id, "method": "schema", "path": model_path})
+        reply = _schema_readers.submit(rpc.receive_data)
+        try:
+            data = reply.result(timeout)
+        except FutureTimeoutError:
+            _process_manager.stop_process(workspace, kill=True)
+            raise RunnerTimeoutException(
+                f"Introspecting {model_path} took longer than {timeout:g} seconds,"
+                " the runner was stopped."
+            ) from None
+
+    if data["id"] != msg_id:
+        raise Exception(f"Invalid result for schema request: {model_path}")
+    if "error" in data:
+        raise Exception(data["error"])
+    return data["result"]
+
+
+def stop_json_rpc(workspace: str) -> None:
+    """Stops the process for the given id, the next request starts a new one."""
+    with _schema_lock(workspace):
+        _process_manager.stop_process(workspace)
+
+
 def shutdown_json_rpc():
     """Shutdown all JSON-RPC processes."""
     _process_manager.stop_all_processes()
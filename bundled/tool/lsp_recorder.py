@@ -0,0 +1,74 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Optional recording of the LSP messages exchanged with the client."""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional, Type
+
+from pygls.protocol import LanguageServerProtocol
+
+INBOUND = "in"
+OUTBOUND = "out"
+
+
+class Recording:
+    """Writes timestamped messages to a file, one JSON object per line.
+
+    Each line is `{"time": ..., "direction": ..., "message": ...}`, with the
+    time in seconds since the recording started and the direction `INBOUND`
+    for messages from the client and `OUTBOUND` for messages to it.
+    """
+
+    def __init__(self, path: str):
+        # pylint: disable=consider-using-with
+        self._file = open(path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def write(
+        self,
+        direction: str,
+        message: Any,
+        default: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        """Writes a message, serializing objects that are not JSON with `default`."""
+        with self._lock:
+            record = {
+                "time": round(time.monotonic() - self._started, 6),
+                "direction": direction,
+                "message": message,
+            }
+            self._file.write(json.dumps(record, default=default) + "\n")
+            self._file.flush()
+
+
+def protocol_class(path: str) -> Type[LanguageServerProtocol]:
+    """Returns the server protocol, recording all messages to `path` if set."""
+    if not path:
+        return LanguageServerProtocol
+    try:
+        recording = Recording(path)
+    except OSError as error:
+        print(f"Not recording LSP traffic to {path}: {error}", file=sys.stderr)
+        return LanguageServerProtocol
+
+    class RecordingProtocol(LanguageServerProtocol):
+        """Protocol that also writes each message to the recording."""
+
+        def _deserialize_message(self, data):
+            # Called for every object of a message, innermost first.
+            if "jsonrpc" in data:
+                recording.write(INBOUND, data)
+            return super()._deserialize_message(data)
+
+        def _send_data(self, data):
+            if data:
+                recording.write(OUTBOUND, data, self._serialize_message)
+            super()._send_data(data)
+
+    return RecordingProtocol
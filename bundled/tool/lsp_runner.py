@@ -22,19 +22,27 @@ def update_sys_path(path_to_add: str, strategy: str) -> None:
             sys.path.append(path_to_add)
 
 
+BUNDLED_LIBS = os.fspath(pathlib.Path(__file__).parent.parent / "libs")
+
 # Ensure that we can import LSP libraries, and other bundled libraries.
-update_sys_path(
-    os.fspath(pathlib.Path(__file__).parent.parent / "libs"),
-    os.getenv("LS_IMPORT_STRATEGY", "useBundled"),
-)
+update_sys_path(BUNDLED_LIBS, os.getenv("LS_IMPORT_STRATEGY", "useBundled"))
 
 
 # pylint: disable=wrong-import-position,import-error
+import lsp_import_extractor as import_extractor
 import lsp_jsonrpc as jsonrpc
+import lsp_schema as schema
+import lsp_schema_cache as schema_cache
 import lsp_utils as utils
 
 RPC = jsonrpc.create_json_rpc(sys.stdin.buffer, sys.stdout.buffer)
 
+# Keeps imported models warm between requests, a model is only imported
+# again once its file changed.
+SCHEMA_CACHE = schema_cache.SchemaCache(
+    lambda path, _extractor, _interpreter: import_extractor.import_model_schema(path)
+)
+
 EXIT_NOW = False
 while not EXIT_NOW:
     msg = RPC.receive_data()
@@ -44,6 +52,26 @@ while not EXIT_NOW:
         EXIT_NOW = True
         continue
 
+    if method == "schema":
+        response = {"id": msg["id"]}
+        # Models import the packages of their own environment, never the
+        # bundled ones, e.g. an older typing-extensions than pydantic needs.
+        model_path = [path for path in sys.path if path != BUNDLED_LIBS]
+        # stdout carries the JSON-RPC stream, keep model output off of it.
+        with utils.substitute_attr(sys, "path", model_path), utils.redirect_io(
+            "stdout", utils.CustomIO("<stdout>", encoding="utf-8")
+        ):
+            try:
+                response["result"] = SCHEMA_CACHE.get(msg["path"], "import").to_dict()
+                # Lets the server tell stored schemas of other pydantic installs apart.
+                response["result"]["pydantic_version"] = schema.pydantic_version()
+            except Exception:  # pylint: disable=broad-except
+                response["error"] = traceback.format_exc(chain=True)
+                response["exception"] = True
+
+        RPC.send_data(response)
+        continue
+
     if method == "run":
         is_exception = False
         # This is needed to preserve sys.path, pylint modifies
@@ -0,0 +1,323 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Pydantic model schemas and the model files they are read from."""
+
+from __future__ import annotations
+
+import bisect
+import importlib.metadata
+import os
+import re
+import sys
+import typing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Top level class statements, used to list classes without parsing a module.
+CLASS_DEFINITION = re.compile(rb"^class\s+(\w+)", re.MULTILINE)
+
+# Modules whose classes can be used as model bases without contributing fields
+# that the static extractor would need to know about.
+KNOWN_BASE_MODULES = ("pydantic", "typing", "typing_extensions", "enum", "abc")
+
+# Keyword arguments of `Field(...)` that restrict the accepted values.
+FIELD_CONSTRAINTS = (
+    "gt",
+    "ge",
+    "lt",
+    "le",
+    "multiple_of",
+    "min_length",
+    "max_length",
+    "min_items",
+    "max_items",
+    "unique_items",
+    "pattern",
+    "regex",
+    "max_digits",
+    "decimal_places",
+    "allow_inf_nan",
+    "strict",
+)
+
+# File, zero based line and column of a class or field name. Columns count
+# UTF-16 code units, as clients do.
+Location = Tuple[str, int, int]
+
+# Command of the interpreter models are imported with, empty for the current
+# process. Imported schemas depend on its environment.
+Interpreter = Tuple[str, ...]
+
+# Extractor importing models, also used for classes whose bases the static
+# extractor cannot see.
+IMPORT_EXTRACTOR = "import"
+
+
+class NameIndex:
+    """Case-insensitive sorted array of names for prefix lookups."""
+
+    __slots__ = ("_keys", "_names")
+
+    def __init__(self, names: typing.Iterable[str]):
+        entries = sorted((name.lower(), name) for name in names)
+        self._keys: List[str] = [key for key, _ in entries]
+        self._names: List[str] = [name for _, name in entries]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def complete(self, prefix: str, limit: int) -> Tuple[List[str], bool]:
+        """Returns up to `limit` names starting with `prefix`, and whether
+        more names matched than were returned."""
+        key = prefix.lower()
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + "\U0010ffff", lo=start)
+        return self._names[start : min(end, start + limit)], end - start > limit
+
+
+class FieldSchema:
+    """A single annotated attribute of a model class.
+
+    `targets` are the class names the annotation refers to, looking through
+    `Optional`, containers and forward references. The first one that names
+    a model class is the model held by the field.
+
+    `details` holds what is only shown for a selected completion: `required`
+    and, where declared, the source text of `default`, `default_factory`,
+    `alias`, `title`, `description` and `constraints`.
+
+    `location` is where the field is declared, if known.
+    """
+
+    __slots__ = ("name", "annotation", "type_name", "targets", "details", "location")
+
+    def __init__(
+        self,
+        name: str,
+        annotation: str,
+        type_name: str,
+        targets: Sequence[str] = (),
+        details: Optional[Dict[str, Any]] = None,
+        location: Optional[Location] = None,
+    ):
+        self.name: str = name
+        self.annotation: str = annotation
+        self.type_name: str = type_name
+        self.targets: Tuple[str, ...] = tuple(targets)
+        self.details: Dict[str, Any] = details or {}
+        self.location: Optional[Location] = location
+
+
+class ClassSchema:
+    """Annotated attributes of a model class, in declaration order.
+
+    `bases` are base classes imported from other modules, whose fields are
+    not part of `fields` yet, in the order their fields are applied.
+
+    `attributes` are the other names the class and its bases define, e.g.
+    methods, properties, validators and class variables, without those of
+    pydantic itself.
+    """
+
+    __slots__ = ("name", "fields", "bases", "location", "attributes", "_field_index")
+
+    def __init__(
+        self,
+        name: str,
+        fields: Dict[str, FieldSchema],
+        bases: Sequence[str] = (),
+        location: Optional[Location] = None,
+        attributes: Sequence[str] = (),
+    ):
+        self.name: str = name
+        self.fields: Dict[str, FieldSchema] = fields
+        self.bases: Tuple[str, ...] = tuple(bases)
+        self.location: Optional[Location] = location
+        self.attributes: Tuple[str, ...] = tuple(attributes)
+        self._field_index: Optional[NameIndex] = None
+
+    @property
+    def field_index(self) -> NameIndex:
+        """Prefix index over the field names, built on first use."""
+        if self._field_index is None:
+            self._field_index = NameIndex(self.fields)
+        return self._field_index
+
+
+def _approximate_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(
+            _approximate_size(key) + _approximate_size(item)
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approximate_size(item) for item in value)
+    return size
+
+
+class ModelSchema:
+    """All classes found in a model file, and the other names the module
+    defines at its top level, e.g. functions and constants."""
+
+    def __init__(
+        self, path: str, classes: Dict[str, ClassSchema], names: Sequence[str] = ()
+    ):
+        self.path: str = path
+        self.classes: Dict[str, ClassSchema] = classes
+        self.names: Tuple[str, ...] = tuple(names)
+        self.class_index: NameIndex = NameIndex(classes)
+
+    def class_names(self) -> List[str]:
+        """Returns the names of all classes in the model."""
+        return list(self.classes)
+
+    def get_class(self, class_name: str) -> Optional[ClassSchema]:
+        """Returns the class with the given name, if any."""
+        return self.classes.get(class_name)
+
+    def get_target(self, field: FieldSchema) -> Optional[ClassSchema]:
+        """Returns the model class held by the field, if any."""
+        for target in field.targets:
+            if target in self.classes:
+                return self.classes[target]
+        return None
+
+    def approximate_size(self) -> int:
+        """Returns roughly how many bytes the schema and its name indexes hold."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.classes)
+        size += _approximate_size(self.names)
+        names = len(self.classes)
+        for class_schema in self.classes.values():
+            size += sys.getsizeof(class_schema) + sys.getsizeof(class_schema.fields)
+            size += _approximate_size(
+                (
+                    class_schema.name,
+                    class_schema.bases,
+                    class_schema.location,
+                    class_schema.attributes,
+                )
+            )
+            for field in class_schema.fields.values():
+                size += sys.getsizeof(field) + _approximate_size(
+                    (
+                        field.name,
+                        field.annotation,
+                        field.type_name,
+                        field.targets,
+                        field.details,
+                        field.location,
+                    )
+                )
+            names += len(class_schema.fields)
+        # Each name index holds a lower case key and a reference per name.
+        return size + names * 2 * sys.getsizeof(None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns a JSON serializable representation of the schema.
+
+        Locations refer to their file by its index in `files`.
+        """
+        files: Dict[str, int] = {}
+
+        def location(value: Optional[Location]) -> Optional[List[int]]:
+            if value is None:
+                return None
+            return [files.setdefault(value[0], len(files)), value[1], value[2]]
+
+        classes = [
+            {
+                "name": class_schema.name,
+                "bases": list(class_schema.bases),
+                "location": location(class_schema.location),
+                "attributes": list(class_schema.attributes),
+                "fields": [
+                    [
+                        field.name,
+                        field.annotation,
+                        field.type_name,
+                        list(field.targets),
+                        field.details,
+                        location(field.location),
+                    ]
+                    for field in class_schema.fields.values()
+                ],
+            }
+            for class_schema in self.classes.values()
+        ]
+        return {
+            "path": self.path,
+            "files": list(files),
+            "classes": classes,
+            "names": list(self.names),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> ModelSchema:
+        """Creates the schema from the output of `to_dict`."""
+        files = data["files"]
+
+        def location(value: Optional[List[int]]) -> Optional[Location]:
+            return None if value is None else (files[value[0]], value[1], value[2])
+
+        classes = {}
+        for class_data in data["classes"]:
+            fields = {
+                field[0]: FieldSchema(*field[:5], location(field[5]))
+                for field in class_data["fields"]
+            }
+            classes[class_data["name"]] = ClassSchema(
+                class_data["name"],
+                fields,
+                class_data["bases"],
+                location(class_data["location"]),
+                class_data["attributes"],
+            )
+        return cls(data["path"], classes, data["names"])
+
+
+def resolve_model_path(model_path: str) -> str:
+    """Returns the absolute, symlink free path for a configured model path."""
+    return os.path.realpath(os.path.expanduser(model_path))
+
+
+def pydantic_version() -> str:
+    """Returns the installed pydantic version, empty if it is not installed."""
+    try:
+        return importlib.metadata.version("pydantic")
+    except importlib.metadata.PackageNotFoundError:
+        return ""
+
+
+def discover_model_files(sources: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """Expands configured model files, directories and packages.
+
+    Returns the python files to index and the directories they were found in.
+    """
+    files: List[str] = []
+    directories: List[str] = []
+    for source in sources:
+        source = os.path.expanduser(source)
+        if os.path.isdir(source):
+            for root, dir_names, file_names in os.walk(source):
+                dir_names[:] = sorted(
+                    name
+                    for name in dir_names
+                    if not name.startswith(".") and name != "__pycache__"
+                )
+                directories.append(root)
+                files.extend(
+                    os.path.join(root, name)
+                    for name in sorted(file_names)
+                    if name.endswith(".py")
+                )
+        elif os.path.isfile(source):
+            files.append(source)
+    return list(dict.fromkeys(files)), directories
+
+
+def scan_class_names(model_path: str) -> List[str]:
+    """Lists the top level classes of a module without parsing it."""
+    with open(model_path, "rb") as model_file:
+        return [
+            name.decode("utf-8") for name in CLASS_DEFINITION.findall(model_file.read())
+        ]
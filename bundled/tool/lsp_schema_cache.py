@@ -0,0 +1,683 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Caching of model schemas and the namespaces merging them."""
+
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import hashlib
+import os
+import threading
+import typing
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import lsp_import_extractor as import_extractor
+import lsp_schema as schema
+import lsp_static_extractor as static_extractor
+
+HASH_CHUNK_SIZE = 1 << 16
+
+# Model path, extractor and interpreter of a cached module schema.
+_ModuleKey = Tuple[str, str, schema.Interpreter]
+
+# Model sources, extractor and interpreter of a cached namespace.
+_NamespaceKey = Tuple[Tuple[str, ...], str, schema.Interpreter]
+
+
+def extract_model_schema(
+    model_path: str,
+    extractor: str = "static",
+    importer: typing.Callable[
+        [str], schema.ModelSchema
+    ] = import_extractor.import_model_schema,
+) -> schema.ModelSchema:
+    """Extracts the model schema using the configured extractor.
+
+    The static extractor falls back to importing the model with `importer`
+    when it cannot resolve the model on its own.
+    """
+    if extractor == "static":
+        try:
+            return static_extractor.parse_model_schema(model_path)
+        except (static_extractor.UnresolvedModelError, SyntaxError, UnicodeDecodeError):
+            pass
+    return importer(model_path)
+
+
+def _extract_in_process(
+    model_path: str, extractor: str, _interpreter: schema.Interpreter
+) -> schema.ModelSchema:
+    return extract_model_schema(model_path, extractor)
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class ModelNamespace:
+    """Merged view over the classes of all configured model modules.
+
+    Class names are listed with a textual scan of each module, a module is
+    only parsed or imported when one of its classes is first referenced.
+    Module schemas are cached separately in the owning `SchemaCache`.
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[str],
+        extractor: str,
+        interpreter: schema.Interpreter,
+        cache: SchemaCache,
+    ):
+        self.sources: Tuple[str, ...] = tuple(sources)
+        self.extractor: str = extractor
+        self.interpreter: schema.Interpreter = tuple(interpreter)
+        self._cache = cache
+
+        files, directories = schema.discover_model_files(self.sources)
+        self._state = {path: _stat_key(path) for path in [*files, *directories]}
+        self._resolved = {path: schema.resolve_model_path(path) for path in files}
+        self._class_modules: Dict[str, str] = {}
+        for path in files:
+            for class_name in schema.scan_class_names(path):
+                self._class_modules.setdefault(class_name, path)
+        self.class_index: schema.NameIndex = schema.NameIndex(self._class_modules)
+        # Module schemas with classes deriving from bases outside the sources,
+        # which `_get_class` looks up in the imported module instead.
+        self._foreign_bases: Dict[str, Tuple[schema.ModelSchema, bool]] = {}
+
+    @property
+    def files(self) -> List[str]:
+        """Model files that are part of the namespace."""
+        return [path for path in self._state if path.endswith(".py")]
+
+    def is_stale(self) -> bool:
+        """Returns True if a file or directory changed since the namespace was built."""
+        return any(_stat_key(path) != key for path, key in self._state.items())
+
+    def is_ready(self) -> bool:
+        """Returns True if the namespace is current and all of its modules are
+        indexed, imported as well where classes derive from bases outside the
+        sources, so that lookups never parse or import a module."""
+        if self.is_stale():
+            return False
+        for path, resolved in self._resolved.items():
+            state = self._state[path]
+            if state is None:
+                return False
+            module_schema = self._cache.indexed_schema(
+                resolved, self.extractor, self.interpreter, state[1], state[2]
+            )
+            if module_schema is None:
+                return False
+            if self._has_foreign_bases(path, module_schema) and (
+                self._cache.indexed_schema(
+                    resolved,
+                    schema.IMPORT_EXTRACTOR,
+                    self.interpreter,
+                    state[1],
+                    state[2],
+                )
+                is None
+            ):
+                return False
+        return True
+
+    def _has_foreign_bases(self, path: str, module_schema: schema.ModelSchema) -> bool:
+        if self.extractor == schema.IMPORT_EXTRACTOR:
+            return False
+        known = self._foreign_bases.get(path)
+        if known is not None and known[0] is module_schema:
+            return known[1]
+        found = any(
+            base not in self._class_modules
+            for class_name, class_schema in module_schema.classes.items()
+            if self._class_modules.get(class_name) == path
+            for base in class_schema.bases
+        )
+        self._foreign_bases[path] = (module_schema, found)
+        return found
+
+    def cache_keys(self) -> List[_ModuleKey]:
+        """Returns the keys of the namespace's modules in its `SchemaCache`,
+        including their imports where classes derive from foreign bases."""
+        keys = []
+        for path, resolved in self._resolved.items():
+            keys.append((resolved, self.extractor, self.interpreter))
+            known = self._foreign_bases.get(path)
+            if known is not None and known[1]:
+                keys.append((resolved, schema.IMPORT_EXTRACTOR, self.interpreter))
+        return keys
+
+    def class_names(self) -> List[str]:
+        """Returns the names of all classes in the namespace."""
+        return list(self._class_modules)
+
+    def get_module(self, class_name: str) -> Optional[str]:
+        """Returns the file that defines the class, if any."""
+        return self._class_modules.get(class_name)
+
+    def get_module_schema(self, model_path: str) -> schema.ModelSchema:
+        """Returns the schema of one of the namespace's files, indexing it if needed."""
+        return self._cache.get(model_path, self.extractor, self.interpreter)
+
+    def get_class(self, class_name: str) -> Optional[schema.ClassSchema]:
+        """Returns the class with the given name, indexing its module if needed."""
+        return self._get_class(class_name, set())
+
+    def defines(self, name: str) -> bool:
+        """Returns True if a module of the namespace binds the name at its top
+        level, as a class or otherwise, indexing the modules if needed. A
+        module that cannot be indexed may bind any name."""
+        if name in self._class_modules:
+            return True
+        for path in self.files:
+            try:
+                module_schema = self.get_module_schema(path)
+            except Exception:  # pylint: disable=broad-except
+                return True
+            if name in module_schema.classes or name in module_schema.names:
+                return True
+        return False
+
+    def get_target(self, field: schema.FieldSchema) -> Optional[schema.ClassSchema]:
+        """Returns the model class held by the field, if any."""
+        for target in field.targets:
+            if target in self._class_modules:
+                return self.get_class(target)
+        return None
+
+    def resolve_chain(self, chain: Sequence[str]) -> Optional[schema.ClassSchema]:
+        """Returns the class reached by a class name followed by field names,
+        e.g. `["Order", "customer"]`, if every step holds a model class."""
+        class_schema = self.get_class(chain[0]) if chain else None
+        for field_name in chain[1:]:
+            field = class_schema and class_schema.fields.get(field_name)
+            if field is None:
+                return None
+            class_schema = self.get_target(field)
+        return class_schema
+
+    def _get_class(
+        self, class_name: str, seen: Set[str]
+    ) -> Optional[schema.ClassSchema]:
+        path = self._class_modules.get(class_name)
+        if path is None or class_name in seen:
+            return None
+        module_schema = self._cache.get(path, self.extractor, self.interpreter)
+        class_schema = module_schema.get_class(class_name)
+        if class_schema is None or not class_schema.bases:
+            return class_schema
+
+        seen.add(class_name)
+        fields: Dict[str, schema.FieldSchema] = {}
+        attributes: Dict[str, None] = {}
+        for base in class_schema.bases:
+            base_schema = self._get_class(base, seen)
+            if base_schema is None:
+                # The base lives outside of the configured sources, only
+                # importing the module can tell what it contributes.
+                self._foreign_bases[path] = (module_schema, True)
+                imported = self._cache.get(
+                    path, schema.IMPORT_EXTRACTOR, self.interpreter
+                )
+                return imported.get_class(class_name)
+            fields.update(base_schema.fields)
+            attributes.update(dict.fromkeys(base_schema.attributes))
+        fields.update(class_schema.fields)
+        attributes.update(dict.fromkeys(class_schema.attributes))
+        return schema.ClassSchema(
+            class_name,
+            fields,
+            location=class_schema.location,
+            attributes=[name for name in attributes if name not in fields],
+        )
+
+
+def hash_file(file_path: str) -> str:
+    """Returns the sha256 hex digest of the file content."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as model_file:
+        for chunk in iter(lambda: model_file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _CacheEntry:
+    """Cached schema along with the file state it was built from."""
+
+    __slots__ = ("schema", "mtime_ns", "size", "digest", "memory")
+
+    def __init__(
+        self, model_schema: schema.ModelSchema, mtime_ns: int, size: int, digest: str
+    ):
+        self.schema = model_schema
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.memory = model_schema.approximate_size()
+
+
+class SchemaCache:
+    """Caches model schemas by resolved model path, extractor and interpreter.
+
+    An entry is reused while the file's mtime and size are unchanged. When
+    either changes the content hash is compared before re-introspecting, so
+    a touched but otherwise identical file is not loaded again.
+
+    While a model is being rebuilt by `refresh`, `get` keeps returning the
+    previously published schema instead of waiting for the rebuild.
+
+    With a `store` (see `lsp_disk_cache.DiskSchemaCache`), schemas are also
+    persisted and a model missing from memory is first looked up on disk.
+    Schemas read from disk are reported by `unverified` until refreshed.
+
+    Models are extracted outside the cache lock. A `get` for a model that is
+    already being extracted waits for that extraction instead of starting
+    another one.
+
+    Namespaces are shared by everyone configuring the same model sources.
+    With a `memory_budget` in bytes, cached schemas that no namespace uses
+    are dropped once the approximate memory of all schemas exceeds it, then
+    the least recently used namespaces along with the schemas only they use.
+    The most recently used namespace is always kept. `on_evict` receives the
+    sources, extractor and interpreter of each evicted namespace, while the
+    cache is locked.
+    """
+
+    def __init__(
+        self,
+        loader: typing.Callable[
+            [str, str, schema.Interpreter], schema.ModelSchema
+        ] = _extract_in_process,
+        store: Any = None,
+        memory_budget: Optional[int] = None,
+        on_evict: typing.Callable[
+            [Tuple[str, ...], str, schema.Interpreter], None
+        ] = lambda *_: None,
+    ):
+        self._loader = loader
+        self._store = store
+        self._memory_budget = memory_budget
+        self._on_evict = on_evict
+        self._memory = 0
+        # Namespace keys, least recently used first.
+        self._used: collections.OrderedDict[_NamespaceKey, None] = (
+            collections.OrderedDict()
+        )
+        self._unverified: Set[_ModuleKey] = set()
+        self._entries: Dict[_ModuleKey, _CacheEntry] = {}
+        self._published: Dict[_ModuleKey, schema.ModelSchema] = {}
+        self._refreshing: Set[_ModuleKey] = set()
+        self._namespaces: Dict[_NamespaceKey, ModelNamespace] = {}
+        self._refreshing_namespaces: Set[_NamespaceKey] = set()
+        self._pending: Dict[_ModuleKey, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        model_path: str,
+        extractor: str = "static",
+        interpreter: schema.Interpreter = (),
+    ) -> schema.ModelSchema:
+        """Returns the schema for the model, introspecting it only if it changed."""
+        interpreter = tuple(interpreter)
+        configured = (os.path.expanduser(model_path), extractor, interpreter)
+        with self._lock:
+            if configured in self._refreshing and configured in self._published:
+                return self._published[configured]
+
+        resolved = schema.resolve_model_path(model_path)
+        key = (resolved, extractor, interpreter)
+        stat = os.stat(resolved)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (entry.mtime_ns, entry.size) == (
+                stat.st_mtime_ns,
+                stat.st_size,
+            ):
+                self._published[configured] = entry.schema
+                return entry.schema
+            pending = self._pending.get(key)
+            extracting = pending is None
+            if extracting:
+                pending = self._pending[key] = concurrent.futures.Future()
+
+        if extracting:
+            try:
+                pending.set_result(self._extract(key, entry, stat))
+            except BaseException as error:
+                pending.set_exception(error)
+                raise
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+        model_schema = pending.result()
+        with self._lock:
+            self._published[configured] = model_schema
+        return model_schema
+
+    def _extract(
+        self,
+        key: _ModuleKey,
+        entry: Optional[_CacheEntry],
+        stat: os.stat_result,
+    ) -> schema.ModelSchema:
+        digest = hash_file(key[0])
+        if entry and entry.digest == digest:
+            with self._lock:
+                entry.mtime_ns = stat.st_mtime_ns
+                entry.size = stat.st_size
+            return entry.schema
+
+        model_schema = self._load_stored(key, digest)
+        if model_schema is None:
+            model_schema = self._loader(*key)
+            self._save(key, digest, model_schema)
+        entry = _CacheEntry(model_schema, stat.st_mtime_ns, stat.st_size, digest)
+        with self._lock:
+            self._set_entry(key, entry)
+        return model_schema
+
+    def preload(
+        self,
+        model_path: str,
+        extractor: str = "static",
+        interpreter: schema.Interpreter = (),
+    ) -> bool:
+        """Loads the model's schema from the store without extracting it.
+
+        Returns True if the schema is available in memory afterwards.
+        """
+        resolved = schema.resolve_model_path(model_path)
+        key = (resolved, extractor, tuple(interpreter))
+        try:
+            stat = os.stat(resolved)
+            digest = hash_file(resolved)
+        except OSError:
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                return True
+        model_schema = self._load_stored(key, digest)
+        if model_schema is None:
+            return False
+        entry = _CacheEntry(model_schema, stat.st_mtime_ns, stat.st_size, digest)
+        with self._lock:
+            if key not in self._entries:
+                self._set_entry(key, entry)
+        return True
+
+    def unverified(self) -> List[_ModuleKey]:
+        """Returns (path, extractor, interpreter) of schemas read from the
+        store that were not extracted again since."""
+        with self._lock:
+            return list(self._unverified)
+
+    def _load_stored(
+        self, key: _ModuleKey, digest: str
+    ) -> Optional[schema.ModelSchema]:
+        if self._store is None:
+            return None
+        model_schema = self._store.load(*key, digest)
+        if model_schema is not None:
+            with self._lock:
+                self._unverified.add(key)
+        return model_schema
+
+    def _save(
+        self, key: _ModuleKey, digest: str, model_schema: schema.ModelSchema
+    ) -> None:
+        with self._lock:
+            self._unverified.discard(key)
+        if self._store is not None:
+            self._store.save(*key, digest, model_schema)
+
+    def refresh(
+        self,
+        model_path: str,
+        extractor: str = "static",
+        interpreter: schema.Interpreter = (),
+    ) -> schema.ModelSchema:
+        """Rebuilds the schema for the model and publishes it once complete.
+
+        The rebuild happens outside the cache lock, so concurrent `get` calls
+        are answered from the previous schema until the new one is swapped in.
+        """
+        interpreter = tuple(interpreter)
+        configured = (os.path.expanduser(model_path), extractor, interpreter)
+        with self._lock:
+            self._refreshing.add(configured)
+        try:
+            key = (schema.resolve_model_path(model_path), extractor, interpreter)
+            stat = os.stat(key[0])
+            digest = hash_file(key[0])
+            model_schema = self._loader(*key)
+            entry = _CacheEntry(model_schema, stat.st_mtime_ns, stat.st_size, digest)
+            with self._lock:
+                self._set_entry(key, entry)
+                self._published[configured] = model_schema
+            self._save(key, digest, model_schema)
+            return model_schema
+        finally:
+            with self._lock:
+                self._refreshing.discard(configured)
+
+    def get_namespace(
+        self,
+        sources: Sequence[str],
+        extractor: str = "static",
+        interpreter: schema.Interpreter = (),
+    ) -> ModelNamespace:
+        """Returns the merged namespace of the model sources, rebuilding it if
+        any of its files or directories changed."""
+        key = (tuple(sources), extractor, tuple(interpreter))
+        with self._lock:
+            namespace = self._namespaces.get(key)
+            if namespace is not None:
+                self._touch(key)
+                if key in self._refreshing_namespaces:
+                    return namespace
+        if namespace is not None and not namespace.is_stale():
+            return namespace
+
+        namespace = ModelNamespace(*key, self)
+        with self._lock:
+            self._namespaces[key] = namespace
+            self._touch(key)
+        return namespace
+
+    def refresh_namespace(
+        self,
+        sources: Sequence[str],
+        extractor: str = "static",
+        interpreter: schema.Interpreter = (),
+    ) -> ModelNamespace:
+        """Rebuilds the namespace and re-indexes its already indexed modules
+        that changed, then publishes it.
+
+        Like `refresh`, concurrent readers keep using the previous namespace
+        until the new one is swapped in.
+        """
+        key = (tuple(sources), extractor, tuple(interpreter))
+        with self._lock:
+            self._refreshing_namespaces.add(key)
+        try:
+            namespace = ModelNamespace(*key, self)
+            for path in namespace.files:
+                if self._is_stale(path, extractor, key[2]):
+                    self.refresh(path, extractor, key[2])
+            with self._lock:
+                self._namespaces[key] = namespace
+                self._touch(key)
+            return namespace
+        finally:
+            with self._lock:
+                self._refreshing_namespaces.discard(key)
+
+    def indexed_schema(
+        self,
+        resolved: str,
+        extractor: str,
+        interpreter: schema.Interpreter,
+        mtime_ns: int,
+        size: int,
+    ) -> Optional[schema.ModelSchema]:
+        """Returns the cached schema of the resolved model if it was built
+        for the given file state, None otherwise."""
+        # Read without the lock, which is held while models are extracted.
+        entry = self._entries.get((resolved, extractor, interpreter))
+        if entry is None or (entry.mtime_ns, entry.size) != (mtime_ns, size):
+            return None
+        return entry.schema
+
+    def ready_namespace(
+        self,
+        sources: Sequence[str],
+        extractor: str = "static",
+        interpreter: schema.Interpreter = (),
+    ) -> Optional[ModelNamespace]:
+        """Returns the namespace if it and the lookups in it are answered from
+        memory, None if that needs parsing or importing a model first.
+
+        Never waits for an extraction in progress.
+        """
+        key = (tuple(sources), extractor, tuple(interpreter))
+        with self._lock:
+            namespace = self._namespaces.get(key)
+            if namespace is None or key in self._refreshing_namespaces:
+                return None
+            self._touch(key)
+        return namespace if namespace.is_ready() else None
+
+    def set_memory_budget(self, memory_budget: Optional[int]) -> None:
+        """Changes the memory budget, evicting namespaces past the new one."""
+        with self._lock:
+            self._memory_budget = memory_budget
+            self._evict()
+
+    def memory_usage(self) -> Dict[_NamespaceKey, int]:
+        """Returns the approximate bytes held by each namespace's schemas.
+
+        A schema shared by several namespaces counts for each of them.
+        """
+        with self._lock:
+            return {
+                key: sum(
+                    self._entries[entry_key].memory
+                    for entry_key in namespace.cache_keys()
+                    if entry_key in self._entries
+                )
+                for key, namespace in self._namespaces.items()
+            }
+
+    def _touch(self, key: _NamespaceKey) -> None:
+        self._used[key] = None
+        self._used.move_to_end(key)
+
+    def _set_entry(self, key: _ModuleKey, entry: _CacheEntry) -> None:
+        self._drop_entry(key)
+        self._entries[key] = entry
+        self._memory += entry.memory
+        self._evict()
+
+    def _drop_entry(self, key: _ModuleKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._memory -= entry.memory
+
+    def _evict(self) -> None:
+        if self._memory_budget is None or self._memory <= self._memory_budget:
+            return
+
+        def in_use() -> Set[_ModuleKey]:
+            return {
+                key
+                for namespace in self._namespaces.values()
+                for key in namespace.cache_keys()
+            }
+
+        used = in_use()
+        for key in [key for key in self._entries if key not in used]:
+            self._drop_entry(key)
+        for namespace_key in list(self._used)[:-1]:
+            if self._memory <= self._memory_budget:
+                break
+            del self._used[namespace_key]
+            namespace = self._namespaces.pop(namespace_key, None)
+            if namespace is None:
+                continue
+            used = in_use()
+            for key in namespace.cache_keys():
+                if key not in used:
+                    self._drop_entry(key)
+            self._on_evict(*namespace_key)
+
+        # Keep the schemas of evicted entries from being served or retained.
+        cached = {id(entry.schema) for entry in self._entries.values()}
+        for key in [
+            key
+            for key, model_schema in self._published.items()
+            if id(model_schema) not in cached
+        ]:
+            del self._published[key]
+
+    def _is_stale(
+        self, model_path: str, extractor: str, interpreter: schema.Interpreter
+    ) -> bool:
+        """Returns True if the model was indexed before and has changed since."""
+        resolved = schema.resolve_model_path(model_path)
+        with self._lock:
+            entry = self._entries.get((resolved, extractor, interpreter))
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(resolved)
+        except OSError:
+            return False
+        return (entry.mtime_ns, entry.size) != (stat.st_mtime_ns, stat.st_size)
+
+    def discard_namespace(
+        self,
+        sources: Sequence[str],
+        extractor: str = "static",
+        interpreter: schema.Interpreter = (),
+    ) -> None:
+        """Forgets the namespace of the model sources, keeping the schemas of
+        its modules."""
+        key = (tuple(sources), extractor, tuple(interpreter))
+        with self._lock:
+            self._namespaces.pop(key, None)
+            self._used.pop(key, None)
+
+    def invalidate(
+        self, model_path: Optional[str] = None, extractor: Optional[str] = None
+    ) -> None:
+        """Drops the entries for the given model and extractor, or all entries,
+        for every interpreter."""
+        with self._lock:
+            for key in list(self._namespaces):
+                if extractor is None or key[1] == extractor:
+                    del self._namespaces[key]
+                    self._used.pop(key, None)
+            resolved = configured = None
+            if model_path is not None:
+                resolved = schema.resolve_model_path(model_path)
+                configured = os.path.expanduser(model_path)
+            for key in list(self._entries):
+                if resolved in (None, key[0]) and extractor in (None, key[1]):
+                    self._drop_entry(key)
+            for key in list(self._published):
+                if configured in (None, key[0]) and extractor in (None, key[1]):
+                    del self._published[key]
+            if extractor is not None:
+                self._unverified = {
+                    key for key in self._unverified if key[1] != extractor
+                }
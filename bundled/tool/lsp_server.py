@@ -1,20 +1,32 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 """Implementation of tool support over LSP."""
+
 from __future__ import annotations
 
+import asyncio
 import copy
 import json
 import os
 import pathlib
-import re
 import sys
 import sysconfig
+import threading
 import traceback
-from typing import Any, Optional, Sequence, get_type_hints
-import importlib
-import inspect
-import typing
+import uuid
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
 
 # **********************************************************
 # Update sys.path before importing any bundled libraries.
@@ -38,30 +50,69 @@ update_sys_path(
 # Imports needed for the language server goes below this.
 # **********************************************************
 # pylint: disable=wrong-import-position,import-error
+import lsp_context as context
+import lsp_diagnostics as diagnostics
+import lsp_disk_cache as disk_cache
 import lsp_jsonrpc as jsonrpc
+import lsp_recorder as recorder
+import lsp_schema as schema
+import lsp_schema_cache as schema_cache
+import lsp_settings as snapshots
+import lsp_symbols as symbols
 import lsp_utils as utils
+import lsp_watcher as watcher
 import lsprotocol.types as lsp
 from pygls import server, uris, workspace
 from pygls.server import LanguageServer
 from lsprotocol.types import (
+    COMPLETION_ITEM_RESOLVE,
     TEXT_DOCUMENT_COMPLETION,
+    TEXT_DOCUMENT_DEFINITION,
+    TEXT_DOCUMENT_DID_CHANGE,
+    TEXT_DOCUMENT_DID_CLOSE,
+    TEXT_DOCUMENT_DID_OPEN,
+    TEXT_DOCUMENT_HOVER,
+    WORKSPACE_SYMBOL,
     CompletionItem,
+    CompletionItemKind,
     CompletionList,
+    CompletionOptions,
     CompletionParams,
+    DefinitionParams,
+    Diagnostic,
+    DiagnosticSeverity,
+    DidChangeTextDocumentParams,
+    DidCloseTextDocumentParams,
+    DidOpenTextDocumentParams,
+    Hover,
+    HoverParams,
+    Location,
+    MarkupContent,
+    MarkupKind,
+    SymbolInformation,
+    SymbolKind,
+    WorkspaceSymbolParams,
 )
 
-WORKSPACE_SETTINGS = {}
-GLOBAL_SETTINGS = {}
+# Current settings, replaced as a whole whenever they change.
+SETTINGS = snapshots.Settings()
 RUNNER = pathlib.Path(__file__).parent / "lsp_runner.py"
+MODEL_WORKER = "model-introspection"
+MODEL_WATCHERS = {}
 
 MAX_WORKERS = 5
+MAX_COMPLETION_ITEMS = 200
+MAX_HOVER_FIELDS = 30
+MAX_WORKSPACE_SYMBOLS = 100
 
 LSP_SERVER = server.LanguageServer(
-    name="Voyager code completion", version="1.0.0", max_workers=MAX_WORKERS
+    name="Voyager code completion",
+    version="1.0.0",
+    max_workers=MAX_WORKERS,
+    protocol_cls=recorder.protocol_class(os.getenv("LS_RECORD_TRAFFIC", "")),
 )
 
 
-
 # **********************************************************
 # Required Language Server Initialization and Exit handlers.
 # **********************************************************
@@ -73,104 +124,274 @@ def initialize(params: lsp.InitializeParams) -> None:
     paths = "\r\n   ".join(sys.path)
     log_to_output(f"sys.path used to run Server:\r\n   {paths}")
 
-    GLOBAL_SETTINGS.update(**params.initialization_options.get("globalSettings", {}))
+    global_settings = params.initialization_options.get("globalSettings", {})
 
     settings = params.initialization_options["settings"]
-    _update_workspace_settings(settings)
+    _apply_settings(global_settings, settings)
     log_to_output(
         f"Settings used to run Server:\r\n{json.dumps(settings, indent=4, ensure_ascii=False)}\r\n"
     )
     log_to_output(
-        f"Global settings:\r\n{json.dumps(GLOBAL_SETTINGS, indent=4, ensure_ascii=False)}\r\n"
+        f"Global settings:\r\n{json.dumps(global_settings, indent=4, ensure_ascii=False)}\r\n"
+    )
+    _start_model_watchers()
+
+
+@LSP_SERVER.feature(lsp.INITIALIZED)
+async def initialized(_params: lsp.InitializedParams) -> None:
+    """Builds the model index in the background, see `_warm_schema_cache`.
+
+    Skipped when `LS_SKIP_WARM_UP` is set, then the first request that needs
+    a model indexes it, as the cold benchmarks measure."""
+    if os.getenv("LS_SKIP_WARM_UP"):
+        return
+    await _warm_schema_cache_with_progress()
+
+
+@LSP_SERVER.feature(lsp.WORKSPACE_DID_CHANGE_CONFIGURATION)
+async def did_change_configuration(params: lsp.DidChangeConfigurationParams) -> None:
+    """Applies changed settings without restarting the server.
+
+    Expects the same `settings` and `globalSettings` as the initialization
+    options. Only the indexes of models whose sources, extractor or
+    interpreter changed are dropped and built again, see
+    `snapshots.model_changes`, the others stay warm. Settings of the server
+    process itself, such as its interpreter and import strategy, take
+    effect when the client restarts the server.
+    """
+    changes = params.settings
+    if not isinstance(changes, dict) or "settings" not in changes:
+        log_warning(f"Ignoring configuration without settings: {changes!r}")
+        return
+
+    previous = _apply_settings(changes.get("globalSettings", {}), changes["settings"])
+    settings = SETTINGS
+    log_to_output(
+        f"Settings changed:\r\n{json.dumps(changes, indent=4, ensure_ascii=False)}\r\n"
     )
+    outdated, added = snapshots.model_changes(previous, settings)
+    os.environ["LS_SHOW_NOTIFICATION"] = settings.show_notifications
+
+    # Stopping a runner waits for the schema request it is answering, and
+    # stopping a watcher for its thread, so neither runs on the event loop.
+    await asyncio.get_running_loop().run_in_executor(
+        None, _stop_outdated_workers, previous, settings, outdated
+    )
+    for model in outdated:
+        SCHEMA_CACHE.discard_namespace(*model)
+        SYMBOL_INDEXES.pop(model, None)
+    _start_model_watchers()
+
+    if added:
+        await _warm_schema_cache_with_progress(
+            [key for key in settings.models if key in added]
+        )
+    else:
+        DIAGNOSTICS.invalidate_all()
 
 
 @LSP_SERVER.feature(lsp.EXIT)
 def on_exit(_params: Optional[Any] = None) -> None:
     """Handle clean up on exit."""
+    _stop_model_watchers()
+    DIAGNOSTICS.stop()
     jsonrpc.shutdown_json_rpc()
 
 
 @LSP_SERVER.feature(lsp.SHUTDOWN)
 def on_shutdown(_params: Optional[Any] = None) -> None:
     """Handle clean up on shutdown."""
+    _stop_model_watchers()
+    DIAGNOSTICS.stop()
     jsonrpc.shutdown_json_rpc()
 
 
-def _get_global_defaults():
-    return {
-        "path": GLOBAL_SETTINGS.get("path", []),
-        "interpreter": GLOBAL_SETTINGS.get("interpreter", [sys.executable]),
-        "args": GLOBAL_SETTINGS.get("args", []),
-        "importStrategy": GLOBAL_SETTINGS.get("importStrategy", "useBundled"),
-        "showNotifications": GLOBAL_SETTINGS.get("showNotifications", "off"),
-    }
-
-
-def _update_workspace_settings(settings):
-    if not settings:
-        key = os.getcwd()
-        WORKSPACE_SETTINGS[key] = {
-            "cwd": key,
-            "workspaceFS": key,
-            "workspace": uris.from_fs_path(key),
-            **_get_global_defaults(),
-        }
-        return
+def _stop_outdated_workers(
+    previous: snapshots.Settings,
+    settings: snapshots.Settings,
+    outdated: Set[snapshots.ModelKey],
+) -> None:
+    """Stops the runners of interpreters no longer configured and the
+    watchers of outdated models."""
+    for interpreter in previous.interpreters:
+        if interpreter not in settings.interpreters:
+            jsonrpc.stop_json_rpc(_model_worker(interpreter))
+    _stop_model_watchers(outdated)
+
 
-    for setting in settings:
-        key = uris.to_fs_path(setting["workspace"])
-        WORKSPACE_SETTINGS[key] = {
-            "cwd": key,
-            **setting,
-            "workspaceFS": key,
-        }
+def _apply_settings(global_settings, workspace_settings) -> snapshots.Settings:
+    """Swaps in a snapshot of the new settings and returns the previous one."""
+    global SETTINGS  # pylint: disable=global-statement
+    previous = SETTINGS
+    SETTINGS = snapshots.Settings(global_settings, workspace_settings)
+    SCHEMA_CACHE.set_memory_budget(SETTINGS.memory_budget)
+    return previous
 
 
-def _get_settings_by_path(file_path: pathlib.Path):
-    workspaces = {s["workspaceFS"] for s in WORKSPACE_SETTINGS.values()}
+# *****************************************************
+# Model introspection.
+# *****************************************************
+def _model_worker(interpreter: Sequence[str]) -> str:
+    """Returns the id of the runner process importing models with the interpreter."""
+    return f"{MODEL_WORKER}:{' '.join(interpreter)}"
+
+
+def _import_model_in_worker(
+    model_path: str, interpreter: Sequence[str]
+) -> schema.ModelSchema:
+    """Imports the model in the runner process started with the workspace's
+    interpreter, keeping the model's dependencies out of the server."""
+    result = jsonrpc.get_schema_over_json_rpc(
+        _model_worker(interpreter), list(interpreter), os.getcwd(), model_path
+    )
+    DISK_CACHE.remember_pydantic_version(
+        interpreter, result.pop("pydantic_version", "")
+    )
+    return schema.ModelSchema.from_dict(result)
 
-    while file_path != file_path.parent:
-        str_file_path = str(file_path)
-        if str_file_path in workspaces:
-            return WORKSPACE_SETTINGS[str_file_path]
-        file_path = file_path.parent
 
-    setting_values = list(WORKSPACE_SETTINGS.values())
-    return setting_values[0]
+def _load_model_schema(
+    model_path: str, extractor: str, interpreter: Sequence[str]
+) -> schema.ModelSchema:
+    return schema_cache.extract_model_schema(
+        model_path, extractor, lambda path: _import_model_in_worker(path, interpreter)
+    )
 
 
-def _get_document_key(document: workspace.Document):
-    if WORKSPACE_SETTINGS:
-        document_workspace = pathlib.Path(document.path)
-        workspaces = {s["workspaceFS"] for s in WORKSPACE_SETTINGS.values()}
+DISK_CACHE = disk_cache.DiskSchemaCache(disk_cache.default_directory())
+SCHEMA_CACHE = schema_cache.SchemaCache(
+    _load_model_schema,
+    DISK_CACHE,
+    SETTINGS.memory_budget,
+    lambda *model: _on_evict(model),
+)
 
-        # Find workspace settings for the given file.
-        while document_workspace != document_workspace.parent:
-            if str(document_workspace) in workspaces:
-                return str(document_workspace)
-            document_workspace = document_workspace.parent
 
-    return None
+def _on_evict(model: snapshots.ModelKey) -> None:
+    SYMBOL_INDEXES.pop(model, None)
+    log_to_output(f"Evicted model index of {list(model[0])}")
 
 
-def _get_settings_by_document(document: workspace.Document | None):
-    if document is None or document.path is None:
-        return list(WORKSPACE_SETTINGS.values())[0]
+def _warm_schema_cache(
+    report: Callable[[int, int], None] = lambda *_: None,
+    models: Optional[Sequence[snapshots.ModelKey]] = None,
+):
+    """Indexes all modules of the given models, by default of every
+    configured model.
+
+    Stored schemas are loaded first, the remaining modules are extracted.
+    Requests arriving meanwhile wait for the module they need instead of
+    extracting it again. `report` receives the number of indexed and of all
+    modules.
+    """
+    discovered = []
+    for model in SETTINGS.models if models is None else models:
+        sources, extractor, interpreter = model
+        files, _ = schema.discover_model_files(sources)
+        for model_path in files:
+            SCHEMA_CACHE.preload(model_path, extractor, interpreter)
+        discovered.append((model, files))
+
+    total = sum(len(files) for _, files in discovered)
+    done = 0
+    for model, files in discovered:
+        sources, extractor, interpreter = model
+        try:
+            SCHEMA_CACHE.get_namespace(*model)
+        except Exception:  # pylint: disable=broad-except
+            log_error(f"Failed to index {sources}:\r\n{traceback.format_exc()}")
+        for model_path in files:
+            report(done, total)
+            try:
+                SCHEMA_CACHE.get(model_path, extractor, interpreter)
+            except Exception:  # pylint: disable=broad-except
+                log_error(f"Failed to index {model_path}:\r\n{traceback.format_exc()}")
+            done += 1
+    report(done, total)
+    for (sources, *_), memory in SCHEMA_CACHE.memory_usage().items():
+        log_to_output(f"Model index of {list(sources)}: ~{memory // 1024} KiB")
+
+
+def _verify_stored_schemas() -> None:
+    """Extracts schemas loaded from the disk cache again, so that they are
+    only served until verified."""
+    for model_path, extractor, interpreter in SCHEMA_CACHE.unverified():
+        try:
+            SCHEMA_CACHE.refresh(model_path, extractor, interpreter)
+        except Exception:  # pylint: disable=broad-except
+            log_error(f"Failed to verify {model_path}:\r\n{traceback.format_exc()}")
+    DIAGNOSTICS.invalidate_all()
+
 
-    key = _get_document_key(document)
-    if key is None:
-        # This is either a non-workspace file or there is no workspace.
-        key = os.fspath(pathlib.Path(document.path).parent)
-        return {
-            "cwd": key,
-            "workspaceFS": key,
-            "workspace": uris.from_fs_path(key),
-            **_get_global_defaults(),
-        }
+async def _warm_schema_cache_with_progress(
+    models: Optional[Sequence[snapshots.ModelKey]] = None,
+) -> None:
+    """Runs `_warm_schema_cache` on a worker thread, reporting its progress
+    through `window/workDoneProgress` if the client supports it."""
+    loop = asyncio.get_running_loop()
+    token = str(uuid.uuid4())
+    window = LSP_SERVER.client_capabilities.window
+    progress = bool(window and window.work_done_progress)
+    if progress:
+        try:
+            await LSP_SERVER.progress.create_async(token)
+        except Exception:  # pylint: disable=broad-except
+            progress = False
+
+    def report(done: int, total: int) -> None:
+        if progress and total:
+            loop.call_soon_threadsafe(
+                LSP_SERVER.progress.report,
+                token,
+                lsp.WorkDoneProgressReport(
+                    message=f"{done}/{total} model modules",
+                    percentage=done * 100 // total,
+                ),
+            )
+
+    if progress:
+        LSP_SERVER.progress.begin(
+            token, lsp.WorkDoneProgressBegin(title="Indexing models", percentage=0)
+        )
+    try:
+        await loop.run_in_executor(None, _warm_schema_cache, report, models)
+    finally:
+        if progress:
+            LSP_SERVER.progress.end(token, lsp.WorkDoneProgressEnd())
+    await loop.run_in_executor(None, _verify_stored_schemas)
 
-    return WORKSPACE_SETTINGS[str(key)]
 
+# *****************************************************
+# Model file watchers.
+# *****************************************************
+def _start_model_watchers() -> None:
+    """Starts a background watcher for every configured model source."""
+    for model in SETTINGS.models:
+
+        def _on_change(changed_path: str, model=model) -> None:
+            log_to_output(f"Model changed, re-indexing: {changed_path}")
+            try:
+                SCHEMA_CACHE.refresh_namespace(*model)
+            except Exception:  # pylint: disable=broad-except
+                log_error(
+                    f"Failed to re-index {changed_path}:\r\n{traceback.format_exc()}"
+                )
+            DIAGNOSTICS.invalidate_all()
+
+        for source in model[0]:
+            key = (model, source)
+            if key not in MODEL_WATCHERS:
+                MODEL_WATCHERS[key] = watcher.ModelWatcher(source, _on_change)
+                MODEL_WATCHERS[key].start()
+
+
+def _stop_model_watchers(
+    models: Optional[Sequence[snapshots.ModelKey]] = None,
+) -> None:
+    """Stops the watchers of the given models, by default all watchers."""
+    for key in list(MODEL_WATCHERS):
+        if models is None or key[0] in models:
+            MODEL_WATCHERS.pop(key).stop()
 
 
 # *****************************************************
@@ -200,91 +421,469 @@ def log_always(message: str) -> None:
         LSP_SERVER.show_message(message, lsp.MessageType.Info)
 
 
-@LSP_SERVER.feature(TEXT_DOCUMENT_COMPLETION)
-def completions(params: CompletionParams):
-    items = []
-    document = LSP_SERVER.workspace.get_text_document(params.text_document.uri)
-    current_line = document.lines[params.position.line].strip()
-
-    server_args = _get_global_defaults()["args"]
-    pydantic_module_path = server_args[0] 
-    model_attributes = re.compile(r"self\.pydantic_module\.([^\.]*)\.$")
-    attributes_field_info = re.compile(r"self\.pydantic_module\.([^\.]*)\.([^\.]*)\.$")
-    if current_line.endswith("self.pydantic_module."):
-        # extract module formatted path
-        pydantic_module_path = os.path.expanduser(pydantic_module_path)
-        module_name = os.path.splitext(os.path.basename(pydantic_module_path))[0]
-        module_dir = pydantic_module_path.replace(module_name+'.py','')
-
-        # Add the directory to the system path temporarily
-        sys.path.insert(0, module_dir)
-
-        # Import the module dynamically
-        module = importlib.import_module(module_name)
-
-        # Get all the members of the module
-        module_members = inspect.getmembers(module)
-
-        # Filter the members to get only the class names
-        items = [CompletionItem(label=member[0]) for member in module_members if inspect.isclass(member[1])]
-    elif model_attributes.match(current_line):
-        pydantic_module_path = os.path.expanduser(pydantic_module_path)
-        module_name = os.path.splitext(os.path.basename(pydantic_module_path))[0]
-        module_dir = pydantic_module_path.replace(module_name+'.py','')
-        class_name = model_attributes.search(current_line).group(1)
-        # Add the directory to the system path temporarily
-        sys.path.insert(0, module_dir)
-
-        # Import the module dynamically
-        module = importlib.import_module(module_name)
+_Result = TypeVar("_Result")
+
+# State of the pool job running on the current thread.
+_JOB = threading.local()
+
+
+class _Outdated(Exception):
+    """Raised for work whose request was cancelled or whose document changed."""
 
-        try:
-            # Get the class dynamically
-            class_object = getattr(module, class_name)
-            
-            # Get type hints and print the attributes
-            items = [CompletionItem(label=item) for item in get_type_hints(class_object).keys()]  
 
-        except AttributeError:
-            items = []
+def _checkpoint() -> None:
+    """Stops the current pool job if it is no longer wanted, e.g. between
+    modules that each may need to be imported."""
+    is_outdated = getattr(_JOB, "is_outdated", None)
+    if is_outdated is not None and is_outdated():
+        raise _Outdated()
 
-   
-    elif attributes_field_info.match(current_line):
-        pydantic_module_path = os.path.expanduser(pydantic_module_path)
-        module_name = os.path.splitext(os.path.basename(pydantic_module_path))[0]
-        module_dir = pydantic_module_path.replace(module_name+'.py','')
-        class_name = attributes_field_info.search(current_line).group(1)
-        attribute_name = attributes_field_info.search(current_line).group(2)
 
-        # Add the directory to the system path temporarily
-        sys.path.insert(0, module_dir)
+async def _with_namespace(
+    function: Callable[..., _Result],
+    *args: Any,
+    document: Optional[workspace.TextDocument] = None,
+    path: Optional[str] = None,
+    ready: Callable[[schema_cache.ModelNamespace], bool] = lambda namespace: True,
+) -> _Result:
+    """Calls `function(namespace, *args)` with the model namespace of the
+    workspace containing `document` or `path`, by default of the global model.
 
-        # Import the module dynamically
-        module = importlib.import_module(module_name)
+    Lookups in an indexed namespace are answered inline. When a model still
+    has to be parsed or imported (or `ready` says the namespace needs more
+    work), the call runs on the server's thread pool, so that the event loop
+    keeps handling cancellations and document changes meanwhile.
 
+    A cancelled request stops its pool job at the next `_checkpoint`. If
+    `document` changes before the job finishes, `_Outdated` is raised instead
+    of returning a result computed for the previous version.
+    """
+    if document is not None:
+        path = document.path
+    model = SETTINGS.model_of(path)
+    namespace = SCHEMA_CACHE.ready_namespace(*model)
+    if namespace is not None and ready(namespace):
+        return function(namespace, *args)
+
+    version = document.version if document else None
+    cancelled = threading.Event()
+
+    def is_outdated() -> bool:
+        return cancelled.is_set() or (
+            document is not None and document.version != version
+        )
+
+    def run() -> _Result:
+        _JOB.is_outdated = is_outdated
         try:
-            # Get the class dynamically
-            class_object = getattr(module, class_name)
-            # Get type hints and print the attributes
-            items = [CompletionItem(label='attribute type : '+  str(get_annotated_class_from_model(get_type_hints(class_object)[attribute_name])))]
-        except AttributeError:
-            items = [CompletionItem(label=f'No such class exist {class_name}')]
-        except KeyError:
-            items = [CompletionItem(label=f'No such attribute exist for {class_name}')]
+            # Requests queued behind a slow import are usually outdated by
+            # the time a worker picks them up.
+            _checkpoint()
+            return function(SCHEMA_CACHE.get_namespace(*model), *args)
+        finally:
+            _JOB.is_outdated = None
+
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            LSP_SERVER.thread_pool_executor, run
+        )
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+    if is_outdated():
+        raise _Outdated()
+    return result
+
+
+@LSP_SERVER.feature(TEXT_DOCUMENT_COMPLETION, CompletionOptions(resolve_provider=True))
+async def completions(params: CompletionParams):
+    items = []
+    is_incomplete = False
+    document = LSP_SERVER.workspace.get_text_document(params.text_document.uri)
+    position = document.position_codec.position_from_client_units(
+        document.lines, params.position
+    )
+    lines = document.lines
+    current_line = lines[position.line] if position.line < len(lines) else ""
+
+    completion_context = context.completion_context(
+        current_line, position.character, SETTINGS.completion_roots_of(document.path)
+    )
+    if completion_context:
+        try:
+            items, is_incomplete = await _with_namespace(
+                _complete_attribute_chain,
+                completion_context.chain,
+                completion_context.prefix,
+                document=document,
+            )
+        except _Outdated:
+            # The client asks again for the current version.
+            return CompletionList(is_incomplete=True, items=[])
+        for item in items:
+            if item.data is not None:
+                # Resolves the field in the document's workspace model.
+                item.data["uri"] = document.uri
     return CompletionList(
-        is_incomplete=False,
+        is_incomplete=is_incomplete,
         items=items,
     )
 
-def get_annotated_class_from_model(annotation):
-    """Gets the class type of attributes from the Field info annotation for a pydantic model class
-    Args:
-        annotation: annotation from the FieldInfo
+
+def _complete_names(
+    name_index: schema.NameIndex, prefix: str, class_name: Optional[str] = None
+):
+    """Returns completion items for names starting with the typed prefix.
+
+    The list is marked incomplete whenever it was narrowed down, so that the
+    client asks again as the user keeps typing. Field items only carry the
+    class and field name, their details are filled in by `completion_resolve`.
     """
-    if(isinstance(annotation, typing._GenericAlias)):
-        return get_annotated_class_from_model((typing.get_args(annotation))[0])
+    names, truncated = name_index.complete(prefix, MAX_COMPLETION_ITEMS)
+    if class_name is None:
+        items = [
+            CompletionItem(label=name, kind=CompletionItemKind.Class) for name in names
+        ]
+    else:
+        items = [
+            CompletionItem(
+                label=name,
+                kind=CompletionItemKind.Field,
+                data={"class": class_name, "field": name},
+            )
+            for name in names
+        ]
+    return items, truncated or bool(prefix)
+
+
+def _complete_attribute_chain(
+    namespace: schema_cache.ModelNamespace, chain: Sequence[str], prefix: str = ""
+):
+    """Completes `self.pydantic_module.<chain>.<prefix>` by walking the model type graph."""
+    if not chain:
+        return _complete_names(namespace.class_index, prefix)
+
+    class_schema = namespace.get_class(chain[0])
+    for attribute_name in chain[1:]:
+        field = class_schema and class_schema.fields.get(attribute_name)
+        if field is None:
+            return [], False
+        _checkpoint()
+        class_schema = namespace.get_target(field)
+    if class_schema is None:
+        # Unknown names and fields holding no model have nothing to complete.
+        return [], False
+
+    return _complete_names(class_schema.field_index, prefix, class_schema.name)
+
+
+@LSP_SERVER.feature(COMPLETION_ITEM_RESOLVE)
+async def completion_resolve(item: CompletionItem) -> CompletionItem:
+    """Adds the type, default, alias, constraints and description of the
+    highlighted field."""
+    if not isinstance(item.data, dict) or "field" not in item.data:
+        return item
+
+    uri = item.data.get("uri")
+    class_schema = await _with_namespace(
+        schema_cache.ModelNamespace.get_class,
+        item.data.get("class", ""),
+        path=uris.to_fs_path(uri) if uri else None,
+    )
+    field = class_schema and class_schema.fields.get(item.data["field"])
+    if field is None:
+        return item
+
+    item.detail = f"{field.name}: {field.annotation}"
+    documentation = _field_documentation(field)
+    if documentation:
+        item.documentation = MarkupContent(
+            kind=MarkupKind.Markdown, value=documentation
+        )
+    return item
+
+
+def _field_documentation(field: schema.FieldSchema) -> str:
+    details = field.details
+    lines = []
+    if details.get("description"):
+        lines += [details["description"], ""]
+    if "required" in details:
+        lines.append(f"- required: `{details['required']}`")
+    for key in ("default", "default_factory", "alias", "title", "constraints"):
+        if key in details:
+            lines.append(f"- {key.replace('_', ' ')}: `{details[key]}`")
+    return "\n".join(lines).strip()
+
+
+class _ModelSymbol(NamedTuple):
+    """Model class or field referenced under the cursor."""
+
+    range: lsp.Range
+    owner: schema.ClassSchema
+    field: Optional[schema.FieldSchema]
+
+
+async def _model_symbol_at(
+    params: lsp.TextDocumentPositionParams,
+) -> Optional[_ModelSymbol]:
+    """Resolves the model class or field under the cursor from the cached
+    namespace. The returned range is in client units."""
+    document = LSP_SERVER.workspace.get_text_document(params.text_document.uri)
+    position = document.position_codec.position_from_client_units(
+        document.lines, params.position
+    )
+    lines = document.lines
+    current_line = lines[position.line] if position.line < len(lines) else ""
+
+    end = context.identifier_end(current_line, position.character)
+    symbol_context = context.completion_context(
+        current_line, end, SETTINGS.completion_roots_of(document.path)
+    )
+    if not symbol_context or not symbol_context.prefix:
+        return None
+
+    try:
+        resolved = await _with_namespace(
+            _resolve_symbol, symbol_context, document=document
+        )
+    except _Outdated:
+        return None
+    if resolved is None:
+        return None
+    owner, field = resolved
+
+    start = end - len(symbol_context.prefix)
+    symbol_range = document.position_codec.range_to_client_units(
+        lines,
+        lsp.Range(
+            start=lsp.Position(line=position.line, character=start),
+            end=lsp.Position(line=position.line, character=end),
+        ),
+    )
+    return _ModelSymbol(symbol_range, owner, field)
+
+
+def _resolve_symbol(
+    namespace: schema_cache.ModelNamespace, symbol_context: context.CompletionContext
+) -> Optional[Tuple[schema.ClassSchema, Optional[schema.FieldSchema]]]:
+    if symbol_context.chain:
+        owner = namespace.resolve_chain(symbol_context.chain)
+        field = owner and owner.fields.get(symbol_context.prefix)
+        return None if field is None else (owner, field)
+    owner = namespace.get_class(symbol_context.prefix)
+    return None if owner is None else (owner, None)
+
+
+@LSP_SERVER.feature(TEXT_DOCUMENT_HOVER)
+async def hover(params: HoverParams) -> Optional[Hover]:
+    """Shows the model class or field under the cursor."""
+    symbol = await _model_symbol_at(params)
+    if symbol is None:
+        return None
+    if symbol.field is None:
+        contents = _class_hover(symbol.owner)
     else:
-        return annotation  
+        contents = _field_hover(symbol.owner, symbol.field)
+    return Hover(
+        contents=MarkupContent(kind=MarkupKind.Markdown, value=contents),
+        range=symbol.range,
+    )
+
+
+@LSP_SERVER.feature(TEXT_DOCUMENT_DEFINITION)
+async def definition(params: DefinitionParams) -> Optional[Location]:
+    """Jumps to the model class or field under the cursor.
+
+    Locations are recorded while the model is indexed, nothing is parsed here.
+    """
+    symbol = await _model_symbol_at(params)
+    if symbol is None:
+        return None
+    target = symbol.owner if symbol.field is None else symbol.field
+    if target.location is None:
+        return None
+    path, line, column = target.location
+    return Location(
+        uri=uris.from_fs_path(path),
+        range=lsp.Range(
+            start=lsp.Position(line=line, character=column),
+            end=lsp.Position(line=line, character=column + len(target.name)),
+        ),
+    )
+
+
+def _field_hover(owner: schema.ClassSchema, field: schema.FieldSchema) -> str:
+    signature = f"```python\n{owner.name}.{field.name}: {field.annotation}\n```"
+    documentation = _field_documentation(field)
+    return f"{signature}\n\n{documentation}" if documentation else signature
+
+
+def _class_hover(class_schema: schema.ClassSchema) -> str:
+    fields = list(class_schema.fields.values())
+    lines = [f"class {class_schema.name}:"]
+    lines += [
+        f"    {field.name}: {field.annotation}" for field in fields[:MAX_HOVER_FIELDS]
+    ]
+    if len(fields) > MAX_HOVER_FIELDS:
+        lines.append(f"    # ... {len(fields) - MAX_HOVER_FIELDS} more fields")
+    return "```python\n" + "\n".join(lines) + "\n```"
+
+
+# Symbol index of each model namespace.
+SYMBOL_INDEXES: Dict[snapshots.ModelKey, symbols.SymbolIndex] = {}
+
+
+def _symbol_index(namespace: schema_cache.ModelNamespace) -> symbols.SymbolIndex:
+    model = (namespace.sources, namespace.extractor, namespace.interpreter)
+    return SYMBOL_INDEXES.setdefault(model, symbols.SymbolIndex())
+
+
+@LSP_SERVER.feature(WORKSPACE_SYMBOL)
+async def workspace_symbol(params: WorkspaceSymbolParams) -> List[SymbolInformation]:
+    """Fuzzy searches the model classes and fields of every workspace, e.g.
+    `ordln` finds `OrderLine` and `Order.lines`."""
+    # One folder per model, workspaces sharing a model are searched once.
+    folders = {model: folder for folder, model in SETTINGS.workspace_models.items()}
+    results = await asyncio.gather(
+        *(
+            _with_namespace(
+                _search_symbols,
+                params.query,
+                path=folder,
+                ready=lambda namespace: _symbol_index(namespace).is_current(namespace),
+            )
+            for folder in folders.values()
+        ),
+        return_exceptions=True,
+    )
+    for folder, result in zip(folders.values(), results):
+        if isinstance(result, Exception):
+            log_error(
+                f"Failed to search symbols of {folder}:\r\n"
+                + "".join(
+                    traceback.format_exception(
+                        type(result), result, result.__traceback__
+                    )
+                )
+            )
+    found = symbols.merge(
+        [result for result in results if not isinstance(result, BaseException)],
+        params.query,
+        MAX_WORKSPACE_SYMBOLS,
+    )
+    return [
+        SymbolInformation(
+            name=symbol.name,
+            kind=SymbolKind.Class if symbol.kind == symbols.CLASS else SymbolKind.Field,
+            container_name=symbol.container,
+            location=_symbol_location(symbol),
+        )
+        for symbol in found
+    ]
+
+
+def _search_symbols(
+    namespace: schema_cache.ModelNamespace, query: str
+) -> List[symbols.Symbol]:
+    index = _symbol_index(namespace)
+    index.update(namespace, _checkpoint)
+    return index.search(query, MAX_WORKSPACE_SYMBOLS)
+
+
+def _symbol_location(symbol: symbols.Symbol) -> Location:
+    path, line, column = symbol.location or (symbol.path, 0, 0)
+    return Location(
+        uri=uris.from_fs_path(path),
+        range=lsp.Range(
+            start=lsp.Position(line=line, character=column),
+            end=lsp.Position(line=line, character=column + len(symbol.name)),
+        ),
+    )
+
+
+# *****************************************************
+# Model reference diagnostics.
+# *****************************************************
+def _document_lines(uri: str):
+    document = LSP_SERVER.workspace.text_documents.get(uri)
+    if document is None:
+        return None
+    return document.version, document.lines
+
+
+def _check_model_references(uri: str, lines):
+    settings = SETTINGS
+    path = uris.to_fs_path(uri)
+    namespace = SCHEMA_CACHE.get_namespace(*settings.model_of(path))
+    roots = settings.completion_roots_of(path)
+    return [diagnostics.check_line(namespace, line, roots) for line in lines]
+
+
+def _publish_model_diagnostics(uri: str, problems) -> None:
+    document = LSP_SERVER.workspace.text_documents.get(uri)
+    if document is None:
+        return
+    # Problems are found in code points, clients count e.g. UTF-16 units.
+    codec, lines = document.position_codec, document.lines
+    model_diagnostics = [
+        Diagnostic(
+            range=codec.range_to_client_units(
+                lines,
+                lsp.Range(
+                    start=lsp.Position(line=line, character=start),
+                    end=lsp.Position(line=line, character=end),
+                ),
+            ),
+            message=message,
+            severity=DiagnosticSeverity.Warning,
+            source=LSP_SERVER.name,
+        )
+        for line, (start, end, message) in problems
+    ]
+    LSP_SERVER.loop.call_soon_threadsafe(
+        LSP_SERVER.publish_diagnostics, uri, model_diagnostics
+    )
+
+
+DIAGNOSTICS = diagnostics.OpenDocuments(
+    _document_lines,
+    _check_model_references,
+    _publish_model_diagnostics,
+    on_error=log_error,
+)
+
+
+@LSP_SERVER.feature(TEXT_DOCUMENT_DID_OPEN)
+def did_open(params: DidOpenTextDocumentParams) -> None:
+    """Checks model references of the opened document."""
+    DIAGNOSTICS.open(params.text_document.uri, params.text_document.version)
+
+
+@LSP_SERVER.feature(TEXT_DOCUMENT_DID_CHANGE)
+def did_change(params: DidChangeTextDocumentParams) -> None:
+    """Checks model references on the changed lines."""
+    changes = []
+    for change in params.content_changes:
+        if isinstance(change, lsp.TextDocumentContentChangeEvent_Type1):
+            changes.append(
+                (
+                    change.range.start.line,
+                    change.range.end.line,
+                    change.text.count("\n") + 1,
+                )
+            )
+        else:
+            changes.append(None)
+    DIAGNOSTICS.change(params.text_document.uri, params.text_document.version, changes)
+
+
+@LSP_SERVER.feature(TEXT_DOCUMENT_DID_CLOSE)
+def did_close(params: DidCloseTextDocumentParams) -> None:
+    """Clears the diagnostics of the closed document."""
+    DIAGNOSTICS.close(params.text_document.uri)
+    LSP_SERVER.publish_diagnostics(params.text_document.uri, [])
+
 
 # *****************************************************
 # Start the server.
@@ -0,0 +1,146 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Immutable snapshots of the server settings."""
+
+from __future__ import annotations
+
+import os
+import sys
+import types
+from typing import Any, Dict, Mapping, Optional, Sequence, Set, Tuple
+
+import lsp_context as context
+import lsp_workspaces as workspaces
+from pygls import uris
+
+GLOBAL_DEFAULTS = {
+    "path": [],
+    "interpreter": [sys.executable],
+    "args": [],
+    "importStrategy": "useBundled",
+    "showNotifications": "off",
+    "modelExtractor": "static",
+    "completionRoots": list(context.DEFAULT_ROOTS),
+    "indexMemoryLimit": 512,
+}
+
+# Model sources, extractor and the interpreter importing the models, which
+# identify a model index.
+ModelKey = Tuple[Tuple[str, ...], str, Tuple[str, ...]]
+
+
+def freeze(value: Any) -> Any:
+    """Returns a read-only copy, with mappings as MappingProxyType and lists
+    as tuples."""
+    if isinstance(value, Mapping):
+        return types.MappingProxyType(
+            {key: freeze(item) for key, item in value.items()}
+        )
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _model_key(settings: Mapping[str, Any], interpreter: Tuple[str, ...]) -> ModelKey:
+    return (
+        tuple(os.path.expanduser(source) for source in settings.get("args", ())),
+        settings.get("modelExtractor", "static"),
+        tuple(settings.get("interpreter") or ()) or interpreter,
+    )
+
+
+class Settings:
+    """The global and per-workspace settings at one point in time.
+
+    A snapshot is never changed once built. The server replaces its
+    snapshot as a whole when the settings change, so readers take one
+    reference and see consistent settings without locking. Values derived
+    from the settings are computed once, when the snapshot is built.
+    """
+
+    def __init__(
+        self,
+        global_settings: Optional[Mapping[str, Any]] = None,
+        workspace_settings: Sequence[Mapping[str, Any]] = (),
+    ):
+        self.global_defaults: Mapping[str, Any] = freeze(
+            {**GLOBAL_DEFAULTS, **(global_settings or {})}
+        )
+
+        by_folder: Dict[str, Any] = {}
+        if not workspace_settings:
+            key = os.getcwd()
+            by_folder[key] = {
+                "cwd": key,
+                "workspaceFS": key,
+                "workspace": uris.from_fs_path(key),
+                **self.global_defaults,
+            }
+        for setting in workspace_settings:
+            key = uris.to_fs_path(setting["workspace"])
+            by_folder[key] = {"cwd": key, **setting, "workspaceFS": key}
+        self.workspaces: Mapping[str, Mapping[str, Any]] = freeze(by_folder)
+        self.resolver = workspaces.WorkspaceResolver(self.workspaces)
+
+        # Workspaces without an interpreter of their own use the global one.
+        self.interpreter: Tuple[str, ...] = self.global_defaults["interpreter"] or (
+            sys.executable,
+        )
+        self.model: ModelKey = _model_key(self.global_defaults, self.interpreter)
+        self.workspace_models: Mapping[str, ModelKey] = types.MappingProxyType(
+            {
+                folder: _model_key(setting, self.interpreter)
+                for folder, setting in self.workspaces.items()
+            }
+        )
+        # Distinct models of all workspaces, the global one first.
+        self.models: Tuple[ModelKey, ...] = tuple(
+            dict.fromkeys([self.model, *self.workspace_models.values()])
+        )
+        # Distinct interpreters of all models.
+        self.interpreters: Tuple[Tuple[str, ...], ...] = tuple(
+            dict.fromkeys(model[2] for model in self.models)
+        )
+        self.completion_roots: Tuple[str, ...] = self.global_defaults["completionRoots"]
+        self.workspace_roots: Mapping[str, Tuple[str, ...]] = types.MappingProxyType(
+            {
+                folder: setting.get("completionRoots", self.completion_roots)
+                for folder, setting in self.workspaces.items()
+            }
+        )
+        # When to show log messages as notifications, see `log_error`.
+        self.show_notifications: str = self.global_defaults["showNotifications"]
+        # Approximate bytes of cached schemas, None for no limit.
+        limit = self.global_defaults["indexMemoryLimit"]
+        self.memory_budget: Optional[int] = limit * 2**20 if limit else None
+
+    def model_of(self, path: Optional[str]) -> ModelKey:
+        """Returns the model of the innermost workspace containing the path,
+        the global model for other files."""
+        folder = None if path is None else self.resolver.resolve(path)
+        return self.model if folder is None else self.workspace_models[folder]
+
+    def completion_roots_of(self, path: Optional[str]) -> Tuple[str, ...]:
+        """Returns the completion roots of the innermost workspace containing
+        the path, the global ones for other files."""
+        folder = None if path is None else self.resolver.resolve(path)
+        return self.completion_roots if folder is None else self.workspace_roots[folder]
+
+    def workspace_of(self, path: str) -> Optional[Mapping[str, Any]]:
+        """Returns the settings of the innermost workspace containing the path."""
+        folder = self.resolver.resolve(path)
+        return None if folder is None else self.workspaces[folder]
+
+
+def model_changes(
+    previous: Settings, current: Settings
+) -> Tuple[Set[ModelKey], Set[ModelKey]]:
+    """Returns the models whose index is outdated by the change from the
+    previous to the current settings, and the models to index anew.
+
+    Models no longer configured are outdated, newly configured ones are
+    indexed, so a workspace changing its sources, extractor or interpreter
+    does both. Other models are unaffected.
+    """
+    before, after = set(previous.models), set(current.models)
+    return before - after, after - before
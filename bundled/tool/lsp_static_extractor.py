@@ -0,0 +1,329 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Reads model schemas from the source of a model file, without importing it."""
+
+from __future__ import annotations
+
+import ast
+import builtins
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import lsp_schema as schema
+
+# A source line with its line end, split where `ast` counts a new line.
+SOURCE_LINE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$")
+
+# Generic containers whose last argument is the type of the contained values.
+MAPPING_TYPES = frozenset(
+    ("Dict", "dict", "Mapping", "MutableMapping", "DefaultDict", "OrderedDict")
+)
+
+
+class UnresolvedModelError(Exception):
+    """Model file uses constructs the static extractor cannot resolve."""
+
+
+def _subscript_args(node: ast.Subscript) -> List[ast.expr]:
+    """Returns the arguments of a subscript such as `List[...]`."""
+    index = node.slice
+    if isinstance(index, ast.Index):  # Python 3.8
+        index = index.value  # pylint: disable=no-member
+    if isinstance(index, ast.Tuple):
+        return list(index.elts)
+    return [index]
+
+
+def _unquote(node: ast.expr) -> ast.expr:
+    """Parses string forward references into expressions."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        try:
+            return ast.parse(node.value, mode="eval").body
+        except SyntaxError:
+            return node
+    return node
+
+
+def _source_lines(source: str) -> List[str]:
+    """Splits the source into lines, with their line ends, as `ast` counts
+    them."""
+    return SOURCE_LINE.findall(source)
+
+
+def _byte_slice(line: str, start: int, end: Optional[int]) -> str:
+    # ast columns are utf-8 byte offsets.
+    if line.isascii():
+        return line[start:end]
+    return line.encode("utf-8")[start:end].decode("utf-8", "ignore")
+
+
+def _source_segment(lines: List[str], node: ast.AST) -> str:
+    """Returns the source text of the node, like `ast.get_source_segment` but
+    on lines split once per module instead of on every call."""
+    end_lineno = getattr(node, "end_lineno", None)
+    end_col_offset = getattr(node, "end_col_offset", None)
+    if end_lineno is None or end_col_offset is None or end_lineno > len(lines):
+        return ""
+    first, last = node.lineno - 1, end_lineno - 1
+    if first == last:
+        return _byte_slice(lines[first], node.col_offset, end_col_offset)
+    return "".join(
+        [
+            _byte_slice(lines[first], node.col_offset, None),
+            *lines[first + 1 : last],
+            _byte_slice(lines[last], 0, end_col_offset),
+        ]
+    )
+
+
+def _static_type_name(node: ast.expr, lines: List[str]) -> str:
+    """Static equivalent of `get_annotated_class_from_model`."""
+    node = _unquote(node)
+    if isinstance(node, ast.Subscript):
+        args = _subscript_args(node)
+        if args:
+            return _static_type_name(args[0], lines)
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return _source_segment(lines, node)
+
+
+def _unqualified_name(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _static_targets(node: ast.expr) -> List[str]:
+    """Returns the names of the classes an annotation refers to."""
+    node = _unquote(node)
+    if isinstance(node, ast.Subscript):
+        args = _subscript_args(node)
+        if _unqualified_name(node.value) in MAPPING_TYPES:
+            args = args[-1:]
+        return [target for arg in args for target in _static_targets(arg)]
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return _static_targets(node.left) + _static_targets(node.right)
+    name = _unqualified_name(node)
+    if name is None or hasattr(builtins, name):
+        return []
+    return [name]
+
+
+def _static_field_details(
+    value: Optional[ast.expr], lines: List[str]
+) -> Dict[str, Any]:
+    """Reads the default, alias, description and constraints of a field from
+    its assigned value, e.g. `= Field(1, alias="qty", gt=0)`."""
+    if value is None:
+        return {"required": True}
+
+    def segment(node: ast.expr) -> str:
+        # Literals are shown as the import extractor would show them.
+        try:
+            return repr(ast.literal_eval(node))
+        except (ValueError, TypeError, SyntaxError, RecursionError):
+            return _source_segment(lines, node)
+
+    if not (isinstance(value, ast.Call) and _unqualified_name(value.func) == "Field"):
+        return {"required": False, "default": segment(value)}
+
+    details: Dict[str, Any] = {}
+    constraints = []
+    if value.args:
+        details["default"] = segment(value.args[0])
+    for keyword in value.keywords:
+        if keyword.arg in ("default", "default_factory", "alias", "title"):
+            details[keyword.arg] = segment(keyword.value)
+        elif keyword.arg == "description":
+            if isinstance(keyword.value, ast.Constant):
+                details["description"] = str(keyword.value.value)
+            else:
+                details["description"] = segment(keyword.value)
+        elif keyword.arg in schema.FIELD_CONSTRAINTS:
+            constraints.append(f"{keyword.arg}={segment(keyword.value)}")
+    if constraints:
+        details["constraints"] = ", ".join(constraints)
+    if details.get("default") in ("...", "Ellipsis"):
+        del details["default"]
+    details["required"] = "default" not in details and "default_factory" not in details
+    return details
+
+
+def _is_class_var(node: ast.expr) -> bool:
+    node = _unquote(node)
+    if isinstance(node, ast.Subscript):
+        node = node.value
+    if isinstance(node, ast.Attribute):
+        return node.attr == "ClassVar"
+    return isinstance(node, ast.Name) and node.id == "ClassVar"
+
+
+def _known_base_names(tree: ast.Module) -> Dict[str, bool]:
+    """Maps names bound by imports to whether they come from a known base module."""
+    names = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            root = (node.module or "").split(".")[0]
+            known = node.level == 0 and root in schema.KNOWN_BASE_MODULES
+            for alias in node.names:
+                if alias.name == "*":
+                    raise UnresolvedModelError(f"star import from {node.module}")
+                names[alias.asname or alias.name] = known
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                root = alias.name.split(".")[0]
+                names[alias.asname or root] = root in schema.KNOWN_BASE_MODULES
+    return names
+
+
+def _location(
+    model_path: str, lines: List[str], node: ast.AST, name: Optional[str] = None
+) -> schema.Location:
+    """Returns the location of the node, or of `name` after the node's start."""
+    line = lines[node.lineno - 1]
+    column = node.col_offset
+    is_ascii = line.isascii()
+    if not is_ascii:
+        # ast columns are utf-8 byte offsets.
+        column = len(line.encode("utf-8")[:column].decode("utf-8", "ignore"))
+    if name is not None:
+        found = line.find(name, column + 1)
+        column = found if found >= 0 else column
+    if not is_ascii:
+        column = len(line[:column].encode("utf-16-le")) // 2
+    return (model_path, node.lineno - 1, column)
+
+
+def _is_field(statement: ast.stmt) -> bool:
+    return (
+        isinstance(statement, ast.AnnAssign)
+        and isinstance(statement.target, ast.Name)
+        # Pydantic treats underscored names as private attributes.
+        and not statement.target.id.startswith("_")
+        and not _is_class_var(statement.annotation)
+    )
+
+
+def _bound_names(statements: Sequence[ast.stmt]) -> List[str]:
+    """Returns the names the statements bind, looking into conditional and
+    `try` blocks but not into function or class bodies."""
+    names = []
+    for statement in statements:
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.append(statement.name)
+        elif isinstance(statement, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = getattr(statement, "targets", None) or [statement.target]
+            names.extend(
+                node.id
+                for target in targets
+                for node in ast.walk(target)
+                if isinstance(node, ast.Name)
+            )
+        elif isinstance(statement, (ast.Import, ast.ImportFrom)):
+            names.extend(
+                (alias.asname or alias.name).split(".")[0]
+                for alias in statement.names
+                if alias.name != "*"
+            )
+        else:
+            blocks = [
+                getattr(statement, block, [])
+                for block in ("body", "orelse", "finalbody")
+            ]
+            blocks.extend(
+                handler.body for handler in getattr(statement, "handlers", [])
+            )
+            for block in blocks:
+                names.extend(_bound_names(block))
+    return names
+
+
+def class_locations(
+    model_path: str,
+) -> Dict[str, Tuple[schema.Location, Dict[str, schema.Location]]]:
+    """Returns the location of every top level class and its fields."""
+    with open(model_path, "rb") as model_file:
+        source = model_file.read().decode("utf-8")
+    lines = source.splitlines()
+    locations = {}
+    for node in ast.parse(source, filename=model_path).body:
+        if isinstance(node, ast.ClassDef):
+            locations[node.name] = (
+                _location(model_path, lines, node, node.name),
+                {
+                    statement.target.id: _location(model_path, lines, statement)
+                    for statement in node.body
+                    if _is_field(statement)
+                },
+            )
+    return locations
+
+
+def parse_model_schema(model_path: str) -> schema.ModelSchema:
+    """Builds the model schema from the source without executing it.
+
+    Base classes imported from other modules are recorded in `bases` and
+    left to `ModelNamespace` to resolve. Raises `UnresolvedModelError` if a
+    class derives from anything else that is not defined in the file.
+    """
+    with open(model_path, "rb") as model_file:
+        source = model_file.read().decode("utf-8")
+    tree = ast.parse(source, filename=model_path)
+    imported = _known_base_names(tree)
+    lines = source.splitlines()
+    source_lines = _source_lines(source)
+
+    classes: Dict[str, schema.ClassSchema] = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+
+        fields: Dict[str, schema.FieldSchema] = {}
+        attributes: Dict[str, None] = {}
+        bases: List[str] = []
+        for base in reversed(node.bases):
+            if isinstance(base, ast.Subscript):
+                base = base.value
+            base_root = base
+            while isinstance(base_root, ast.Attribute):
+                base_root = base_root.value
+            if not isinstance(base_root, ast.Name):
+                raise UnresolvedModelError(f"base of {node.name}")
+            if base_root.id in classes:
+                fields.update(classes[base_root.id].fields)
+                attributes.update(dict.fromkeys(classes[base_root.id].attributes))
+                bases.extend(classes[base_root.id].bases)
+            elif base_root.id in imported:
+                if not imported[base_root.id]:
+                    bases.append(_unqualified_name(base))
+            elif not hasattr(builtins, base_root.id):
+                raise UnresolvedModelError(f"base {base_root.id} of {node.name}")
+
+        for statement in node.body:
+            if _is_field(statement):
+                name = statement.target.id
+                annotation = _source_segment(source_lines, statement.annotation)
+                fields.pop(name, None)
+                fields[name] = schema.FieldSchema(
+                    name,
+                    annotation,
+                    _static_type_name(statement.annotation, source_lines),
+                    _static_targets(statement.annotation),
+                    _static_field_details(statement.value, source_lines),
+                    _location(model_path, lines, statement),
+                )
+        attributes.update(dict.fromkeys(_bound_names(node.body)))
+        classes[node.name] = schema.ClassSchema(
+            node.name,
+            fields,
+            bases,
+            _location(model_path, lines, node, node.name),
+            [name for name in attributes if name not in fields],
+        )
+    names = [name for name in _bound_names(tree.body) if name not in classes]
+    return schema.ModelSchema(model_path, classes, list(dict.fromkeys(names)))
@@ -0,0 +1,205 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Fuzzy search over the classes and fields of a model namespace."""
+
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import lsp_schema as schema
+import lsp_schema_cache as schema_cache
+
+CLASS = "class"
+FIELD = "field"
+
+# Rows containing all characters of a query that are matched against it at
+# most, shortest first. Bounds the time of queries that few of many such
+# rows match, e.g. ~2 ms instead of ~30 ms for 50k symbols.
+MAX_CANDIDATES = 2000
+
+
+class Symbol(NamedTuple):
+    """A class, or a field declared by a class."""
+
+    name: str
+    kind: str
+    container: Optional[str]
+    path: str
+    location: Optional[schema.Location]
+
+    @property
+    def qualified_name(self) -> str:
+        """`Order.lines` for fields, the class name for classes."""
+        return f"{self.container}.{self.name}" if self.container else self.name
+
+
+def _module_symbols(path: str, model: schema.ModelSchema) -> List[Symbol]:
+    symbols = []
+    declared: Set[schema.Location] = set()
+    for class_schema in model.classes.values():
+        symbols.append(
+            Symbol(class_schema.name, CLASS, None, path, class_schema.location)
+        )
+        for field in class_schema.fields.values():
+            # Inherited fields are listed once, for the class declaring them.
+            if field.location is not None:
+                if field.location in declared:
+                    continue
+                declared.add(field.location)
+            symbols.append(
+                Symbol(field.name, FIELD, class_schema.name, path, field.location)
+            )
+    return symbols
+
+
+class SymbolIndex:
+    """Fuzzy search over the qualified names (`Order.lines`) of all classes
+    and fields.
+
+    Symbols are kept per model module and `update` only lists the modules
+    whose schema changed. Rows are ordered by name length, and each
+    character maps to a bitset of the rows containing it, so a query only
+    matches the rows that contain all of its characters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespace: Optional[schema_cache.ModelNamespace] = None
+        self._modules: Dict[str, Tuple[schema.ModelSchema, List[Symbol]]] = {}
+        self._rows: List[Symbol] = []
+        self._keys: List[str] = []
+        self._char_rows: Dict[str, int] = {}
+        # Sorted lower case names and qualified names, with their row.
+        self._names: List[str] = []
+        self._name_rows: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def is_current(self, namespace: schema_cache.ModelNamespace) -> bool:
+        """Returns True if the index was last updated with the namespace."""
+        return namespace is self._namespace
+
+    def update(
+        self,
+        namespace: schema_cache.ModelNamespace,
+        checkpoint: Callable[[], None] = lambda: None,
+    ) -> None:
+        """Indexes all modules of the namespace, reusing unchanged modules.
+
+        `checkpoint` is called before each module and may raise to stop.
+        """
+        with self._lock:
+            if namespace is self._namespace:
+                return
+            modules = {}
+            for path in namespace.files:
+                checkpoint()
+                try:
+                    model = namespace.get_module_schema(path)
+                except Exception:  # pylint: disable=broad-except
+                    continue
+                previous = self._modules.get(path)
+                if previous is not None and previous[0] is model:
+                    modules[path] = previous
+                else:
+                    modules[path] = (model, _module_symbols(path, model))
+
+            if modules.keys() != self._modules.keys() or any(
+                modules[path] is not self._modules[path] for path in modules
+            ):
+                self._build(
+                    [symbol for _, items in modules.values() for symbol in items]
+                )
+            self._modules = modules
+            self._namespace = namespace
+
+    def _build(self, symbols: List[Symbol]) -> None:
+        rows = sorted(symbols, key=lambda symbol: len(symbol.qualified_name))
+        keys = [symbol.qualified_name.lower() for symbol in rows]
+
+        char_bits: Dict[str, bytearray] = {}
+        size = len(rows) // 8 + 1
+        for row, key in enumerate(keys):
+            for char in set(key):
+                bits = char_bits.get(char)
+                if bits is None:
+                    bits = char_bits[char] = bytearray(size)
+                bits[row >> 3] |= 1 << (row & 7)
+
+        names = sorted(
+            [(key, row) for row, key in enumerate(keys)]
+            + [
+                (symbol.name.lower(), row)
+                for row, symbol in enumerate(rows)
+                if symbol.container
+            ]
+        )
+        self._rows = rows
+        self._keys = keys
+        self._char_rows = {
+            char: int.from_bytes(bits, "little") for char, bits in char_bits.items()
+        }
+        self._names = [name for name, _ in names]
+        self._name_rows = [row for _, row in names]
+
+    def search(self, query: str, limit: int) -> List[Symbol]:
+        """Returns up to `limit` symbols containing the query's characters in
+        order. Names starting with the query come first, then other matches,
+        shorter names first within each.
+
+        Only the `MAX_CANDIDATES` shortest names containing the query's
+        characters are matched in order, longer ones need a longer query.
+        """
+        query = "".join(query.lower().split())
+        with self._lock:
+            rows, keys, char_rows = self._rows, self._keys, self._char_rows
+            names, name_rows = self._names, self._name_rows
+        if not query:
+            return rows[:limit]
+
+        start = bisect.bisect_left(names, query)
+        end = bisect.bisect_left(names, query + "\U0010ffff", lo=start)
+        found = sorted(set(name_rows[start:end]))[:limit]
+
+        candidates = -1
+        for char in set(query):
+            candidates &= char_rows.get(char, 0)
+        if candidates > 0 and len(found) < limit:
+            seen = set(found)
+            pattern = re.compile(
+                "".join(
+                    f"{re.escape(char)}[^{re.escape(following)}]*"
+                    for char, following in zip(query, query[1:])
+                )
+                + re.escape(query[-1])
+            )
+            # Set bits from the lowest, i.e. shortest names first.
+            bits = bin(candidates)[:1:-1]
+            row = bits.find("1")
+            checked = 0
+            while row >= 0 and len(found) < limit and checked < MAX_CANDIDATES:
+                if row not in seen:
+                    checked += 1
+                    if pattern.search(keys[row]):
+                        found.append(row)
+                row = bits.find("1", row + 1)
+        return [rows[row] for row in found]
+
+
+def merge(results: List[List[Symbol]], query: str, limit: int) -> List[Symbol]:
+    """Merges the results of searching several indexes, in the order of
+    `SymbolIndex.search`, listing symbols found by several of them once."""
+    query = "".join(query.lower().split())
+
+    def rank(symbol: Symbol) -> Tuple[bool, int]:
+        prefix = symbol.qualified_name.lower().startswith(query) or bool(
+            symbol.container and symbol.name.lower().startswith(query)
+        )
+        return not prefix, len(symbol.qualified_name)
+
+    merged = list(dict.fromkeys(symbol for found in results for symbol in found))
+    return sorted(merged, key=rank)[:limit]
@@ -0,0 +1,233 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Background watcher for model files."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+# inotify constants from <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+READ_SIZE = 64 * 1024
+
+# Time to let a burst of events (e.g. an editor's write-then-rename) settle.
+SETTLE_DELAY = 0.05
+STOP_CHECK_INTERVAL = 1.0
+MIN_POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 5.0
+
+Fingerprint = Optional[Tuple[Any, ...]]
+
+
+def _load_inotify():
+    """Returns libc if it provides inotify, otherwise None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _model_directories(model_dir: str) -> List[str]:
+    directories = []
+    for root, dir_names, _ in os.walk(model_dir):
+        dir_names[:] = [
+            name
+            for name in dir_names
+            if not name.startswith(".") and name != "__pycache__"
+        ]
+        directories.append(root)
+    return directories
+
+
+def fingerprint(model_path: str) -> Fingerprint:
+    """Returns the resolved path and file state of the model, None if missing.
+
+    For a model directory the state of every python file below it is included.
+    """
+    resolved = os.path.realpath(model_path)
+    if os.path.isdir(resolved):
+        files = []
+        for directory in _model_directories(resolved):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".py") and entry.is_file():
+                        stat = entry.stat()
+                        files.append((entry.path, stat.st_mtime_ns, stat.st_size))
+        return (resolved, *sorted(files))
+    try:
+        stat = os.stat(resolved)
+    except OSError:
+        return None
+    return (resolved, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def watched_directories(model_path: str) -> List[str]:
+    """Directories to watch so that edits and model directory swaps are seen.
+
+    The model's directory may itself be a symlink or a directory that gets
+    replaced when switching model versions, so its parent is watched too.
+    inotify is not recursive, so every directory of a model package is
+    watched.
+    """
+    if os.path.isdir(model_path):
+        candidates = [
+            *_model_directories(model_path),
+            os.path.dirname(model_path),
+            *_model_directories(os.path.realpath(model_path)),
+        ]
+    else:
+        model_dir = os.path.dirname(model_path)
+        candidates = [
+            model_dir,
+            os.path.dirname(model_dir),
+            os.path.dirname(os.path.realpath(model_path)),
+        ]
+    directories = []
+    for directory in candidates:
+        if directory not in directories and os.path.isdir(directory):
+            directories.append(directory)
+    return directories
+
+
+class ModelWatcher:
+    """Watches a model file or directory and calls `on_change` from a background
+    thread.
+
+    Uses inotify where available and otherwise polls, backing off while the
+    file stays unchanged.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        on_change: Callable[[str], None],
+        min_interval: float = MIN_POLL_INTERVAL,
+        max_interval: float = MAX_POLL_INTERVAL,
+    ):
+        self.model_path: str = os.path.normpath(os.path.expanduser(model_path))
+        self._on_change = on_change
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fingerprint: Fingerprint = fingerprint(self.model_path)
+
+    def start(self) -> None:
+        """Starts watching in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self._run, name=f"watch:{self.model_path}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops watching and waits for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(STOP_CHECK_INTERVAL * 2)
+
+    def _check(self) -> bool:
+        """Calls `on_change` if the model changed since the last check."""
+        current = fingerprint(self.model_path)
+        if current == self._fingerprint:
+            return False
+        self._fingerprint = current
+        if current is not None:
+            try:
+                self._on_change(self.model_path)
+            except Exception:  # pylint: disable=broad-except
+                pass
+        return True
+
+    def _run(self) -> None:
+        libc = _load_inotify()
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                try:
+                    self._watch_inotify(libc, fd)
+                finally:
+                    os.close(fd)
+                return
+        self._poll()
+
+    def _add_watches(self, libc, fd: int) -> List[int]:
+        watches = []
+        for directory in watched_directories(self.model_path):
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                watches.append(wd)
+        return watches
+
+    def _watch_inotify(self, libc, fd: int) -> None:
+        watches = self._add_watches(libc, fd)
+        while not self._stop.is_set():
+            # Without any watch (e.g. the model directory is missing) there is
+            # nothing to wake us up, so fall back to checking periodically.
+            timeout = STOP_CHECK_INTERVAL if watches else self._min_interval
+            readable, _, _ = select.select([fd], [], [], timeout)
+            if readable:
+                self._drain(fd)
+                self._stop.wait(SETTLE_DELAY)
+                self._drain(fd)
+            elif watches:
+                continue
+
+            # The model directory may have been swapped, so watch the
+            # directories again whenever the model changed.
+            if self._check() or not watches:
+                for wd in watches:
+                    libc.inotify_rm_watch(fd, wd)
+                watches = self._add_watches(libc, fd)
+
+    @staticmethod
+    def _drain(fd: int) -> None:
+        while True:
+            try:
+                if not os.read(fd, READ_SIZE):
+                    return
+            except BlockingIOError:
+                return
+
+    def _poll(self) -> None:
+        interval = self._min_interval
+        while not self._stop.wait(interval):
+            if self._check():
+                interval = self._min_interval
+            else:
+                interval = min(interval * 1.5, self._max_interval)
@@ -0,0 +1,47 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""Maps files to the workspace folder containing them."""
+
+from __future__ import annotations
+
+import functools
+import pathlib
+from typing import Any, Dict, Iterable, Optional
+
+# Cached lookups per resolver, files are looked up on every request.
+CACHE_SIZE = 4096
+
+# Trie key marking the end of a workspace folder, never a path segment.
+_FOLDER = None
+
+
+class WorkspaceResolver:
+    """Finds the innermost workspace folder containing a path.
+
+    Folders are kept in a trie of path segments, so a lookup walks the
+    segments of the path once. The folders never change, a new resolver is
+    built with the settings, so results are memoized per path.
+    """
+
+    def __init__(self, folders: Iterable[str] = (), cache_size: int = CACHE_SIZE):
+        self._root: Dict[Optional[str], Any] = {}
+        for folder in folders:
+            node = self._root
+            for part in pathlib.PurePath(folder).parts:
+                node = node.setdefault(part, {})
+            node[_FOLDER] = folder
+        self._resolve_cached = functools.lru_cache(maxsize=cache_size)(self._resolve)
+
+    def resolve(self, path: str) -> Optional[str]:
+        """Returns the folder, as given, containing the path, None if there is none."""
+        return self._resolve_cached(path)
+
+    def _resolve(self, path: str) -> Optional[str]:
+        node = self._root
+        found = None
+        for part in pathlib.PurePath(path).parts:
+            node = node.get(part)
+            if node is None:
+                break
+            found = node.get(_FOLDER, found)
+        return found
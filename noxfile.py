@@ -115,6 +115,13 @@ def tests(session: nox.Session) -> None:
     session.run("pytest", "src/test/python_tests")
 
 
+@nox.session()
+def benchmark(session: nox.Session) -> None:
+    """Measures completion, hover and resolve latency on synthetic models."""
+    session.install("-r", "src/test/python_tests/requirements.txt")
+    session.run("python", "-m", "src.test.python_tests.benchmarks", *session.posargs)
+
+
 @nox.session()
 def lint(session: nox.Session) -> None:
     """Runs linter and formatter checks on python files."""
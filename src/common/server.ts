@@ -5,6 +5,7 @@ import * as fsapi from 'fs-extra';
 import { Disposable, env, LogOutputChannel } from 'vscode';
 import { State } from 'vscode-languageclient';
 import {
+    DidChangeConfigurationNotification,
     LanguageClient,
     LanguageClientOptions,
     RevealOutputChannelOn,
@@ -45,6 +46,9 @@ async function createServer(
     // Set notification type
     newEnv.LS_SHOW_NOTIFICATION = settings.showNotifications;
 
+    // Record LSP traffic, read when the server starts
+    newEnv.LS_RECORD_TRAFFIC = settings.recordTraffic;
+
     const args =
         newEnv.USE_DEBUGPY === 'False' || !isDebugScript
             ? settings.interpreter.slice(1).concat([SERVER_SCRIPT_PATH])
@@ -124,3 +128,13 @@ export async function restartServer(
     await newLSClient.setTrace(level);
     return newLSClient;
 }
+
+export async function sendConfiguration(serverId: string, lsClient: LanguageClient): Promise<void> {
+    traceInfo(`Server: Sending changed settings`);
+    await lsClient.sendNotification(DidChangeConfigurationNotification.type, {
+        settings: {
+            settings: await getExtensionSettings(serverId, true),
+            globalSettings: await getGlobalSettings(serverId, false),
+        },
+    });
+}
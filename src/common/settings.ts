@@ -13,6 +13,10 @@ export interface ISettings {
     interpreter: string[];
     importStrategy: string;
     showNotifications: string;
+    modelExtractor: string;
+    completionRoots: string[];
+    indexMemoryLimit: number;
+    recordTraffic: string;
 }
 
 export function getExtensionSettings(namespace: string, includeInterpreter?: boolean): Promise<ISettings[]> {
@@ -69,6 +73,10 @@ export async function getWorkspaceSettings(
         interpreter: resolveVariables(interpreter, workspace),
         importStrategy: config.get<string>(`importStrategy`) ?? 'useBundled',
         showNotifications: config.get<string>(`showNotifications`) ?? 'off',
+        modelExtractor: config.get<string>(`modelExtractor`) ?? 'static',
+        completionRoots: config.get<string[]>(`completionRoots`) ?? ['self.pydantic_module'],
+        indexMemoryLimit: config.get<number>(`indexMemoryLimit`) ?? 512,
+        recordTraffic: config.get<string>(`recordTraffic`) ?? '',
     };
     return workspaceSetting;
 }
@@ -97,6 +105,10 @@ export async function getGlobalSettings(namespace: string, includeInterpreter?:
         interpreter: interpreter,
         importStrategy: getGlobalValue<string>(config, 'importStrategy', 'useBundled'),
         showNotifications: getGlobalValue<string>(config, 'showNotifications', 'off'),
+        modelExtractor: getGlobalValue<string>(config, 'modelExtractor', 'static'),
+        completionRoots: getGlobalValue<string[]>(config, 'completionRoots', ['self.pydantic_module']),
+        indexMemoryLimit: getGlobalValue<number>(config, 'indexMemoryLimit', 512),
+        recordTraffic: getGlobalValue<string>(config, 'recordTraffic', ''),
     };
     return setting;
 }
@@ -108,7 +120,26 @@ export function checkIfConfigurationChanged(e: ConfigurationChangeEvent, namespa
         `${namespace}.interpreter`,
         `${namespace}.importStrategy`,
         `${namespace}.showNotifications`,
+        `${namespace}.modelExtractor`,
+        `${namespace}.completionRoots`,
+        `${namespace}.indexMemoryLimit`,
+        `${namespace}.recordTraffic`,
     ];
     const changed = settings.map((s) => e.affectsConfiguration(s));
     return changed.includes(true);
 }
+
+export function checkIfServerConfigurationChanged(
+    e: ConfigurationChangeEvent,
+    namespace: string,
+    scope: ConfigurationScope,
+): boolean {
+    // Read when the server process starts, see `createServer`.
+    const settings = [
+        `${namespace}.path`,
+        `${namespace}.interpreter`,
+        `${namespace}.importStrategy`,
+        `${namespace}.recordTraffic`,
+    ];
+    return settings.some((s) => e.affectsConfiguration(s, scope));
+}
@@ -11,10 +11,14 @@ import {
     onDidChangePythonInterpreter,
     resolveInterpreter,
 } from './common/python';
-import { restartServer } from './common/server';
-import { checkIfConfigurationChanged, getInterpreterFromSetting } from './common/settings';
+import { restartServer, sendConfiguration } from './common/server';
+import {
+    checkIfConfigurationChanged,
+    checkIfServerConfigurationChanged,
+    getInterpreterFromSetting,
+} from './common/settings';
 import { loadServerDefaults } from './common/setup';
-import { getLSClientTraceLevel } from './common/utilities';
+import { getLSClientTraceLevel, getProjectRoot } from './common/utilities';
 import { createOutputChannel, onDidChangeConfiguration, registerCommand } from './common/vscodeapi';
 
 let lsClient: LanguageClient | undefined;
@@ -79,7 +83,13 @@ export async function activate(context: vscode.ExtensionContext): Promise<void>
         }),
         onDidChangeConfiguration(async (e: vscode.ConfigurationChangeEvent) => {
             if (checkIfConfigurationChanged(e, serverId)) {
-                await runServer();
+                const projectRoot = await getProjectRoot();
+                if (lsClient?.isRunning() && !checkIfServerConfigurationChanged(e, serverId, projectRoot.uri)) {
+                    // The server re-indexes only the models affected by the change.
+                    await sendConfiguration(serverId, lsClient);
+                } else {
+                    await runServer();
+                }
             }
         }),
         registerCommand(`${serverId}.restart`, async () => {
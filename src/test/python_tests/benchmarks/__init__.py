@@ -0,0 +1,8 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Latency benchmarks of the language server on synthetic pydantic models.
+
+Run with `python -m src.test.python_tests.benchmarks --help` from the
+repository root, or `nox -s benchmark -- --help`.
+"""
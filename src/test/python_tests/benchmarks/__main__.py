@@ -0,0 +1,11 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Runs the latency benchmarks, see `run.main`.
+"""
+
+import sys
+
+from .run import main
+
+sys.exit(main())
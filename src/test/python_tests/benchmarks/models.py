@@ -0,0 +1,124 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Synthetic pydantic model modules of configurable size and shape.
+"""
+
+import math
+import pathlib
+import random
+from typing import List, NamedTuple
+
+FIELDS_PER_CLASS = 50
+
+# Share of the fields that hold another model class.
+REFERENCE_SHARE = 0.2
+
+# Field of the deepest nested class, with a default, description and constraint.
+MARKER = "marker"
+
+
+class ModelSpec(NamedTuple):
+    """Shape of a generated model module.
+
+    `fields` are spread over classes of up to `fields_per_class` fields. The
+    first `depth` classes nest, each holding the next one in its `child`
+    field. Of the other fields holding a model class, a `forward_refs`
+    fraction refers to it by a quoted forward reference.
+    """
+
+    fields: int
+    depth: int = 5
+    forward_refs: float = 0.2
+    fields_per_class: int = FIELDS_PER_CLASS
+    seed: int = 0
+
+    @property
+    def key(self) -> str:
+        """Identifies the shape in reports and baselines."""
+        return (
+            f"fields={self.fields} depth={self.depth} "
+            f"forward_refs={self.forward_refs:g}"
+        )
+
+
+class SyntheticModel(NamedTuple):
+    """A generated model module and what to request in it."""
+
+    path: pathlib.Path
+    # `Model0` followed by the `child` fields down to the deepest class.
+    chain: List[str]
+    # A field of the deepest class, see `MARKER`.
+    field: str
+
+
+def _class_name(index: int) -> str:
+    return f"Model{index}"
+
+
+def write_model(directory: pathlib.Path, spec: ModelSpec) -> SyntheticModel:
+    """Writes the model module described by `spec` to `directory`.
+
+    Classes are written last to first, so that nested classes and other
+    plain references are defined before use and forward references point
+    further down the module. The same spec always produces the same module.
+    """
+    rng = random.Random(spec.seed)
+    class_count = max(
+        1,
+        min(
+            spec.fields, max(spec.depth, math.ceil(spec.fields / spec.fields_per_class))
+        ),
+    )
+    depth = max(1, min(spec.depth, class_count))
+    sizes = [spec.fields // class_count] * class_count
+    for index in range(spec.fields % class_count):
+        sizes[index] += 1
+
+    classes = []
+    number = 0
+    for index, size in enumerate(sizes):
+        lines = [f"class {_class_name(index)}(BaseModel):"]
+        if index < depth - 1:
+            lines.append(f"    child: Optional[{_class_name(index + 1)}] = None")
+            size -= 1
+        elif index == depth - 1:
+            lines.append(f'    {MARKER}: int = Field(1, description="Marker.", gt=0)')
+            size -= 1
+        for _ in range(size):
+            name = f"field_{number}"
+            number += 1
+            if rng.random() < REFERENCE_SHARE:
+                forward = rng.random() < spec.forward_refs
+                targets = range(index) if forward else range(index + 1, class_count)
+                if targets:
+                    target = _class_name(rng.choice(targets))
+                    if forward:
+                        target = f'"{target}"'
+                    lines.append(f"    {name}: Optional[List[{target}]] = None")
+                    continue
+            if number % 3 == 0:
+                lines.append(
+                    f'    {name}: int = Field({number}, description="Field {number}.", ge=0)'
+                )
+            elif number % 3 == 1:
+                lines.append(f"    {name}: str = {name!r}")
+            else:
+                lines.append(f"    {name}: Optional[float] = None")
+        classes.append("\n".join(lines))
+
+    path = directory / "models.py"
+    path.write_text(
+        "from typing import List, Optional\n\n"
+        "from pydantic import BaseModel, Field\n\n\n"
+        + "\n\n\n".join(reversed(classes))
+        + "\n\n\n"
+        # Lets the import extractor resolve the forward references.
+        "for _model in list(globals().values()):\n"
+        "    if isinstance(_model, type) and issubclass(_model, BaseModel):\n"
+        "        if _model is not BaseModel:\n"
+        "            getattr(_model, 'model_rebuild', _model.update_forward_refs)()\n"
+        "del _model\n",
+        encoding="utf-8",
+    )
+    return SyntheticModel(path, [_class_name(0)] + ["child"] * (depth - 1), MARKER)
@@ -0,0 +1,211 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Replays a recorded LSP session against the language server.
+
+The server records its traffic when `LS_RECORD_TRAFFIC` (the extension's
+`recordTraffic` setting) names a file. The client's messages are sent again
+in order, at the recorded pace or as fast as possible, to a server with an
+empty schema cache, and the latency of each request is compared with the
+recorded one. Run with
+`python -m src.test.python_tests.benchmarks.replay --help`.
+"""
+
+import argparse
+import collections
+import json
+import pathlib
+import sys
+import tempfile
+import time
+from concurrent import futures
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..lsp_test_client import session
+from . import run
+
+INBOUND = "in"
+OUTBOUND = "out"
+
+# Sent by the session itself when it ends.
+SESSION_END = ("shutdown", "exit")
+REQUEST_TIMEOUT = 60
+
+Record = Dict[str, Any]
+
+# Latencies in seconds by request method.
+Latencies = Dict[str, List[float]]
+
+
+def _replace(value: Any, replacements: Sequence[Tuple[str, str]]) -> Any:
+    if isinstance(value, str):
+        for old, new in replacements:
+            value = value.replace(old, new)
+        return value
+    if isinstance(value, list):
+        return [_replace(item, replacements) for item in value]
+    if isinstance(value, dict):
+        return {key: _replace(item, replacements) for key, item in value.items()}
+    return value
+
+
+def load_recording(
+    path: pathlib.Path, replacements: Sequence[Tuple[str, str]] = ()
+) -> List[Record]:
+    """Reads a recording, replacing (old, new) text in all strings of the
+    messages, e.g. paths of the machine it was recorded on."""
+    records = []
+    with open(path, encoding="utf-8") as recording:
+        for line in recording:
+            if line.strip():
+                record = json.loads(line)
+                record["message"] = _replace(record["message"], replacements)
+                records.append(record)
+    return records
+
+
+def recorded_latencies(records: Sequence[Record]) -> Latencies:
+    """Returns the latencies of the client's requests in the recording,
+    except for those ending the session."""
+    sent: Dict[Any, Tuple[str, float]] = {}
+    latencies: Latencies = collections.defaultdict(list)
+    for record in records:
+        message = record["message"]
+        if record["direction"] == INBOUND:
+            if "id" in message and message.get("method") not in (None,) + SESSION_END:
+                sent[message["id"]] = (message["method"], record["time"])
+        elif "method" not in message and message.get("id") in sent:
+            method, started = sent.pop(message["id"])
+            latencies[method].append(record["time"] - started)
+    return dict(latencies)
+
+
+def _response_time(records: Sequence[Record], msg_id: Any, default: float) -> float:
+    for record in records:
+        message = record["message"]
+        if (
+            record["direction"] == OUTBOUND
+            and "method" not in message
+            and message.get("id") == msg_id
+        ):
+            return record["time"]
+    return default
+
+
+def replay(records: Sequence[Record], speed: Optional[float] = 1.0) -> Latencies:
+    """Sends the client's messages of the recording to a new server and
+    returns the latencies of its requests.
+
+    `speed` scales the recorded pace, 2.0 replays twice as fast. With None
+    each message is sent right after the previous one. Responses of the
+    client to the server's requests are not replayed, the session answers
+    those itself. The replay is recorded as well, so that latencies on both
+    sides are measured by the server and leave out its start.
+    """
+    inbound = [
+        record
+        for record in records
+        if record["direction"] == INBOUND
+        and record["message"].get("method") not in (None,) + SESSION_END
+    ]
+    pending: Dict[Any, futures.Future] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        recording = pathlib.Path(directory) / "replay.jsonl"
+        with run.isolated_environment(recording), session.LspSession() as ls_session:
+            started, first = time.perf_counter(), 0.0
+            for record in inbound:
+                if speed is not None:
+                    delay = (record["time"] - first) / speed
+                    time.sleep(max(0.0, started + delay - time.perf_counter()))
+                message = record["message"]
+                method, params = message["method"], message.get("params")
+                if method == "$/cancelRequest":
+                    # Replayed requests get new ids.
+                    if params["id"] in pending:
+                        ls_session.cancel_request(pending[params["id"]])
+                elif "id" in message:
+                    pending[message["id"]] = ls_session.request(method, params)
+                    if method == "initialize":
+                        # Clients wait for the result before sending anything
+                        # else, the pace is kept from there on.
+                        futures.wait([pending[message["id"]]], REQUEST_TIMEOUT)
+                        started = time.perf_counter()
+                        first = _response_time(records, message["id"], record["time"])
+                else:
+                    ls_session.notify(method, params)
+            futures.wait(list(pending.values()), REQUEST_TIMEOUT)
+        return recorded_latencies(load_recording(recording))
+
+
+def compare(recorded: Latencies, replayed: Latencies) -> Dict[str, Any]:
+    """Returns the recorded and replayed latency percentiles by method."""
+    return {
+        method: {
+            phase: run.summarize(latencies[method])
+            for phase, latencies in (("recorded", recorded), ("replayed", replayed))
+            if latencies.get(method)
+        }
+        for method in sorted(set(recorded) | set(replayed))
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Replays a recording, returns 1 if it regressed against the baseline."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.test.python_tests.benchmarks.replay",
+        description="Replays a recorded LSP session and compares latencies.",
+    )
+    parser.add_argument("recording", type=pathlib.Path)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="replay pace, 2 for twice as fast"
+    )
+    parser.add_argument(
+        "--max-speed",
+        action="store_true",
+        help="send each message right after the previous one",
+    )
+    parser.add_argument(
+        "--replace",
+        action="append",
+        default=[],
+        metavar="OLD=NEW",
+        help="replace text in the messages, e.g. paths of the recording machine",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=pathlib.Path,
+        help="results to compare with, by default RECORDING.baseline.json",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="p50 slowdown to report as a regression, 0.2 for 20%%",
+    )
+    args = parser.parse_args(argv)
+
+    replacements = []
+    for replacement in args.replace:
+        old, separator, new = replacement.partition("=")
+        if not separator:
+            parser.error(f"--replace expects OLD=NEW, got {replacement}")
+        replacements.append((old, new))
+    speed = None if args.max_speed else args.speed
+    baseline_path = args.baseline or args.recording.with_name(
+        f"{args.recording.name}.baseline.json"
+    )
+
+    records = load_recording(args.recording, replacements)
+    key = f"{args.recording.name} speed={'max' if speed is None else f'{speed:g}'}"
+    print(f"Replaying {key} ...", file=sys.stderr, flush=True)
+    results = {key: compare(recorded_latencies(records), replay(records, speed))}
+    return run.report(results, baseline_path, args.save_baseline, args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Measures completion, hover and resolve latency of the language server.
+
+Each operation is measured cold, as the first request of a server started
+with an empty schema cache and without indexing models in the background,
+and warm, once the model is indexed. Results are compared with a stored
+baseline, see `main`.
+"""
+
+import argparse
+import contextlib
+import copy
+import json
+import math
+import os
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..lsp_test_client import defaults, session, utils
+from . import models
+
+OPERATIONS = ("completion", "hover", "resolve")
+PERCENTILES = (50, 95, 99)
+DEFAULT_FIELDS = (10, 1000, 10000, 50000)
+BASELINE_PATH = pathlib.Path(__file__).parent / "baseline.json"
+
+# Latency in milliseconds per percentile ("p50"), phase ("cold" or "warm"),
+# operation and model shape (`ModelSpec.key`). Replays use the phases
+# "recorded" and "replayed", request methods and recordings instead.
+Results = Dict[str, Dict[str, Dict[str, Dict[str, float]]]]
+
+
+def percentile(samples: Sequence[float], percent: float) -> float:
+    """Returns the nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Returns the percentiles of latencies given in seconds, in milliseconds."""
+    return {
+        f"p{percent}": round(percentile(samples, percent) * 1000, 3)
+        for percent in PERCENTILES
+    }
+
+
+def _initialize_params(model_path: pathlib.Path, extractor: str) -> Dict[str, Any]:
+    settings = {"args": [str(model_path)], "modelExtractor": extractor}
+    params = copy.deepcopy(defaults.VSCODE_DEFAULT_INITIALIZE)
+    options = params["initializationOptions"]
+    options["globalSettings"] = dict(settings)
+    for setting in options["settings"]:
+        setting.update(settings)
+    return params
+
+
+def _set_environment(values: Dict[str, Optional[str]]) -> None:
+    for name, value in values.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+@contextlib.contextmanager
+def isolated_environment(
+    recording: Optional[pathlib.Path] = None, warm_up: bool = True
+) -> Iterator[None]:
+    """Gives servers started meanwhile their own, empty schema cache. Their
+    traffic is recorded to `recording` if given. Without `warm_up` they do
+    not index models once initialized."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        values = {
+            "LS_SCHEMA_CACHE_DIR": cache_dir,
+            "LS_RECORD_TRAFFIC": str(recording) if recording else None,
+            "LS_SKIP_WARM_UP": None if warm_up else "1",
+        }
+        previous = {name: os.environ.get(name) for name in values}
+        _set_environment(values)
+        try:
+            yield
+        finally:
+            _set_environment(previous)
+
+
+@contextlib.contextmanager
+def _server(
+    model: models.SyntheticModel, extractor: str, warm_up: bool = True
+) -> Iterator[session.LspSession]:
+    """Starts an initialized server with its own, empty schema cache."""
+    with isolated_environment(warm_up=warm_up), session.LspSession() as ls_session:
+        ls_session.initialize(_initialize_params(model.path, extractor))
+        yield ls_session
+
+
+class _Client:
+    """Makes timed requests in a document next to the model.
+
+    The document is edited before each request, the edit is not timed.
+    """
+
+    def __init__(self, ls_session: session.LspSession, model: models.SyntheticModel):
+        self._session = ls_session
+        self._model = model
+        self._uri = utils.as_uri(str(model.path.parent / "plugin.py"))
+        self._version = 0
+
+    def _edit(self, text: str) -> Dict[str, Any]:
+        self._version += 1
+        if self._version == 1:
+            self._session.notify_did_open(
+                {
+                    "textDocument": {
+                        "uri": self._uri,
+                        "languageId": "python",
+                        "version": self._version,
+                        "text": text,
+                    }
+                }
+            )
+        else:
+            self._session.notify_did_change(
+                {
+                    "textDocument": {"uri": self._uri, "version": self._version},
+                    "contentChanges": [{"text": text}],
+                }
+            )
+        return {
+            "textDocument": {"uri": self._uri},
+            "position": {"line": 0, "character": len(text)},
+        }
+
+    def completion(self) -> Tuple[float, Dict[str, Any]]:
+        """Completes the fields of the deepest nested class."""
+        params = self._edit(f"self.pydantic_module.{'.'.join(self._model.chain)}.")
+        started = time.perf_counter()
+        result = self._session.text_document_completion(params)
+        elapsed = time.perf_counter() - started
+        items = [item for item in result["items"] if item["label"] == self._model.field]
+        if not items:
+            raise RuntimeError(f"{self._model.field} was not completed: {result}")
+        return elapsed, items[0]
+
+    def hover(self) -> float:
+        """Hovers the marker field of the deepest nested class."""
+        params = self._edit(
+            f"self.pydantic_module.{'.'.join(self._model.chain)}.{self._model.field}"
+        )
+        params["position"]["character"] -= 1
+        started = time.perf_counter()
+        result = self._session.text_document_hover(params)
+        elapsed = time.perf_counter() - started
+        if result is None:
+            raise RuntimeError(f"{self._model.field} has no hover")
+        return elapsed
+
+    def resolve(self, item: Dict[str, Any]) -> float:
+        """Resolves a completion item of the marker field."""
+        started = time.perf_counter()
+        result = self._session.completion_item_resolve(item)
+        elapsed = time.perf_counter() - started
+        if "detail" not in result:
+            raise RuntimeError(f"{self._model.field} was not resolved: {result}")
+        return elapsed
+
+
+def measure(
+    spec: models.ModelSpec,
+    samples: int = 50,
+    cold_samples: int = 5,
+    extractor: str = "static",
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Measures each operation on a model of the given shape.
+
+    Warm latencies are `samples` requests in one server. Each of the
+    `cold_samples` cold latencies is the first request of a new server that
+    does not index the model in the background, so the request does.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        model = models.write_model(pathlib.Path(directory), spec)
+        warm: Dict[str, List[float]] = {operation: [] for operation in OPERATIONS}
+        with _server(model, extractor) as ls_session:
+            client = _Client(ls_session, model)
+            # Builds the index and gives an item to resolve.
+            _, item = client.completion()
+            client.hover()
+            client.resolve(item)
+            for _ in range(samples):
+                elapsed, item = client.completion()
+                warm["completion"].append(elapsed)
+                warm["hover"].append(client.hover())
+                warm["resolve"].append(client.resolve(item))
+
+        cold: Dict[str, List[float]] = {operation: [] for operation in OPERATIONS}
+        for _ in range(cold_samples):
+            for operation in OPERATIONS:
+                with _server(model, extractor, warm_up=False) as ls_session:
+                    client = _Client(ls_session, model)
+                    if operation == "completion":
+                        cold[operation].append(client.completion()[0])
+                    elif operation == "hover":
+                        cold[operation].append(client.hover())
+                    else:
+                        cold[operation].append(client.resolve(item))
+
+    return {
+        operation: {
+            "cold": summarize(cold[operation]),
+            "warm": summarize(warm[operation]),
+        }
+        for operation in OPERATIONS
+    }
+
+
+def regressions(
+    results: Results, baseline: Results, tolerance: float
+) -> List[Tuple[str, str, str, float, float]]:
+    """Returns (shape, operation, phase, baseline, current) p50 latencies that
+    are more than `tolerance` (0.2 for 20%) slower than the baseline."""
+    found = []
+    for shape, operations in results.items():
+        for operation, phases in operations.items():
+            for phase, latencies in phases.items():
+                previous = baseline.get(shape, {}).get(operation, {}).get(phase)
+                if previous and latencies["p50"] > previous["p50"] * (1 + tolerance):
+                    found.append(
+                        (shape, operation, phase, previous["p50"], latencies["p50"])
+                    )
+    return found
+
+
+def format_report(results: Results, baseline: Optional[Results] = None) -> str:
+    """Formats the results as a table, with the change of p50 from the baseline."""
+    lines = []
+    for shape, operations in results.items():
+        lines.append(shape)
+        lines.append(
+            f"  {'operation':<24}{'phase':<10}"
+            + "".join(f"{f'p{percent} ms':>11}" for percent in PERCENTILES)
+            + f"{'p50 vs baseline':>18}"
+        )
+        for operation, phases in operations.items():
+            for phase, latencies in phases.items():
+                previous = (baseline or {}).get(shape, {}).get(operation, {}).get(phase)
+                change = ""
+                if previous and previous["p50"]:
+                    change = f"{(latencies['p50'] / previous['p50'] - 1) * 100:+.1f}%"
+                lines.append(
+                    f"  {operation:<24}{phase:<10}"
+                    + "".join(
+                        f"{latencies[f'p{percent}']:>11.2f}" for percent in PERCENTILES
+                    )
+                    + f"{change:>18}"
+                )
+    return "\n".join(lines)
+
+
+def _load_baseline(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def report(
+    results: Results, baseline_path: pathlib.Path, save: bool, tolerance: float
+) -> int:
+    """Prints the results and compares them with the baseline, or stores them
+    in it. Returns 1 if they regressed."""
+    stored = _load_baseline(baseline_path)
+    baseline: Results = (stored or {}).get("results", {})
+    print(format_report(results, baseline))
+
+    if save:
+        baseline_path.write_text(
+            json.dumps(
+                {"machine": platform.platform(), "results": {**baseline, **results}},
+                indent=4,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        return 0
+    if stored is None:
+        print(f"No baseline at {baseline_path}, store one with --save-baseline.")
+        return 0
+    if stored.get("machine") != platform.platform():
+        print(f"The baseline was measured on {stored.get('machine')}.")
+    found = regressions(results, baseline, tolerance)
+    for shape, operation, phase, previous, current in found:
+        print(
+            f"Regression: {shape} {operation} {phase} p50 {previous:.2f} ms -> {current:.2f} ms"
+        )
+    return 1 if found else 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Runs the benchmark, returns 1 if it regressed against the baseline."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.test.python_tests.benchmarks",
+        description="Completion, hover and resolve latency on synthetic models.",
+    )
+    parser.add_argument(
+        "--fields",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_FIELDS),
+        help="model sizes to measure, in fields",
+    )
+    parser.add_argument("--depth", type=int, default=5, help="nested model classes")
+    parser.add_argument(
+        "--forward-refs",
+        type=float,
+        default=0.2,
+        help="share of model references written as forward references",
+    )
+    parser.add_argument(
+        "--samples", type=int, default=50, help="warm requests per operation"
+    )
+    parser.add_argument(
+        "--cold-samples", type=int, default=5, help="server starts per operation"
+    )
+    parser.add_argument("--extractor", choices=("static", "import"), default="static")
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="p50 slowdown to report as a regression, 0.2 for 20%%",
+    )
+    args = parser.parse_args(argv)
+
+    results: Results = {}
+    for fields in args.fields:
+        spec = models.ModelSpec(fields, args.depth, args.forward_refs)
+        key = f"{spec.key} extractor={args.extractor}"
+        print(f"Measuring {key} ...", file=sys.stderr, flush=True)
+        results[key] = measure(spec, args.samples, args.cold_samples, args.extractor)
+    return report(results, args.baseline, args.save_baseline, args.tolerance)
@@ -0,0 +1,15 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Fixtures shared by the tests.
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def schema_cache_dir(tmp_path, monkeypatch):
+    """Keeps schemas stored by the server out of the user's cache directory."""
+    cache_dir = tmp_path / "schema_cache"
+    monkeypatch.setenv("LS_SCHEMA_CACHE_DIR", str(cache_dir))
+    return cache_dir
@@ -0,0 +1,139 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Requests on the sample plugin, answered from pydantic models.
+"""
+
+import copy
+import pathlib
+import time
+
+from . import defaults, utils
+from .constants import TEST_DATA
+
+MODEL_PATH = TEST_DATA / "model1" / "model.py"
+PLUGIN_PATH = TEST_DATA / "sample1" / "plugin.py"
+PLUGIN_URI = utils.as_uri(str(PLUGIN_PATH))
+
+
+def initialize_params(model_path, model_extractor="static", **settings):
+    model_paths = model_path if isinstance(model_path, list) else [model_path]
+    settings.update(
+        args=[str(path) for path in model_paths], modelExtractor=model_extractor
+    )
+    params = copy.deepcopy(defaults.VSCODE_DEFAULT_INITIALIZE)
+    options = params["initializationOptions"]
+    options["globalSettings"] = dict(settings)
+    for setting in options["settings"]:
+        setting.update(settings)
+    return params
+
+
+def complete_list(ls_session, text, version=1, character=None):
+    lines = text.splitlines()
+    if character is None:
+        character = len(lines[-1])
+    if version == 1:
+        ls_session.notify_did_open(
+            {
+                "textDocument": {
+                    "uri": PLUGIN_URI,
+                    "languageId": "python",
+                    "version": version,
+                    "text": text,
+                }
+            }
+        )
+    else:
+        ls_session.notify_did_change(
+            {
+                "textDocument": {"uri": PLUGIN_URI, "version": version},
+                "contentChanges": [{"text": text}],
+            }
+        )
+    return ls_session.text_document_completion(
+        {
+            "textDocument": {"uri": PLUGIN_URI},
+            "position": {"line": len(lines) - 1, "character": character},
+        }
+    )
+
+
+def complete(ls_session, text, version=1):
+    result = complete_list(ls_session, text, version)
+    return [item["label"] for item in result["items"]]
+
+
+def counting_model(tmp_path):
+    """Writes a model that records each import in `imports.txt`."""
+    imports = tmp_path / "imports.txt"
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        "import time\n\nfrom pydantic import BaseModel\n\n"
+        f"with open({str(imports)!r}, 'a') as imports:\n"
+        "    imports.write('imported\\n')\n"
+        "time.sleep(1)\n\n\n"
+        "class Part(BaseModel):\n    name: str\n",
+        encoding="utf-8",
+    )
+    return model_path, imports
+
+
+def workspaces_params(models, model_extractor="static", **global_settings):
+    """Initialize params with a workspace folder per (folder, model) pair."""
+    params = initialize_params([], model_extractor, **global_settings)
+    template = params["initializationOptions"]["settings"][0]
+    params["workspaceFolders"] = []
+    params["initializationOptions"]["settings"] = []
+    for folder, model_path in models:
+        uri = utils.as_uri(str(folder))
+        params["workspaceFolders"].append({"uri": uri, "name": folder.name})
+        params["initializationOptions"]["settings"].append(
+            {**template, "workspace": uri, "args": [str(model_path)]}
+        )
+    return params
+
+
+def complete_in(ls_session, document_path, text):
+    uri = utils.as_uri(str(document_path))
+    ls_session.notify_did_open(
+        {
+            "textDocument": {
+                "uri": uri,
+                "languageId": "python",
+                "version": 1,
+                "text": text,
+            }
+        }
+    )
+    result = ls_session.text_document_completion(
+        {
+            "textDocument": {"uri": uri},
+            "position": {"line": 0, "character": len(text)},
+        }
+    )
+    return result["items"]
+
+
+def blocking_module(module_path: pathlib.Path, source):
+    """Writes a module that, when imported, creates `started` next to it and
+    waits for `release` to be created before running `source`."""
+    started = module_path.with_name("started")
+    release = module_path.with_name("release")
+    module_path.write_text(
+        "import os\nimport pathlib\nimport time\n\n"
+        f"pathlib.Path({str(started)!r}).touch()\n"
+        f"while not os.path.exists({str(release)!r}):\n"
+        "    time.sleep(0.05)\n\n" + source,
+        encoding="utf-8",
+    )
+    return started, release
+
+
+def wait_for(path: pathlib.Path, timeout=30):
+    """Waits until `path` exists."""
+    deadline = time.monotonic() + timeout
+    while not path.exists():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{path} was not created")
+        time.sleep(0.05)
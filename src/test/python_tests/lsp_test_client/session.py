@@ -23,6 +23,8 @@ LSP_EXIT_TIMEOUT = 5000
 PUBLISH_DIAGNOSTICS = "textDocument/publishDiagnostics"
 WINDOW_LOG_MESSAGE = "window/logMessage"
 WINDOW_SHOW_MESSAGE = "window/showMessage"
+WINDOW_WORK_DONE_PROGRESS_CREATE = "window/workDoneProgress/create"
+PROGRESS = "$/progress"
 
 
 # pylint: disable=too-many-instance-attributes
@@ -65,6 +67,8 @@ class LspSession(MethodDispatcher):
             PUBLISH_DIAGNOSTICS: self._publish_diagnostics,
             WINDOW_SHOW_MESSAGE: self._window_show_message,
             WINDOW_LOG_MESSAGE: self._window_log_message,
+            WINDOW_WORK_DONE_PROGRESS_CREATE: self._work_done_progress_create,
+            PROGRESS: self._progress,
         }
         self._endpoint = Endpoint(dispatcher, self._writer.write)
         self._thread_pool.submit(self._reader.listen, self._endpoint.consume)
@@ -129,6 +133,12 @@ class LspSession(MethodDispatcher):
         """Sends did change notification to LSP Server."""
         self._send_notification("textDocument/didChange", params=did_change_params)
 
+    def notify_did_change_configuration(self, did_change_configuration_params):
+        """Sends workspace/didChangeConfiguration notification to LSP Server."""
+        self._send_notification(
+            "workspace/didChangeConfiguration", params=did_change_configuration_params
+        )
+
     def notify_did_save(self, did_save_params):
         """Sends did save notification to LSP Server."""
         self._send_notification("textDocument/didSave", params=did_save_params)
@@ -141,6 +151,46 @@ class LspSession(MethodDispatcher):
         """Sends did close notification to LSP Server."""
         self._send_notification("textDocument/didClose", params=did_close_params)
 
+    def text_document_completion(self, completion_params):
+        """Sends text document completion request to LSP server."""
+        fut = self._send_request("textDocument/completion", params=completion_params)
+        return fut.result()
+
+    def send_text_document_completion(self, completion_params):
+        """Sends text document completion request to LSP server without waiting."""
+        return self._send_request("textDocument/completion", params=completion_params)
+
+    def cancel_request(self, fut):
+        """Sends $/cancelRequest for a request sent without waiting.
+
+        The future is completed by the server's response. Cancelling it on the
+        client side would make the reader fail on that response.
+        """
+        # pylint: disable=protected-access
+        for msg_id, pending in list(self._endpoint._server_request_futures.items()):
+            if pending is fut:
+                self._send_notification("$/cancelRequest", params={"id": msg_id})
+
+    def completion_item_resolve(self, completion_item):
+        """Sends completion item resolve request to LSP server."""
+        fut = self._send_request("completionItem/resolve", params=completion_item)
+        return fut.result()
+
+    def text_document_hover(self, hover_params):
+        """Sends text document hover request to LSP server."""
+        fut = self._send_request("textDocument/hover", params=hover_params)
+        return fut.result()
+
+    def text_document_definition(self, definition_params):
+        """Sends text document definition request to LSP server."""
+        fut = self._send_request("textDocument/definition", params=definition_params)
+        return fut.result()
+
+    def workspace_symbol(self, workspace_symbol_params):
+        """Sends workspace symbol request to LSP server."""
+        fut = self._send_request("workspace/symbol", params=workspace_symbol_params)
+        return fut.result()
+
     def text_document_formatting(self, formatting_params):
         """Sends text document references request to LSP server."""
         fut = self._send_request("textDocument/formatting", params=formatting_params)
@@ -158,6 +208,14 @@ class LspSession(MethodDispatcher):
         )
         return fut.result()
 
+    def request(self, name, params=None):
+        """Sends {name} request to LSP server without waiting."""
+        return self._send_request(name, params=params)
+
+    def notify(self, name, params=None):
+        """Sends {name} notification to LSP server."""
+        self._send_notification(name, params=params)
+
     def set_notification_callback(self, notification_name, callback):
         """Set custom LS notification handler."""
         self._notification_callbacks[notification_name] = callback
@@ -190,6 +248,16 @@ class LspSession(MethodDispatcher):
             WINDOW_SHOW_MESSAGE, window_show_message_params
         )
 
+    def _work_done_progress_create(self, work_done_progress_create_params):
+        """Internal handler for work done progress create request."""
+        self._handle_notification(
+            WINDOW_WORK_DONE_PROGRESS_CREATE, work_done_progress_create_params
+        )
+
+    def _progress(self, progress_params):
+        """Internal handler for progress notification."""
+        return self._handle_notification(PROGRESS, progress_params)
+
     def _handle_notification(self, notification_name, params):
         """Internal handler for notifications."""
         fut = Future()
@@ -3,10 +3,12 @@
 """
 Utility functions for use with tests.
 """
+import importlib
 import json
 import os
 import pathlib
 import platform
+import sys
 from random import choice
 
 from .constants import PROJECT_ROOT
@@ -24,6 +26,14 @@ def as_uri(path: str) -> str:
     return normalizecase(pathlib.Path(path).as_uri())
 
 
+def import_tool_module(name: str):
+    """Imports a module of the language server, for testing it directly."""
+    for path in (PROJECT_ROOT / "bundled" / "libs", PROJECT_ROOT / "bundled" / "tool"):
+        if os.fspath(path) not in sys.path:
+            sys.path.insert(0, os.fspath(path))
+    return importlib.import_module(name)
+
+
 class PythonFile:
     """Create python file on demand for testing."""
 
@@ -0,0 +1,72 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for the latency benchmarks, on a small model to keep them working.
+"""
+
+import json
+
+from hamcrest import assert_that, contains_exactly, is_
+
+from .benchmarks import models, replay, run
+from .lsp_test_client import session
+
+
+def test_benchmark_measures_every_operation():
+    """Test that cold and warm latencies are measured for each operation."""
+    results = run.measure(models.ModelSpec(30, depth=3), samples=3, cold_samples=1)
+
+    assert_that(sorted(results), is_(sorted(run.OPERATIONS)))
+    for phases in results.values():
+        assert_that(sorted(phases), is_(["cold", "warm"]))
+        for latencies in phases.values():
+            assert 0 < latencies["p50"] <= latencies["p95"] <= latencies["p99"]
+
+
+def test_benchmark_reports_regressions():
+    """Test that p50 latencies slower than the baseline are reported."""
+    baseline = {"shape": {"completion": {"warm": {"p50": 1.0, "p95": 2.0}}}}
+    results = {
+        "shape": {
+            "completion": {
+                "warm": {"p50": 1.5, "p95": 2.0},
+                "cold": {"p50": 9.0, "p95": 9.0},
+            }
+        }
+    }
+
+    assert_that(
+        run.regressions(results, baseline, 0.2),
+        contains_exactly(("shape", "completion", "warm", 1.0, 1.5)),
+    )
+    assert_that(run.regressions(results, baseline, 0.6), is_([]))
+
+
+def test_recorded_session_is_replayed(tmp_path):
+    """Test that a recording is replayed and its latencies compared."""
+    # pylint: disable=protected-access
+    recorded_dir = tmp_path / "recorded"
+    recorded_dir.mkdir()
+    model = models.write_model(recorded_dir, models.ModelSpec(30, depth=3))
+    recording = tmp_path / "recording.jsonl"
+    with run.isolated_environment(recording), session.LspSession() as ls_session:
+        ls_session.initialize(run._initialize_params(model.path, "static"))
+        client = run._Client(ls_session, model)
+        for _ in range(3):
+            client.completion()
+        client.hover()
+    # The model moved, as on another machine.
+    replayed_dir = recorded_dir.rename(tmp_path / "replayed")
+
+    records = replay.load_recording(recording, [(str(recorded_dir), str(replayed_dir))])
+    recorded = replay.recorded_latencies(records)
+    results = replay.compare(recorded, replay.replay(records, speed=None))
+
+    assert str(recorded_dir) not in json.dumps(records)
+    assert_that(len(recorded["textDocument/completion"]), is_(3))
+    assert_that(
+        sorted(results),
+        is_(["initialize", "textDocument/completion", "textDocument/hover"]),
+    )
+    for method in ("initialize", "textDocument/completion", "textDocument/hover"):
+        assert_that(sorted(results[method]), is_(["recorded", "replayed"]))
@@ -0,0 +1,621 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for pydantic model completions over LSP.
+"""
+
+import json
+import queue
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from hamcrest import assert_that, contains_inanyorder, is_
+
+from .lsp_test_client import helpers, session
+
+
+def test_class_completion():
+    """Test completing class names of the model module."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        actual = helpers.complete(ls_session, "self.pydantic_module.")
+
+    for class_name in ["Address", "Customer", "Order", "OrderLine"]:
+        assert class_name in actual
+
+
+def test_field_completion():
+    """Test completing field names of a model class."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        actual = helpers.complete(ls_session, "self.pydantic_module.Order.")
+
+    assert_that(actual, contains_inanyorder("order_id", "customer", "lines"))
+
+
+@pytest.mark.parametrize("model_extractor", ["static", "import"])
+@pytest.mark.parametrize(
+    "chain, expected",
+    [
+        ("Order.customer.", ["name", "address", "tags", "previous_orders"]),
+        ("Order.customer.address.location.", ["latitude", "longitude"]),
+        ("Order.lines.", ["sku", "quantity"]),
+        ("Customer.previous_orders.customer.name.", []),
+        ("Order.customer.email.", []),
+        ("Invoice.total.", []),
+    ],
+)
+def test_attribute_chain_completion(model_extractor, chain, expected):
+    """Test completing nested model fields through Optional, List, Dict and forward references."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(
+            helpers.initialize_params(helpers.MODEL_PATH, model_extractor)
+        )
+        actual = helpers.complete(ls_session, "self.pydantic_module." + chain)
+
+    assert_that(actual, contains_inanyorder(*expected))
+
+
+def test_completion_filters_by_typed_prefix():
+    """Test that only names starting with the typed fragment are returned."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        result = helpers.complete_list(ls_session, "self.pydantic_module.ord")
+
+    assert_that(
+        [item["label"] for item in result["items"]],
+        contains_inanyorder("Order", "OrderLine"),
+    )
+    assert_that(result["isIncomplete"], is_(True))
+
+
+def test_completion_list_is_capped(tmp_path):
+    """Test that very large models return a capped, incomplete list."""
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        "from pydantic import BaseModel\n"
+        + "".join(
+            f"\n\nclass Model{index}(BaseModel):\n    value: int\n"
+            for index in range(1000)
+        ),
+        encoding="utf-8",
+    )
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        everything = helpers.complete_list(ls_session, "self.pydantic_module.")
+        narrowed = helpers.complete_list(ls_session, "self.pydantic_module.Model99", 2)
+
+    assert_that(len(everything["items"]) < 1000, is_(True))
+    assert_that(everything["isIncomplete"], is_(True))
+    assert_that(
+        [item["label"] for item in narrowed["items"]],
+        contains_inanyorder("Model99", *[f"Model99{index}" for index in range(10)]),
+    )
+
+
+def _write_model_package(root):
+    package = root / "voyager_models"
+    package.mkdir()
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    (package / "base.py").write_text(
+        "from pydantic import BaseModel\n\n\n"
+        "class Tracked(BaseModel):\n    revision: int = 0\n",
+        encoding="utf-8",
+    )
+    (package / "parties.py").write_text(
+        "from pydantic import BaseModel\n\n\n"
+        "class Customer(BaseModel):\n    name: str\n",
+        encoding="utf-8",
+    )
+    (package / "orders.py").write_text(
+        "from typing import Optional\n\n"
+        "from .base import Tracked\nfrom .parties import Customer\n\n\n"
+        "class Order(Tracked):\n    customer: Optional[Customer] = None\n",
+        encoding="utf-8",
+    )
+    (package / "broken.py").write_text(
+        'raise RuntimeError("broken was imported")\n\n\n'
+        "class Broken:\n    value: int\n",
+        encoding="utf-8",
+    )
+    return package
+
+
+@pytest.mark.parametrize("model_extractor", ["static", "import"])
+def test_model_package(tmp_path, model_extractor):
+    """Test completions over a model package indexed one module at a time."""
+    package = _write_model_package(tmp_path)
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(package, model_extractor))
+        classes = helpers.complete(ls_session, "self.pydantic_module.")
+        fields = helpers.complete(ls_session, "self.pydantic_module.Order.", 2)
+        nested = helpers.complete(ls_session, "self.pydantic_module.Order.customer.", 3)
+
+    assert_that(classes, contains_inanyorder("Tracked", "Customer", "Order", "Broken"))
+    assert_that(fields, contains_inanyorder("revision", "customer"))
+    assert_that(nested, contains_inanyorder("name"))
+
+
+def test_multiple_model_sources(tmp_path):
+    """Test merging classes from several configured model files."""
+    package = _write_model_package(tmp_path)
+    model_paths = [helpers.MODEL_PATH, package / "orders.py", package / "base.py"]
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_paths))
+        classes = helpers.complete(ls_session, "self.pydantic_module.Tra")
+        fields = helpers.complete(ls_session, "self.pydantic_module.Order.", 2)
+
+    assert_that(classes, contains_inanyorder("Tracked"))
+    assert_that(fields, contains_inanyorder("order_id", "customer", "lines"))
+
+
+def test_model_edits_are_picked_up(tmp_path):
+    """Test that an edited model file is introspected again."""
+    model_path = tmp_path / "model.py"
+    shutil.copyfile(helpers.MODEL_PATH, model_path)
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        before = helpers.complete(ls_session, "self.pydantic_module.Address.")
+
+        model_path.write_text(
+            model_path.read_text().replace("city: str", "town: str"),
+            encoding="utf-8",
+        )
+        after = helpers.complete(ls_session, "self.pydantic_module.Address.", version=2)
+
+    assert_that(before, contains_inanyorder("street", "city", "location"))
+    assert_that(after, contains_inanyorder("street", "town", "location"))
+
+
+def test_static_extractor_does_not_import_model(tmp_path):
+    """Test that the static extractor never executes the model module."""
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        helpers.MODEL_PATH.read_text() + '\nraise RuntimeError("model was imported")\n',
+        encoding="utf-8",
+    )
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        actual = helpers.complete(ls_session, "self.pydantic_module.OrderLine.")
+
+    assert_that(actual, contains_inanyorder("sku", "quantity"))
+
+
+def test_static_extractor_falls_back_to_import(tmp_path):
+    """Test that models with bases from other modules are imported instead."""
+    (tmp_path / "base.py").write_text(
+        "from pydantic import BaseModel\n\n\n"
+        "class Tracked(BaseModel):\n    revision: int = 0\n",
+        encoding="utf-8",
+    )
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        "from base import Tracked\n\n\nclass Part(Tracked):\n    name: str\n",
+        encoding="utf-8",
+    )
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        actual = helpers.complete(ls_session, "self.pydantic_module.Part.")
+
+    assert_that(actual, contains_inanyorder("revision", "name"))
+
+
+def test_model_is_imported_out_of_process(tmp_path):
+    """Test that importing the model happens in the runner, not in the server."""
+    marker = tmp_path / "imported_by.txt"
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        "import pathlib\nimport sys\n\n"
+        "from pydantic import BaseModel\n\n"
+        f"pathlib.Path({str(marker)!r}).write_text(sys.argv[0])\n"
+        'print("model output must not break the worker")\n\n\n'
+        "class Part(BaseModel):\n    name: str\n",
+        encoding="utf-8",
+    )
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        actual = helpers.complete(ls_session, "self.pydantic_module.Part.")
+
+    assert_that(actual, contains_inanyorder("name"))
+    assert_that(marker.read_text().endswith("lsp_runner.py"), is_(True))
+
+
+def test_import_extractor():
+    """Test field completion when the model is always imported."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH, "import"))
+        actual = helpers.complete(ls_session, "self.pydantic_module.Order.")
+
+    assert_that(actual, contains_inanyorder("order_id", "customer", "lines"))
+
+
+def test_model_directory_swap(tmp_path):
+    """Test switching model versions by re-pointing the model directory symlink."""
+    for version, field in [("v1", "street"), ("v2", "road")]:
+        (tmp_path / version).mkdir()
+        (tmp_path / version / "model.py").write_text(
+            f"from pydantic import BaseModel\n\n\nclass Address(BaseModel):\n    {field}: str\n",
+            encoding="utf-8",
+        )
+    current = tmp_path / "current_model"
+    current.symlink_to(tmp_path / "v1", target_is_directory=True)
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(current / "model.py"))
+        before = helpers.complete(ls_session, "self.pydantic_module.Address.")
+
+        current.unlink()
+        current.symlink_to(tmp_path / "v2", target_is_directory=True)
+        after = helpers.complete(ls_session, "self.pydantic_module.Address.", version=2)
+
+    assert_that(before, contains_inanyorder("street"))
+    assert_that(after, contains_inanyorder("road"))
+
+
+def _stored_entries(cache_dir):
+    return [path for path in cache_dir.glob("*.json") if "versions" not in path.name]
+
+
+def test_stored_schema_survives_corruption(tmp_path, schema_cache_dir):
+    """Test that a corrupt stored schema is discarded and extracted again."""
+    model_path = tmp_path / "model.py"
+    shutil.copyfile(helpers.MODEL_PATH, model_path)
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        before = helpers.complete(ls_session, "self.pydantic_module.Order.")
+
+    entries = _stored_entries(schema_cache_dir)
+    assert_that(len(entries), is_(1))
+    entries[0].write_text('{"format": 1, "schema": {"path"', encoding="utf-8")
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        after = helpers.complete(ls_session, "self.pydantic_module.Order.")
+
+    assert_that(before, contains_inanyorder("order_id", "customer", "lines"))
+    assert_that(after, contains_inanyorder("order_id", "customer", "lines"))
+    assert_that("schema" in json.loads(entries[0].read_text()), is_(True))
+
+
+def test_stale_stored_schema_is_not_used(tmp_path):
+    """Test that a model edited between sessions is not served from the store."""
+    model_path = tmp_path / "model.py"
+    shutil.copyfile(helpers.MODEL_PATH, model_path)
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        before = helpers.complete(ls_session, "self.pydantic_module.Address.")
+
+    model_path.write_text(
+        model_path.read_text().replace("city: str", "town: str"),
+        encoding="utf-8",
+    )
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        after = helpers.complete(ls_session, "self.pydantic_module.Address.")
+
+    assert_that(before, contains_inanyorder("street", "city", "location"))
+    assert_that(after, contains_inanyorder("street", "town", "location"))
+
+
+def test_completion_items_are_resolved_lazily():
+    """Test that field items carry only a data key until they are resolved."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        result = helpers.complete_list(ls_session, "self.pydantic_module.OrderLine.")
+        items = {item["label"]: item for item in result["items"]}
+        resolved = ls_session.completion_item_resolve(items["quantity"])
+
+    assert_that("detail" in items["quantity"], is_(False))
+    assert_that("documentation" in items["quantity"], is_(False))
+    assert_that(resolved["detail"], is_("quantity: int"))
+    documentation = resolved["documentation"]["value"]
+    assert_that("default: `1`" in documentation, is_(True))
+    assert_that("required: `False`" in documentation, is_(True))
+    assert_that(documentation.startswith("Number of units"), is_(True))
+
+
+@pytest.mark.parametrize("model_extractor", ["static", "import"])
+def test_field_metadata(tmp_path, model_extractor):
+    """Test that only pydantic fields are listed, with their alias, default and constraints."""
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        "from typing import ClassVar\n\n"
+        "from pydantic import BaseModel, Field\n\n\n"
+        "class Part(BaseModel):\n"
+        "    registry: ClassVar[dict] = {}\n"
+        "    _secret: str = 'hidden'\n"
+        '    sku: str = Field(..., alias="SKU", description="Stock keeping unit")\n'
+        "    weight: float = Field(1.5, gt=0)\n",
+        encoding="utf-8",
+    )
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path, model_extractor))
+        result = helpers.complete_list(ls_session, "self.pydantic_module.Part.")
+        items = {item["label"]: item for item in result["items"]}
+        sku = ls_session.completion_item_resolve(items["sku"])
+        weight = ls_session.completion_item_resolve(items["weight"])
+
+    assert_that(list(items), contains_inanyorder("sku", "weight"))
+    assert_that(
+        sku["documentation"]["value"].startswith("Stock keeping unit"), is_(True)
+    )
+    assert_that("required: `True`" in sku["documentation"]["value"], is_(True))
+    assert_that("alias: `'SKU'`" in sku["documentation"]["value"], is_(True))
+    assert_that("default: `1.5`" in weight["documentation"]["value"], is_(True))
+    assert_that("constraints: `gt=0`" in weight["documentation"]["value"], is_(True))
+
+
+def test_imported_models_are_isolated(tmp_path):
+    """Test that repeated imports neither grow sys.path nor reuse stale modules."""
+    marker = tmp_path / "loaded_as.txt"
+    model_path = tmp_path / "model.py"
+    model_source = (
+        "import pathlib\nimport sys\n\n"
+        "from pydantic import BaseModel\n\n"
+        f"pathlib.Path({str(marker)!r}).write_text(\n"
+        f"    __name__ + ' ' + str(sys.path.count({str(tmp_path)!r}))\n"
+        ")\n\n\n"
+        "class Part(BaseModel):\n    name: str\n"
+    )
+    model_path.write_text(model_source, encoding="utf-8")
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        before = helpers.complete(ls_session, "self.pydantic_module.Part.")
+
+        model_path.write_text(
+            model_source.replace("name: str", "title: str"), encoding="utf-8"
+        )
+        # The watcher's refresh may still answer with the previous schema.
+        for version in range(2, 50):
+            after = helpers.complete(ls_session, "self.pydantic_module.Part.", version)
+            if after != before:
+                break
+            time.sleep(0.1)
+
+    module_name, path_entries = marker.read_text().split()
+    assert_that(before, contains_inanyorder("name"))
+    assert_that(after, contains_inanyorder("title"))
+    assert_that(module_name.startswith("_voyager_models."), is_(True))
+    assert_that(path_entries, is_("1"))
+
+
+def test_slow_model_import_does_not_block_other_requests(tmp_path):
+    """Test that requests are answered while a model is still being imported."""
+    model_path = tmp_path / "model.py"
+    started, release = helpers.blocking_module(
+        model_path,
+        "from pydantic import BaseModel\n\n\nclass Part(BaseModel):\n    name: str\n",
+    )
+    text = "x = 1\nself.pydantic_module.Part."
+    with session.LspSession() as ls_session, ThreadPoolExecutor(1) as executor:
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        slow = executor.submit(helpers.complete_list, ls_session, text)
+        helpers.wait_for(started)
+        fast = ls_session.send_text_document_completion(
+            {
+                "textDocument": {"uri": helpers.PLUGIN_URI},
+                "position": {"line": 0, "character": 5},
+            }
+        ).result(timeout=30)
+        answered_first = not slow.done()
+        release.touch()
+        result = slow.result()
+
+    assert_that(fast["items"], is_([]))
+    assert_that(answered_first, is_(True))
+    assert_that([item["label"] for item in result["items"]], is_(["name"]))
+
+
+def test_rapid_typing_drops_outdated_completions(tmp_path):
+    """Test that cancelled and outdated completions do not queue up imports."""
+    model_path, imports = helpers.counting_model(tmp_path)
+    text = "self.pydantic_module.Part."
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        helpers.complete_list(ls_session, "x = 1")
+        requests = []
+        for version in range(2, 12):
+            typed = text + "name"[: version % 4]
+            ls_session.notify_did_change(
+                {
+                    "textDocument": {"uri": helpers.PLUGIN_URI, "version": version},
+                    "contentChanges": [{"text": typed}],
+                }
+            )
+            if len(requests) > 1:
+                # Like VS Code, cancel the previous request, but keep the
+                # first one to check that its outdated result is dropped.
+                ls_session.cancel_request(requests[-1])
+            requests.append(
+                ls_session.send_text_document_completion(
+                    {
+                        "textDocument": {"uri": helpers.PLUGIN_URI},
+                        "position": {"line": 0, "character": len(typed)},
+                    }
+                )
+            )
+        outdated = requests[0].result(timeout=10)
+        current = requests[-1].result(timeout=10)
+
+    assert_that(outdated, is_({"isIncomplete": True, "items": []}))
+    assert_that([item["label"] for item in current["items"]], is_(["name"]))
+    assert_that(imports.read_text().splitlines(), is_(["imported"]))
+
+
+def test_model_index_is_built_after_initialized(tmp_path):
+    """Test that models are indexed before the first request, with progress."""
+    model_path, imports = helpers.counting_model(tmp_path)
+    progress = queue.Queue()
+    with session.LspSession() as ls_session:
+        ls_session.set_notification_callback(session.PROGRESS, progress.put)
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        kinds = []
+        while "end" not in kinds:
+            kinds.append(progress.get(timeout=10)["value"]["kind"])
+        imported_before_request = imports.read_text().splitlines()
+        result = helpers.complete(ls_session, "self.pydantic_module.Part.")
+
+    assert_that(kinds, contains_inanyorder("begin", "report", "report", "end"))
+    assert_that(imported_before_request, is_(["imported"]))
+    assert_that(result, is_(["name"]))
+    assert_that(imports.read_text().splitlines(), is_(["imported"]))
+
+
+def test_model_index_is_not_built_when_warm_up_is_skipped(tmp_path, monkeypatch):
+    """Test that the first request indexes models if warming up is skipped."""
+    monkeypatch.setenv("LS_SKIP_WARM_UP", "1")
+    model_path, imports = helpers.counting_model(tmp_path)
+    progress = queue.Queue()
+    with session.LspSession() as ls_session:
+        ls_session.set_notification_callback(session.PROGRESS, progress.put)
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        time.sleep(2)
+        imported_before_request = imports.exists()
+        result = helpers.complete(ls_session, "self.pydantic_module.Part.")
+
+    assert_that(progress.empty(), is_(True))
+    assert_that(imported_before_request, is_(False))
+    assert_that(result, is_(["name"]))
+    assert_that(imports.read_text().splitlines(), is_(["imported"]))
+
+
+def test_early_request_waits_for_the_model_index(tmp_path):
+    """Test that a request during indexing does not import the model again."""
+    model_path, imports = helpers.counting_model(tmp_path)
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        result = helpers.complete(ls_session, "self.pydantic_module.Part.")
+
+    assert_that(result, is_(["name"]))
+    assert_that(imports.read_text().splitlines(), is_(["imported"]))
+
+
+def test_imported_base_does_not_block_other_requests(tmp_path):
+    """Test that a class whose base lies outside the model sources is
+    imported off the event loop, even once the sources are indexed."""
+    _, release = helpers.blocking_module(
+        tmp_path / "slowbase.py",
+        "from pydantic import BaseModel\n\n\nclass Base(BaseModel):\n    code: int\n",
+    )
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        "from slowbase import Base\n\n\nclass Part(Base):\n    name: str\n",
+        encoding="utf-8",
+    )
+    text = "self.pydantic_module.Part."
+    progress = queue.Queue()
+    with session.LspSession() as ls_session:
+        ls_session.set_notification_callback(session.PROGRESS, progress.put)
+        ls_session.initialize(helpers.initialize_params(model_path))
+        while progress.get(timeout=30)["value"]["kind"] != "end":
+            pass
+        helpers.complete_list(ls_session, "x = 1")
+        ls_session.notify_did_change(
+            {
+                "textDocument": {"uri": helpers.PLUGIN_URI, "version": 2},
+                "contentChanges": [{"text": text}],
+            }
+        )
+        fields = ls_session.send_text_document_completion(
+            {
+                "textDocument": {"uri": helpers.PLUGIN_URI},
+                "position": {"line": 0, "character": len(text)},
+            }
+        )
+        # The base stays unimported until `release` exists, so the classes
+        # can only be answered while its import is still running.
+        classes = ls_session.send_text_document_completion(
+            {
+                "textDocument": {"uri": helpers.PLUGIN_URI},
+                "position": {"line": 0, "character": len("self.pydantic_module.")},
+            }
+        ).result(timeout=30)
+        answered_first = not fields.done()
+        release.touch()
+        fields = fields.result()
+
+    assert_that([item["label"] for item in classes["items"]], is_(["Part"]))
+    assert_that(answered_first, is_(True))
+    assert_that(
+        [item["label"] for item in fields["items"]],
+        contains_inanyorder("code", "name"),
+    )
+
+
+def test_stuck_model_import_restarts_the_runner(tmp_path, monkeypatch):
+    """Test that a runner stuck importing a model is stopped and a new one
+    imports the model once it is fixed."""
+    monkeypatch.setenv("LS_MODEL_IMPORT_TIMEOUT", "1")
+    model_path = tmp_path / "model.py"
+    model = (
+        "from pydantic import BaseModel\n\n\nclass Part(BaseModel):\n    name: str\n"
+    )
+    model_path.write_text("import time\n\ntime.sleep(60)\n" + model, encoding="utf-8")
+
+    errors = queue.Queue()
+
+    def on_log(params):
+        if params["type"] == 1:
+            errors.put(params["message"])
+
+    with session.LspSession() as ls_session:
+        ls_session.set_notification_callback(session.WINDOW_LOG_MESSAGE, on_log)
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        error = errors.get(timeout=30)
+        model_path.write_text(model, encoding="utf-8")
+        result = helpers.complete(ls_session, "self.pydantic_module.Part.")
+
+    assert "took longer than 1 seconds" in error
+    assert_that(result, is_(["name"]))
+
+
+def test_completion_in_the_middle_of_a_line():
+    """Test that text after the cursor does not affect completion."""
+    text = "total = self.pydantic_module.Ord + other"
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        result = helpers.complete_list(ls_session, text, character=text.index(" +"))
+
+    assert_that(
+        [item["label"] for item in result["items"]],
+        contains_inanyorder("Order", "OrderLine"),
+    )
+
+
+def test_completion_through_calls_and_subscripts():
+    """Test completing after a call or subscript on a model access chain."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        actual = helpers.complete(
+            ls_session,
+            "print(self.pydantic_module.Order(order_id=1).lines[0].",
+        )
+
+    assert_that(actual, contains_inanyorder("sku", "quantity"))
+
+
+def test_configured_completion_roots():
+    """Test completing after a configured root expression."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(
+            helpers.initialize_params(helpers.MODEL_PATH, completionRoots=["models"])
+        )
+        configured = helpers.complete(ls_session, "line = models.OrderLine.")
+        default = helpers.complete(ls_session, "self.pydantic_module.OrderLine.", 2)
+
+    assert_that(configured, contains_inanyorder("sku", "quantity"))
+    assert_that(default, is_([]))
@@ -0,0 +1,32 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class GeoPoint(BaseModel):
+    latitude: float
+    longitude: float
+
+
+class Address(BaseModel):
+    street: str
+    city: str = "Munich"
+    location: Optional["GeoPoint"] = None
+
+
+class Customer(BaseModel):
+    name: str
+    address: Optional[Address] = None
+    tags: Dict[str, str] = {}
+    previous_orders: Dict[str, "Order"] = {}
+
+
+class Order(BaseModel):
+    order_id: int
+    customer: Customer
+    lines: List["OrderLine"] = []
+
+
+class OrderLine(BaseModel):
+    sku: str
+    quantity: int = Field(1, description="Number of units")
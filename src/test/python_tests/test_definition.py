@@ -0,0 +1,71 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for going to the definition of pydantic model references.
+"""
+
+import pytest
+from hamcrest import assert_that, is_
+
+from .lsp_test_client import helpers, session, utils
+
+
+@pytest.mark.parametrize("model_extractor", ["static", "import"])
+def test_definition(model_extractor):
+    """Test jumping from a model access chain to the class and field source."""
+    text = "self.pydantic_module.Order.customer.address"
+    model_lines = helpers.MODEL_PATH.read_text().splitlines()
+    with session.LspSession() as ls_session:
+        ls_session.initialize(
+            helpers.initialize_params(helpers.MODEL_PATH, model_extractor)
+        )
+        helpers.complete_list(ls_session, text)
+        locations = [
+            ls_session.text_document_definition(
+                {
+                    "textDocument": {"uri": helpers.PLUGIN_URI},
+                    "position": {"line": 0, "character": text.index(name) + 1},
+                }
+            )
+            for name in ["Order", "address"]
+        ]
+
+    for location, expected in zip(locations, ["class Order(", "    address: "]):
+        assert_that(location["uri"], is_(utils.as_uri(str(helpers.MODEL_PATH))))
+        start = location["range"]["start"]
+        assert_that(model_lines[start["line"]].startswith(expected), is_(True))
+    assert_that(locations[0]["range"]["start"]["character"], is_(6))
+    assert_that(locations[1]["range"]["start"]["character"], is_(4))
+
+
+@pytest.mark.parametrize("model_extractor", ["static", "import"])
+def test_definition_range_counts_utf16_units(tmp_path, model_extractor):
+    """Test that definition columns count UTF-16 code units, as clients do."""
+    model_path = tmp_path / "model.py"
+    field_line = '    note: str = "\U0001f600"; name: str = ""'
+    model_path.write_text(
+        f"from pydantic import BaseModel\n\n\nclass Part(BaseModel):\n{field_line}\n",
+        encoding="utf-8",
+    )
+    text = "self.pydantic_module.Part.name"
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path, model_extractor))
+        helpers.complete_list(ls_session, text)
+        location = ls_session.text_document_definition(
+            {
+                "textDocument": {"uri": helpers.PLUGIN_URI},
+                "position": {"line": 0, "character": len(text) - 1},
+            }
+        )
+
+    # The emoji takes two UTF-16 code units.
+    start = field_line.index("name") + 1
+    assert_that(
+        location["range"],
+        is_(
+            {
+                "start": {"line": 4, "character": start},
+                "end": {"line": 4, "character": start + len("name")},
+            }
+        ),
+    )
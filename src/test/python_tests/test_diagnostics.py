@@ -0,0 +1,232 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for the diagnostics of model references.
+"""
+
+import queue
+import shutil
+
+import pytest
+from hamcrest import assert_that, contains_inanyorder, is_
+
+from .lsp_test_client import helpers, session, utils
+
+schema_cache = utils.import_tool_module("lsp_schema_cache")
+diagnostics = utils.import_tool_module("lsp_diagnostics")
+
+BASE_MODEL = """\
+from pydantic import BaseModel
+
+
+class Stamped(BaseModel):
+    stamp: int
+
+    def touch(self):
+        pass
+"""
+
+ORDER_MODEL = """\
+from typing import ClassVar
+
+from pydantic import BaseModel, field_validator
+
+from base import Stamped
+
+VERSION = "1.0"
+
+
+def helper():
+    return 1
+
+
+class Order(Stamped):
+    qty: int
+    LIMIT: ClassVar[int] = 10
+
+    @property
+    def total(self):
+        return self.qty
+
+    @classmethod
+    def from_voyager(cls, raw):
+        return cls(qty=raw, stamp=0)
+
+    @field_validator("qty")
+    @classmethod
+    def check_qty(cls, value):
+        return value
+
+
+class RushOrder(Order):
+    def expedite(self):
+        pass
+"""
+
+
+@pytest.fixture(name="namespace", params=["static", "import"])
+def fixture_namespace(tmp_path, request):
+    """A model and the base module it imports, read by either extractor."""
+    (tmp_path / "base.py").write_text(BASE_MODEL, encoding="utf-8")
+    (tmp_path / "order.py").write_text(ORDER_MODEL, encoding="utf-8")
+    sources = [str(tmp_path / "base.py"), str(tmp_path / "order.py")]
+    return schema_cache.SchemaCache().get_namespace(sources, request.param)
+
+
+def _messages(namespace, line):
+    return [message for _, _, message in diagnostics.check_line(namespace, line)]
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "order = self.pydantic_module.Order.from_voyager(raw)",
+        "total = self.pydantic_module.Order(qty=1).total",
+        "limit = self.pydantic_module.Order.LIMIT",
+        "self.pydantic_module.Order.check_qty",
+        "self.pydantic_module.RushOrder(qty=1).expedite()",
+        "self.pydantic_module.RushOrder(qty=1).touch()",
+        "version = self.pydantic_module.VERSION",
+        "value = self.pydantic_module.helper()",
+    ],
+)
+def test_defined_names_are_not_reported(namespace, line):
+    """Methods, properties, class variables and other module level names
+    are not missing fields or classes."""
+    assert_that(_messages(namespace, line), is_([]))
+
+
+def test_missing_names_are_reported(namespace):
+    """Names no model module or class defines are reported."""
+    line = "self.pydantic_module.Order.shipped or self.pydantic_module.Invoice"
+
+    assert_that(
+        _messages(namespace, line),
+        contains_inanyorder(
+            "'Order' has no field 'shipped'",
+            "Model class 'Invoice' does not exist",
+        ),
+    )
+
+
+class _DiagnosticsListener:
+    """Collects the diagnostics published for the plugin document."""
+
+    def __init__(self, ls_session):
+        self._published = queue.Queue()
+        ls_session.set_notification_callback(
+            session.PUBLISH_DIAGNOSTICS, self._published.put
+        )
+
+    def wait_for(self, predicate, timeout=10):
+        while True:
+            params = self._published.get(timeout=timeout)
+            messages = [
+                (item["range"]["start"]["line"], item["message"])
+                for item in params["diagnostics"]
+            ]
+            if params["uri"] == helpers.PLUGIN_URI and predicate(messages):
+                return messages
+
+
+def test_diagnostic_ranges_count_utf16_units():
+    """Test that diagnostic columns count UTF-16 code units, as clients do."""
+    text = 'label = "\U0001f600"; self.pydantic_module.Invoice\n'
+    published = queue.Queue()
+    with session.LspSession() as ls_session:
+        ls_session.set_notification_callback(session.PUBLISH_DIAGNOSTICS, published.put)
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        helpers.complete_list(ls_session, text)
+        params = published.get(timeout=10)
+        while params["uri"] != helpers.PLUGIN_URI or not params["diagnostics"]:
+            params = published.get(timeout=10)
+
+    # The emoji takes two UTF-16 code units.
+    start = text.index("Invoice") + 1
+    assert_that(
+        params["diagnostics"][0]["range"],
+        is_(
+            {
+                "start": {"line": 0, "character": start},
+                "end": {"line": 0, "character": start + len("Invoice")},
+            }
+        ),
+    )
+
+
+def test_failed_diagnostics_are_logged(tmp_path):
+    """Test that a check failing on the timer thread is reported."""
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        "class Order:\n    pass\n\n\nraise RuntimeError('broken model')\n",
+        encoding="utf-8",
+    )
+    errors = queue.Queue()
+
+    def on_log(params):
+        if params["type"] == 1 and params["message"].startswith("Failed to check"):
+            errors.put(params["message"])
+
+    with session.LspSession() as ls_session:
+        ls_session.set_notification_callback(session.WINDOW_LOG_MESSAGE, on_log)
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        helpers.complete_list(ls_session, "self.pydantic_module.Order\n")
+        error = errors.get(timeout=10)
+
+    assert "broken model" in error
+
+
+def test_diagnostics_for_unknown_references(tmp_path):
+    """Test diagnostics of unknown classes and fields, updated on edits and model changes."""
+    model_path = tmp_path / "model.py"
+    shutil.copyfile(helpers.MODEL_PATH, model_path)
+    text = (
+        "order = self.pydantic_module.Order(order_id=1)\n"
+        "city = self.pydantic_module.Order.customer.address.town\n"
+        "self.pydantic_module.Invoice.total  # self.pydantic_module.Ignored\n"
+        "street = self.pydantic_module.Address.street.upper()\n"
+    )
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path))
+        listener = _DiagnosticsListener(ls_session)
+        helpers.complete_list(ls_session, text)
+        opened = listener.wait_for(lambda messages: messages)
+
+        ls_session.notify_did_change(
+            {
+                "textDocument": {"uri": helpers.PLUGIN_URI, "version": 2},
+                "contentChanges": [
+                    {
+                        "range": {
+                            "start": {"line": 1, "character": 51},
+                            "end": {"line": 1, "character": 55},
+                        },
+                        "text": "city",
+                    }
+                ],
+            }
+        )
+        edited = listener.wait_for(lambda messages: len(messages) == 1)
+
+        model_path.write_text(
+            model_path.read_text().replace("street: str", "road: str"),
+            encoding="utf-8",
+        )
+        model_changed = listener.wait_for(lambda messages: len(messages) == 2)
+
+    assert_that(
+        opened,
+        contains_inanyorder(
+            (1, "'Address' has no field 'town'"),
+            (2, "Model class 'Invoice' does not exist"),
+        ),
+    )
+    assert_that(edited, is_([(2, "Model class 'Invoice' does not exist")]))
+    assert_that(
+        model_changed,
+        contains_inanyorder(
+            (2, "Model class 'Invoice' does not exist"),
+            (3, "'Address' has no field 'street'"),
+        ),
+    )
@@ -0,0 +1,48 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for hovers over pydantic model references.
+"""
+
+from hamcrest import assert_that, is_
+
+from .lsp_test_client import helpers, session
+
+
+def _hover(ls_session, text, character):
+    helpers.complete_list(ls_session, text)
+    return ls_session.text_document_hover(
+        {
+            "textDocument": {"uri": helpers.PLUGIN_URI},
+            "position": {"line": 0, "character": character},
+        }
+    )
+
+
+def test_hover_on_field():
+    """Test hovering a field of a nested model access chain."""
+    text = "count = len(self.pydantic_module.Order.lines) + 1"
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        actual = _hover(ls_session, text, text.index("lines") + 2)
+
+    value = actual["contents"]["value"]
+    assert_that('Order.lines: List["OrderLine"]' in value, is_(True))
+    assert_that("default: `[]`" in value, is_(True))
+    assert_that(actual["range"]["start"]["character"], is_(text.index("lines")))
+    assert_that(actual["range"]["end"]["character"], is_(text.index(")")))
+
+
+def test_hover_on_class():
+    """Test hovering a model class lists its fields."""
+    text = "self.pydantic_module.OrderLine.sku"
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        actual = _hover(ls_session, text, text.index("OrderLine"))
+        unknown = _hover(ls_session, "self.pydantic_module.Nothing", 25)
+
+    assert_that(
+        actual["contents"]["value"],
+        is_("```python\nclass OrderLine:\n    sku: str\n    quantity: int\n```"),
+    )
+    assert_that(unknown, is_(None))
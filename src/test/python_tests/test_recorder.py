@@ -0,0 +1,46 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for recording the traffic of the server.
+"""
+
+import json
+
+from hamcrest import assert_that, has_items, is_
+
+from .lsp_test_client import helpers, session
+
+
+def test_traffic_is_recorded(tmp_path, monkeypatch):
+    """Test that messages in both directions are written with their time."""
+    recording = tmp_path / "recording.jsonl"
+    monkeypatch.setenv("LS_RECORD_TRAFFIC", str(recording))
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        helpers.complete(ls_session, "self.pydantic_module.Order.")
+
+    records = [json.loads(line) for line in recording.read_text().splitlines()]
+    inbound = [record for record in records if record["direction"] == "in"]
+    assert_that(
+        [record["message"].get("method") for record in inbound[:3]],
+        is_(["initialize", "initialized", "textDocument/didOpen"]),
+    )
+    (request,) = [
+        record
+        for record in inbound
+        if record["message"].get("method") == "textDocument/completion"
+    ]
+    (response,) = [
+        record
+        for record in records
+        if record["direction"] == "out"
+        and record["message"].get("id") == request["message"]["id"]
+    ]
+    assert_that(
+        [item["label"] for item in response["message"]["result"]["items"]],
+        has_items("order_id", "customer", "lines"),
+    )
+    times = [record["time"] for record in records]
+    assert_that(times, is_(sorted(times)))
+    assert request["time"] <= response["time"]
@@ -0,0 +1,86 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for the memory limit of the model indexes.
+"""
+
+import json
+import queue
+
+from hamcrest import assert_that, is_
+
+from .lsp_test_client import helpers, session, utils
+
+schema_cache = utils.import_tool_module("lsp_schema_cache")
+
+
+def test_least_recently_used_model_index_is_evicted(tmp_path):
+    """Test that model indexes past the memory limit are dropped, least
+    recently used first, and built again when needed."""
+    # Indexes of this many fields each take more than the 1 MB limit.
+    fields = "".join(f"    field_{index}: int = 0\n" for index in range(2000))
+    models = []
+    for name in ("alpha", "beta"):
+        folder = tmp_path / name
+        folder.mkdir()
+        model_path = folder / "models.py"
+        model_path.write_text(
+            f"from pydantic import BaseModel\n\n\nclass Big(BaseModel):\n{fields}",
+            encoding="utf-8",
+        )
+        models.append((folder, model_path))
+
+    progress = queue.Queue()
+    evicted = queue.Queue()
+
+    def on_log(params):
+        prefix = "Evicted model index of "
+        if params["message"].startswith(prefix):
+            sources = json.loads(params["message"][len(prefix) :].replace("'", '"'))
+            # The empty global model is evicted as well.
+            if sources:
+                evicted.put(sources)
+
+    text = "self.pydantic_module.Big.field_1999"
+    with session.LspSession() as ls_session:
+        ls_session.set_notification_callback(session.PROGRESS, progress.put)
+        ls_session.set_notification_callback(session.WINDOW_LOG_MESSAGE, on_log)
+        ls_session.initialize(
+            helpers.workspaces_params(models, "import", indexMemoryLimit=1)
+        )
+        while progress.get(timeout=30)["value"]["kind"] != "end":
+            pass
+        evicted_by_beta = evicted.get(timeout=10)
+        alpha = helpers.complete_in(ls_session, models[0][0] / "plugin.py", text)
+        evicted_by_alpha = evicted.get(timeout=10)
+
+    assert_that(evicted_by_beta, is_([str(models[0][1])]))
+    assert_that([item["label"] for item in alpha], is_(["field_1999"]))
+    assert_that(evicted_by_alpha, is_([str(models[1][1])]))
+
+
+def test_imports_for_foreign_bases_are_kept_within_the_limit(tmp_path):
+    """Test that the import of a module whose classes derive from bases
+    outside the sources counts as in use, so it is not evicted and done
+    again on the next lookup."""
+    imports = tmp_path / "imports.txt"
+    (tmp_path / "base.py").write_text(
+        "from pydantic import BaseModel\n\n\nclass Base(BaseModel):\n    code: int\n",
+        encoding="utf-8",
+    )
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        f"with open({str(imports)!r}, 'a') as imports:\n"
+        "    imports.write('imported\\n')\n\n"
+        "from base import Base\n\n\nclass Part(Base):\n    name: str\n",
+        encoding="utf-8",
+    )
+    cache = schema_cache.SchemaCache()
+    cache.set_memory_budget(1)
+    namespace = cache.get_namespace([str(model_path)])
+    for _ in range(3):
+        part = namespace.get_class("Part")
+
+    assert_that(sorted(part.fields), is_(["code", "name"]))
+    assert_that(imports.read_text().splitlines(), is_(["imported"]))
+    assert_that(namespace.is_ready(), is_(True))
@@ -0,0 +1,234 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for the settings of the server and their changes.
+"""
+
+import pathlib
+import queue
+import sys
+
+from hamcrest import assert_that, empty, equal_to, has_item, is_, is_not
+
+from .lsp_test_client import helpers, session, utils
+
+settings = utils.import_tool_module("lsp_settings")
+
+
+def _workspace(folder: pathlib.Path, **setting):
+    return {"workspace": utils.as_uri(str(folder)), **setting}
+
+
+def _snapshot(*workspace_settings):
+    return settings.Settings({}, workspace_settings)
+
+
+def test_extractor_change_outdates_model(tmp_path):
+    """Changing the extractor of a workspace replaces its model."""
+    before = _snapshot(_workspace(tmp_path, args=["models.py"]))
+    after = _snapshot(_workspace(tmp_path, args=["models.py"], modelExtractor="import"))
+
+    outdated, added = settings.model_changes(before, after)
+
+    assert_that(outdated, is_(equal_to({before.model_of(str(tmp_path))})))
+    assert_that(added, is_(equal_to({after.model_of(str(tmp_path))})))
+
+
+def test_args_change_outdates_model(tmp_path):
+    """Changing the model sources of a workspace replaces its model."""
+    before = _snapshot(_workspace(tmp_path, args=["models.py"]))
+    after = _snapshot(_workspace(tmp_path, args=["models.py", "other.py"]))
+
+    outdated, added = settings.model_changes(before, after)
+
+    assert_that(outdated, is_(equal_to({before.model_of(str(tmp_path))})))
+    assert_that(added, is_(equal_to({after.model_of(str(tmp_path))})))
+
+
+def test_interpreter_change_outdates_model(tmp_path):
+    """Changing the interpreter of a workspace replaces its model."""
+    before = _snapshot(_workspace(tmp_path, args=["models.py"], interpreter=[]))
+    after = _snapshot(
+        _workspace(tmp_path, args=["models.py"], interpreter=["python3", "-B"])
+    )
+
+    outdated, added = settings.model_changes(before, after)
+
+    assert_that(outdated, is_(equal_to({before.model_of(str(tmp_path))})))
+    assert_that(added, is_(equal_to({after.model_of(str(tmp_path))})))
+    assert_that(after.interpreters, has_item(("python3", "-B")))
+    assert_that(before.interpreters, is_not(has_item(("python3", "-B"))))
+
+
+def test_unrelated_change_keeps_models(tmp_path):
+    """Settings that do not affect model indexes change nothing."""
+    before = _snapshot(_workspace(tmp_path, args=["models.py"]))
+    after = _snapshot(
+        _workspace(
+            tmp_path,
+            args=["models.py"],
+            completionRoots=["self.models"],
+            showNotifications="always",
+        )
+    )
+
+    outdated, added = settings.model_changes(before, after)
+
+    assert_that(outdated, is_(empty()))
+    assert_that(added, is_(empty()))
+
+
+def test_folder_changes_add_and_outdate_models(tmp_path):
+    """Adding a folder indexes its model, removing one outdates it."""
+    first, second = tmp_path / "first", tmp_path / "second"
+    one = _snapshot(_workspace(first, args=["a.py"]))
+    both = _snapshot(
+        _workspace(first, args=["a.py"]), _workspace(second, args=["b.py"])
+    )
+
+    outdated, added = settings.model_changes(one, both)
+    assert_that(outdated, is_(empty()))
+    assert_that(added, is_(equal_to({both.model_of(str(second))})))
+
+    outdated, added = settings.model_changes(both, one)
+    assert_that(outdated, is_(equal_to({both.model_of(str(second))})))
+    assert_that(added, is_(empty()))
+
+
+def test_folders_sharing_a_model_keep_it(tmp_path):
+    """A model stays indexed while another folder still uses it."""
+    first, second = tmp_path / "first", tmp_path / "second"
+    both = _snapshot(
+        _workspace(first, args=["/models.py"]), _workspace(second, args=["/models.py"])
+    )
+    one = _snapshot(_workspace(first, args=["/models.py"]))
+
+    assert_that(settings.model_changes(both, one), is_(equal_to((set(), set()))))
+
+
+def _change_configuration(ls_session, model_path, model_extractor="static", **settings):
+    params = helpers.initialize_params(model_path, model_extractor, **settings)
+    ls_session.notify_did_change_configuration(
+        {"settings": params["initializationOptions"]}
+    )
+
+
+def test_configuration_change_switches_models(tmp_path):
+    """Test that changed model sources are indexed without a restart."""
+    model_path = tmp_path / "invoices.py"
+    model_path.write_text(
+        "from pydantic import BaseModel\n\n\nclass Invoice(BaseModel):\n    total: int\n",
+        encoding="utf-8",
+    )
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        before = helpers.complete(ls_session, "self.pydantic_module.")
+        _change_configuration(ls_session, model_path)
+        after = helpers.complete(ls_session, "self.pydantic_module.", version=2)
+
+    assert_that(before, has_item("Order"))
+    assert_that(before, has_item("OrderLine"))
+    assert_that(after, is_(["Invoice"]))
+
+
+def test_unrelated_configuration_change_keeps_the_model_index(tmp_path):
+    """Test that settings the model index does not depend on keep it warm."""
+    model_path, imports = helpers.counting_model(tmp_path)
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(model_path, "import"))
+        helpers.complete(ls_session, "self.pydantic_module.Part.")
+        _change_configuration(
+            ls_session, model_path, "import", completionRoots=["models"]
+        )
+        result = helpers.complete(ls_session, "models.Part.", version=2)
+
+    assert_that(result, is_(["name"]))
+    assert_that(imports.read_text().splitlines(), is_(["imported"]))
+
+
+def test_interpreter_change_imports_models_again(tmp_path):
+    """Test that a workspace changing its interpreter rebuilds the imported
+    model index."""
+    model_path, imports = helpers.counting_model(tmp_path)
+    # Clients send the interpreter with the workspace settings only.
+    params = helpers.initialize_params(model_path, "import", interpreter=[])
+    with session.LspSession() as ls_session:
+        ls_session.initialize(params)
+        helpers.complete(ls_session, "self.pydantic_module.Part.")
+        options = params["initializationOptions"]
+        options["settings"][0]["interpreter"] = [sys.executable, "-B"]
+        ls_session.notify_did_change_configuration({"settings": options})
+        result = helpers.complete(ls_session, "self.pydantic_module.Part.", version=2)
+
+    assert_that(result, is_(["name"]))
+    assert_that(imports.read_text().splitlines(), is_(["imported", "imported"]))
+
+
+def test_configuration_change_does_not_wait_for_model_imports(tmp_path):
+    """Test that requests are answered while the runner of a replaced
+    interpreter is still importing a model."""
+    model_path = tmp_path / "model.py"
+    started, release = helpers.blocking_module(
+        model_path,
+        "from pydantic import BaseModel\n\n\nclass Part(BaseModel):\n    name: str\n",
+    )
+    params = helpers.initialize_params(model_path, "import", interpreter=[])
+    with session.LspSession() as ls_session:
+        ls_session.initialize(params)
+        helpers.wait_for(started)
+        options = params["initializationOptions"]
+        for setting in (options["globalSettings"], *options["settings"]):
+            setting["interpreter"] = [sys.executable, "-B"]
+        ls_session.notify_did_change_configuration({"settings": options})
+        ls_session.notify_did_open(
+            {
+                "textDocument": {
+                    "uri": helpers.PLUGIN_URI,
+                    "languageId": "python",
+                    "version": 1,
+                    "text": "x = 1",
+                }
+            }
+        )
+        result = ls_session.send_text_document_completion(
+            {
+                "textDocument": {"uri": helpers.PLUGIN_URI},
+                "position": {"line": 0, "character": 5},
+            }
+        ).result(timeout=30)
+        release.touch()
+
+    assert_that(result["items"], is_([]))
+
+
+def test_notification_setting_change_takes_effect(tmp_path):
+    """Test that errors are shown as notifications once `showNotifications`
+    asks for them, without a restart."""
+    model_path = tmp_path / "model.py"
+    model_path.write_text(
+        "class Order:\n    pass\n\n\nraise RuntimeError('broken model')\n",
+        encoding="utf-8",
+    )
+    errors, shown = queue.Queue(), queue.Queue()
+
+    def on_log(params):
+        if params["type"] == 1:
+            errors.put(params["message"])
+
+    with session.LspSession() as ls_session:
+        ls_session.set_notification_callback(session.WINDOW_LOG_MESSAGE, on_log)
+        ls_session.set_notification_callback(session.WINDOW_SHOW_MESSAGE, shown.put)
+        ls_session.initialize(
+            helpers.initialize_params(model_path, "import", showNotifications="off")
+        )
+        helpers.complete_list(ls_session, "self.pydantic_module.Order\n")
+        errors.get(timeout=10)
+        shown_before = shown.qsize()
+        _change_configuration(
+            ls_session, model_path, "import", showNotifications="onError"
+        )
+        helpers.complete_list(ls_session, "self.pydantic_module.Order\n\n", version=2)
+        message = shown.get(timeout=10)
+
+    assert_that(shown_before, is_(0))
+    assert_that(message["type"], is_(1))
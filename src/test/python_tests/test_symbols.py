@@ -0,0 +1,98 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for the search over model symbols.
+"""
+
+from hamcrest import assert_that, contains_inanyorder, is_
+
+from .lsp_test_client import helpers, session, utils
+
+schema_cache = utils.import_tool_module("lsp_schema_cache")
+symbols = utils.import_tool_module("lsp_symbols")
+
+
+def _index(tmp_path, class_names):
+    model_path = tmp_path / "models.py"
+    model_path.write_text(
+        "".join(f"class {name}:\n    pass\n\n\n" for name in class_names),
+        encoding="utf-8",
+    )
+    index = symbols.SymbolIndex()
+    index.update(schema_cache.SchemaCache().get_namespace([str(model_path)]))
+    return index
+
+
+def test_search_matches_a_bounded_number_of_candidates(tmp_path, monkeypatch):
+    """Names containing the query's characters out of order are matched
+    shortest first, up to `MAX_CANDIDATES` of them."""
+    index = _index(tmp_path, ["X5a1", "X5a22", "Xa5333"])
+
+    monkeypatch.setattr(symbols, "MAX_CANDIDATES", 3)
+    assert_that([symbol.name for symbol in index.search("a5", 10)], is_(["Xa5333"]))
+
+    monkeypatch.setattr(symbols, "MAX_CANDIDATES", 2)
+    assert_that(index.search("a5", 10), is_([]))
+
+
+def test_merge_orders_and_deduplicates():
+    """Merged results keep the search order and list shared symbols once."""
+    order = symbols.Symbol("Order", symbols.CLASS, None, "/a.py", None)
+    lines = symbols.Symbol("lines", symbols.FIELD, "Order", "/a.py", None)
+    line = symbols.Symbol("OrderLine", symbols.CLASS, None, "/b.py", None)
+    list_order = symbols.Symbol("ListOrder", symbols.CLASS, None, "/b.py", None)
+
+    merged = symbols.merge([[order, lines], [line, list_order, order]], "ord", 3)
+
+    assert_that(merged, is_([order, line, lines]))
+
+
+def test_workspace_symbol():
+    """Test fuzzy searching model classes and fields across the workspace."""
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.initialize_params(helpers.MODEL_PATH))
+        found = ls_session.workspace_symbol({"query": "ordln"})
+        missing = ls_session.workspace_symbol({"query": "ordxq"})
+
+    names = [(item.get("containerName"), item["name"]) for item in found]
+    assert_that(names[0], is_((None, "OrderLine")))
+    assert_that(("Order", "lines") in names, is_(True))
+    lines = next(item for item in found if item["name"] == "lines")
+    assert_that(lines["location"]["uri"], is_(utils.as_uri(str(helpers.MODEL_PATH))))
+    assert_that(lines["location"]["range"]["start"]["line"], is_(26))
+    assert_that(missing, is_([]))
+
+
+def test_workspace_symbol_searches_every_workspace(tmp_path):
+    """Test that symbols of all workspace models are found, once each."""
+    models = []
+    for name in ("Alpha", "Beta", "Gamma"):
+        folder = tmp_path / name.lower()
+        folder.mkdir()
+        model_path = folder / "models.py"
+        model_path.write_text(
+            f"from pydantic import BaseModel\n\n\nclass {name}Record(BaseModel):\n"
+            "    record_id: int\n",
+            encoding="utf-8",
+        )
+        models.append((folder, model_path))
+    # Workspaces sharing a model list its symbols once.
+    models.append((tmp_path / "copy", models[0][1]))
+    models[-1][0].mkdir()
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.workspaces_params(models))
+        found = ls_session.workspace_symbol({"query": "record"})
+
+    names = [(item.get("containerName"), item["name"]) for item in found]
+    assert_that(
+        names,
+        contains_inanyorder(
+            (None, "AlphaRecord"),
+            (None, "BetaRecord"),
+            (None, "GammaRecord"),
+            ("AlphaRecord", "record_id"),
+            ("BetaRecord", "record_id"),
+            ("GammaRecord", "record_id"),
+        ),
+    )
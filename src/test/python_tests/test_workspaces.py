@@ -0,0 +1,128 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+"""
+Test for workspace folders and the settings of each.
+"""
+
+import os
+import sys
+
+from hamcrest import assert_that, contains_inanyorder, is_, none
+
+from .lsp_test_client import helpers, session, utils
+
+workspaces = utils.import_tool_module("lsp_workspaces")
+
+
+def _path(*parts):
+    return os.path.join(os.path.abspath(os.sep), *parts)
+
+
+def test_innermost_folder_contains_file():
+    """Files in nested folders belong to the innermost one."""
+    outer, inner = _path("a"), _path("a", "b")
+    resolver = workspaces.WorkspaceResolver([inner, outer])
+
+    assert_that(resolver.resolve(_path("a", "b", "c", "m.py")), is_(inner))
+    assert_that(resolver.resolve(_path("a", "b")), is_(inner))
+    assert_that(resolver.resolve(_path("a", "m.py")), is_(outer))
+
+
+def test_sibling_with_common_prefix_is_not_contained():
+    """A folder does not contain a sibling whose name starts with its name."""
+    folder, sibling = _path("a", "b"), _path("a", "bc")
+    resolver = workspaces.WorkspaceResolver([folder])
+
+    assert_that(resolver.resolve(os.path.join(sibling, "m.py")), is_(none()))
+
+    resolver = workspaces.WorkspaceResolver([folder, sibling])
+    assert_that(resolver.resolve(os.path.join(sibling, "m.py")), is_(sibling))
+    assert_that(resolver.resolve(os.path.join(folder, "m.py")), is_(folder))
+
+
+def test_file_outside_all_folders():
+    """Files outside every folder, and parents of folders, have none."""
+    resolver = workspaces.WorkspaceResolver([_path("a", "b"), _path("c")])
+
+    assert_that(resolver.resolve(_path("d", "m.py")), is_(none()))
+    assert_that(resolver.resolve(_path("a", "m.py")), is_(none()))
+    assert_that(workspaces.WorkspaceResolver().resolve(_path("a")), is_(none()))
+
+
+def test_workspaces_complete_from_their_own_models(tmp_path):
+    """Test that each workspace folder completes from its configured model."""
+    models = []
+    for name in ("Alpha", "Beta"):
+        folder = tmp_path / name.lower()
+        folder.mkdir()
+        model_path = folder / "models.py"
+        model_path.write_text(
+            f"from pydantic import BaseModel\n\n\nclass {name}(BaseModel):\n"
+            f"    {name.lower()}_id: int\n",
+            encoding="utf-8",
+        )
+        models.append((folder, model_path))
+
+    text = "self.pydantic_module."
+    with session.LspSession() as ls_session:
+        ls_session.initialize(helpers.workspaces_params(models))
+        alpha = helpers.complete_in(ls_session, models[0][0] / "plugin.py", text)
+        beta = helpers.complete_in(
+            ls_session, models[1][0] / "plugin.py", text + "Beta."
+        )
+        resolved = ls_session.completion_item_resolve(beta[0])
+
+    assert_that([item["label"] for item in alpha], is_(["Alpha"]))
+    assert_that([item["label"] for item in beta], is_(["beta_id"]))
+    assert_that(resolved["detail"], is_("beta_id: int"))
+
+
+def test_workspaces_use_their_own_completion_roots(tmp_path):
+    """Test that completion roots configured for a folder apply to it only."""
+    models = []
+    for name in ("alpha", "beta"):
+        folder = tmp_path / name
+        folder.mkdir()
+        models.append((folder, helpers.MODEL_PATH))
+    params = helpers.workspaces_params(models)
+    params["initializationOptions"]["settings"][0]["completionRoots"] = ["models"]
+
+    with session.LspSession() as ls_session:
+        ls_session.initialize(params)
+        alpha = helpers.complete_in(
+            ls_session, models[0][0] / "plugin.py", "models.Order."
+        )
+        beta = helpers.complete_in(
+            ls_session, models[1][0] / "plugin.py", "models.Order."
+        )
+
+    assert_that(
+        [item["label"] for item in alpha],
+        contains_inanyorder("order_id", "customer", "lines"),
+    )
+    assert_that(beta, is_([]))
+
+
+def test_workspaces_import_models_with_their_own_interpreter(tmp_path):
+    """Test that workspaces on different interpreters do not share imported
+    models."""
+    model_path, imports = helpers.counting_model(tmp_path)
+    models = []
+    for name in ("alpha", "beta"):
+        folder = tmp_path / name
+        folder.mkdir()
+        models.append((folder, model_path))
+    params = helpers.workspaces_params(models, "import", interpreter=[])
+    settings = params["initializationOptions"]["settings"]
+    settings[0]["interpreter"] = [sys.executable]
+    settings[1]["interpreter"] = [sys.executable, "-B"]
+
+    text = "self.pydantic_module.Part."
+    with session.LspSession() as ls_session:
+        ls_session.initialize(params)
+        alpha = helpers.complete_in(ls_session, models[0][0] / "plugin.py", text)
+        beta = helpers.complete_in(ls_session, models[1][0] / "plugin.py", text)
+
+    assert_that([item["label"] for item in alpha], is_(["name"]))
+    assert_that([item["label"] for item in beta], is_(["name"]))
+    assert_that(imports.read_text().splitlines(), is_(["imported", "imported"]))